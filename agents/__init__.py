@@ -1,23 +1,29 @@
-"""Individual agent implementations."""
+"""Individual agent implementations.
 
-from .data_analyst_agent import DataAnalystAgent
-from .risk_assessment_agent import RiskAssessmentAgent
-from .goal_planning_agent import GoalPlanningAgent
-from .persona_agent import PersonaAgent
-from .product_specialist_agent import ProductSpecialistAgent
-from .meeting_coordinator_agent import MeetingCoordinatorAgent
-from .rm_assistant_agent import RMAssistantAgent
-from .portfolio_optimizer_agent import PortfolioOptimizerAgent
-from .compliance_agent import ComplianceAgent
+Agents are imported on first attribute access, so importing one agent module
+does not pull in every other agent and its dependencies.
+"""
 
-__all__ = [
-    "DataAnalystAgent",
-    "RiskAssessmentAgent", 
-    "GoalPlanningAgent",
-    "PersonaAgent",
-    "ProductSpecialistAgent",
-    "MeetingCoordinatorAgent",
-    "RMAssistantAgent",
-    "PortfolioOptimizerAgent",
-    "ComplianceAgent"
-]
\ No newline at end of file
+from importlib import import_module
+
+_AGENT_MODULES = {
+    "DataAnalystAgent": ".data_analyst_agent",
+    "RiskAssessmentAgent": ".risk_assessment_agent",
+    "GoalPlanningAgent": ".goal_planning_agent",
+    "PersonaAgent": ".persona_agent",
+    "ProductSpecialistAgent": ".product_specialist_agent",
+    "MeetingCoordinatorAgent": ".meeting_coordinator_agent",
+    "RMAssistantAgent": ".rm_assistant_agent",
+    "PortfolioOptimizerAgent": ".portfolio_optimizer_agent",
+    "ComplianceAgent": ".compliance_agent",
+}
+
+__all__ = list(_AGENT_MODULES)
+
+
+def __getattr__(name):
+    if name not in _AGENT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    agent_class = getattr(import_module(_AGENT_MODULES[name], __name__), name)
+    globals()[name] = agent_class
+    return agent_class
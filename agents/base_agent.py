@@ -1,24 +1,31 @@
 """Base agent class for all LangGraph agents."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple, Type
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
 import asyncio
+import time
 from loguru import logger
 
 from langchain_core.language_models import BaseLanguageModel
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-# For Ollama local LLM
-from langchain_community.chat_models import ChatOllama
 
 from settings import get_settings
 from state import WorkflowState, AgentExecution
+from utils.llm_cache import ResponseCache, get_response_cache, make_cache_key
+from utils.llm_client import get_chat_model, json_mode
+from utils.llm_governor import LLMGovernor, Priority, get_llm_governor
+from utils.structured_output import SchemaT, parse_structured
 
 
 class BaseAgent(ABC):
     """Base class for all LangGraph agents."""
+
+    # Admission lane for this agent's LLM calls
+    llm_priority: Priority = Priority.NORMAL
     
     # def __init__(
     #     self,
@@ -58,22 +65,19 @@ class BaseAgent(ABC):
         description: str,
         llm: Optional[BaseLanguageModel] = None,
         temperature: float = 0.1,
-        max_tokens: int = 4000
+        max_tokens: int = 4000,
+        response_cache: Optional[ResponseCache] = None,
+        llm_governor: Optional[LLMGovernor] = None
     ):
         self.name = name
         self.description = description
         self.settings = get_settings()
         self.logger = logger.bind(agent=name)
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
+        self.llm_governor = llm_governor if llm_governor is not None else get_llm_governor()
 
-        # Initialize LLM
-        if llm is None:
-            # ✅ Use Ollama instead of Gemini
-            self.llm = ChatOllama(
-                model="llama3",
-                temperature=temperature,
-            )
-        else:
-            self.llm = llm
+        # Initialize LLM (shared, pooled client unless one is injected)
+        self.llm = llm if llm is not None else get_chat_model(temperature=temperature)
 
         # Agent metadata
         self.created_at = datetime.now()
@@ -81,6 +85,15 @@ class BaseAgent(ABC):
         self.total_execution_time = 0.0
         self.success_count = 0
         self.error_count = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stream_metrics: deque = deque(maxlen=100)
+        self.llm_calls = 0
+        self.llm_wait_time = 0.0
+        self.timeout_count = 0
+        self.fallback_count = 0
+        self.structured_calls = 0
+        self.parse_failures = 0
 
         self.logger.info(f"Initialized agent: {self.name}")
     @abstractmethod
@@ -93,9 +106,15 @@ class BaseAgent(ABC):
         """Get the agent's prompt template."""
         pass
     
-    async def run(self, state: WorkflowState) -> WorkflowState:
-        """Run the agent with error handling and monitoring."""
+    async def run(self, state: WorkflowState, timeout: Optional[float] = None) -> WorkflowState:
+        """Run the agent with error handling, monitoring and a deadline.
+
+        ``timeout`` defaults to ``settings.agent_timeout`` (0 disables it). When
+        the deadline is hit, timeout_fallback() may supply a degraded result;
+        otherwise the timeout is handled like any other agent error.
+        """
         execution = state.add_agent_execution(self.name)
+        timeout = self._resolve_timeout(timeout)
         
         try:
             self.logger.info(f"Starting execution for agent: {self.name}")
@@ -104,15 +123,30 @@ class BaseAgent(ABC):
             if not self.validate_input(state):
                 raise ValueError(f"Input validation failed for agent: {self.name}")
             
-            # Execute the agent
-            result_state = await self.execute(state)
+            # Execute the agent within its deadline
+            timed_out = False
+            deadline = asyncio.timeout(timeout)
+            try:
+                async with deadline:
+                    result_state = await self.execute(state)
+            except TimeoutError:
+                if not deadline.expired():
+                    raise  # e.g. an HTTP timeout inside execute, not our deadline
+                timed_out = True
+                self.timeout_count += 1
+                self.logger.warning(f"Agent {self.name} exceeded its {timeout:.1f}s deadline")
+                result_state = self.timeout_fallback(state)
+                if result_state is None:
+                    raise TimeoutError(f"Deadline of {timeout:.1f}s exceeded")
+                self.fallback_count += 1
+                self.logger.info(f"Using rule-based fallback for agent: {self.name}")
             
             # Post-execution validation
             if not self.validate_output(result_state):
                 raise ValueError(f"Output validation failed for agent: {self.name}")
             
             # Update execution tracking
-            state.complete_agent_execution(self.name, success=True)
+            state.complete_agent_execution(self.name, success=True, timed_out=timed_out)
             self.success_count += 1
             
             self.logger.info(f"Successfully completed execution for agent: {self.name}")
@@ -123,7 +157,9 @@ class BaseAgent(ABC):
             self.logger.error(error_msg)
             
             # Update execution tracking
-            state.complete_agent_execution(self.name, success=False, error=error_msg)
+            state.complete_agent_execution(
+                self.name, success=False, error=error_msg, timed_out=isinstance(e, TimeoutError)
+            )
             self.error_count += 1
             
             # Add error to state
@@ -140,6 +176,22 @@ class BaseAgent(ABC):
             self.execution_count += 1
             if execution.execution_time:
                 self.total_execution_time += execution.execution_time
+
+    def _resolve_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Seconds allowed for one execution, or None for no limit."""
+        if timeout is None:
+            timeout = self.settings.agent_timeout
+            if not timeout or timeout <= 0:
+                return None
+        return max(0.0, float(timeout))
+
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Produce a degraded result without the LLM once the deadline is hit.
+
+        Returns None when the agent has no fallback. Agents with rule-based
+        paths override this; it must not await anything.
+        """
+        return None
     
     def validate_input(self, state: WorkflowState) -> bool:
         """Validate input state before execution."""
@@ -159,16 +211,149 @@ class BaseAgent(ABC):
     async def generate_response(
         self,
         prompt_template: ChatPromptTemplate,
-        input_variables: Dict[str, Any]
+        input_variables: Dict[str, Any],
+        json_output: bool = False
     ) -> str:
-        """Generate response using the LLM."""
+        """Generate response using the LLM, serving repeated prompts from cache.
+
+        ``json_output`` puts models that support it into JSON mode.
+        """
         try:
-            chain = prompt_template | self.llm | StrOutputParser()
-            response = await chain.ainvoke(input_variables)
-            return response.strip()
+            prompt_value = await prompt_template.ainvoke(input_variables)
+
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = make_cache_key(prompt_value.to_messages(), *self._llm_identity(json_output))
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    self.cache_hits += 1
+                    return cached
+                self.cache_misses += 1
+
+            chain = (json_mode(self.llm) if json_output else self.llm) | StrOutputParser()
+            async with self._llm_slot():
+                response = (await chain.ainvoke(prompt_value)).strip()
+
+            if cache_key is not None and response:
+                self.response_cache.set(cache_key, response)
+            return response
         except Exception as e:
             self.logger.error(f"Error generating response: {str(e)}")
             raise
+
+    async def generate_structured(
+        self,
+        prompt_template: ChatPromptTemplate,
+        input_variables: Dict[str, Any],
+        schema: Type[SchemaT]
+    ) -> Tuple[Optional[SchemaT], str]:
+        """Generate a JSON response and validate it into schema.
+
+        Returns the parsed model, or None when the response does not fit the
+        schema, together with the raw text so callers can fall back to their
+        free-text parsers without another generation.
+        """
+        response = await self.generate_response(prompt_template, input_variables, json_output=True)
+        parsed = parse_structured(response, schema)
+        self.structured_calls += 1
+        if parsed is None:
+            self.parse_failures += 1
+            self.logger.warning(f"Response did not match {schema.__name__}, using free-text parsing")
+        return parsed, response
+
+    async def stream_response(
+        self,
+        prompt_template: ChatPromptTemplate,
+        input_variables: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream the LLM response chunk by chunk, recording latency metrics.
+
+        Time-to-first-token and tokens/sec are appended to stream_metrics once the
+        stream completes. Cached responses are yielded as a single chunk.
+        """
+        start_time = time.perf_counter()
+        prompt_value = await prompt_template.ainvoke(input_variables)
+
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = make_cache_key(prompt_value.to_messages(), *self._llm_identity())
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                yield cached
+                self._record_stream_metrics(start_time, start_time, 1, cached=True)
+                return
+            self.cache_misses += 1
+
+        chunks = []
+        first_token_time = None
+        try:
+            chain = self.llm | StrOutputParser()
+            async with self._llm_slot():
+                async for chunk in chain.astream(prompt_value):
+                    if not chunk:
+                        continue
+                    if first_token_time is None:
+                        first_token_time = time.perf_counter()
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            self.logger.error(f"Error streaming response: {str(e)}")
+            raise
+
+        self._record_stream_metrics(start_time, first_token_time, len(chunks), cached=False)
+        response = "".join(chunks).strip()
+        if cache_key is not None and response:
+            self.response_cache.set(cache_key, response)
+
+    @asynccontextmanager
+    async def _llm_slot(self) -> AsyncIterator[None]:
+        """Hold a governor slot for one LLM call in this agent's priority lane."""
+        async with self.llm_governor.slot(self.name, self.llm_priority) as wait_time:
+            self.llm_calls += 1
+            self.llm_wait_time += wait_time
+            yield
+
+    def _record_stream_metrics(
+        self,
+        start_time: float,
+        first_token_time: Optional[float],
+        token_count: int,
+        cached: bool
+    ) -> Dict[str, Any]:
+        """Store latency metrics for one streamed response.
+
+        Each streamed chunk is counted as one token, which matches how Ollama
+        emits its stream.
+        """
+        end_time = time.perf_counter()
+        first_token_time = first_token_time or end_time
+        generation_time = end_time - first_token_time
+
+        metrics = {
+            "time_to_first_token": first_token_time - start_time,
+            "total_time": end_time - start_time,
+            "tokens": token_count,
+            "tokens_per_second": token_count / generation_time if generation_time > 0 else 0.0,
+            "cached": cached,
+        }
+        self.stream_metrics.append(metrics)
+        self.logger.info(
+            f"Streamed {token_count} tokens, first token after "
+            f"{metrics['time_to_first_token']:.3f}s ({metrics['tokens_per_second']:.1f} tokens/s)"
+        )
+        return metrics
+
+    def _llm_identity(self, json_output: bool = False) -> tuple:
+        """Model name and temperature used to namespace cached responses."""
+        model_name = (
+            getattr(self.llm, "model", None)
+            or getattr(self.llm, "model_name", None)
+            or type(self.llm).__name__
+        )
+        if json_output:
+            model_name = f"{model_name}:json"
+        return str(model_name), getattr(self.llm, "temperature", None)
     
     def get_system_prompt(self) -> str:
         """Get the system prompt for this agent."""
@@ -196,6 +381,9 @@ class BaseAgent(ABC):
             self.success_count / self.execution_count 
             if self.execution_count > 0 else 0
         )
+
+        cache_lookups = self.cache_hits + self.cache_misses
+        generated_streams = [m for m in self.stream_metrics if not m["cached"]]
         
         return {
             "agent_name": self.name,
@@ -205,6 +393,27 @@ class BaseAgent(ABC):
             "success_rate": success_rate,
             "total_execution_time": self.total_execution_time,
             "average_execution_time": avg_execution_time,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / cache_lookups if cache_lookups > 0 else 0,
+            "llm_calls": self.llm_calls,
+            "avg_llm_wait_time": self.llm_wait_time / self.llm_calls if self.llm_calls > 0 else 0,
+            "timeout_count": self.timeout_count,
+            "fallback_count": self.fallback_count,
+            "structured_calls": self.structured_calls,
+            "parse_failures": self.parse_failures,
+            "parse_failure_rate": (
+                self.parse_failures / self.structured_calls if self.structured_calls > 0 else 0
+            ),
+            "streamed_responses": len(self.stream_metrics),
+            "avg_time_to_first_token": (
+                sum(m["time_to_first_token"] for m in generated_streams) / len(generated_streams)
+                if generated_streams else 0
+            ),
+            "avg_tokens_per_second": (
+                sum(m["tokens_per_second"] for m in generated_streams) / len(generated_streams)
+                if generated_streams else 0
+            ),
             "created_at": self.created_at.isoformat()
         }
     
@@ -214,6 +423,15 @@ class BaseAgent(ABC):
         self.total_execution_time = 0.0
         self.success_count = 0
         self.error_count = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stream_metrics.clear()
+        self.llm_calls = 0
+        self.llm_wait_time = 0.0
+        self.timeout_count = 0
+        self.fallback_count = 0
+        self.structured_calls = 0
+        self.parse_failures = 0
         self.logger.info(f"Reset metrics for agent: {self.name}")
     
     def __str__(self) -> str:
@@ -1,13 +1,15 @@
 """Goal Planning Agent for investment goal success prediction and analysis."""
 
-import joblib
-import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import CriticalAgent
-from state import WorkflowState, GoalPredictionResult
+from state import WorkflowState, GoalPredictionResult, GoalAnalysisOutput, GoalTimelineOutput
 from settings import get_settings
+from ml.model_registry import get_model_registry
+from ml.prediction_memo import PredictionMemo
+from ml.batch_inference import BatchPredictor, GOAL_FEATURES
+from ml.goal_simulation import GoalSimulator
 
 
 class GoalPlanningAgent(CriticalAgent):
@@ -19,16 +21,22 @@ class GoalPlanningAgent(CriticalAgent):
             description="Analyzes investment goals and predicts success probability with strategic recommendations"
         )
         self.settings = get_settings()
+        self.model_registry = get_model_registry()
         self.goal_model = None
         self.goal_encoders = None
+        self._batch_predictor = None
+        self.simulator = GoalSimulator(
+            n_paths=self.settings.goal_simulation_paths,
+            seed=self.settings.goal_simulation_seed
+        )
+        self.prediction_memo = PredictionMemo(self.settings.prediction_memo_max_entries)
         self._load_models()
     
     def _load_models(self):
-        """Load pre-trained goal prediction models."""
+        """Fetch pre-trained goal prediction models from the shared model registry."""
         try:
-            self.goal_model = joblib.load(self.settings.goal_model_path)
-            self.goal_encoders = joblib.load(self.settings.goal_encoders_path)
-            self.logger.info("Goal prediction models loaded successfully")
+            self.goal_model = self.model_registry.get(self.settings.goal_model_path)
+            self.goal_encoders = self.model_registry.get(self.settings.goal_encoders_path)
         except Exception as e:
             self.logger.error(f"Failed to load goal models: {str(e)}")
             # Continue without models - will use rule-based prediction
@@ -43,8 +51,10 @@ class GoalPlanningAgent(CriticalAgent):
         if not prospect_data:
             raise ValueError("No prospect data available for goal planning")
         
+        risk_level = risk_assessment.risk_level if risk_assessment else None
+        
         # Perform ML-based goal prediction
-        ml_prediction = await self._ml_goal_prediction(prospect_data)
+        ml_prediction = await self._ml_goal_prediction(prospect_data, risk_level)
         
         # Perform AI-based goal analysis
         ai_analysis = await self._ai_goal_analysis(prospect_data, risk_assessment, ml_prediction)
@@ -55,7 +65,10 @@ class GoalPlanningAgent(CriticalAgent):
             probability=ml_prediction['probability'],
             success_factors=ai_analysis['success_factors'],
             challenges=ai_analysis['challenges'],
-            timeline_analysis=ai_analysis['timeline_analysis']
+            timeline_analysis={
+                **ai_analysis['timeline_analysis'],
+                "projection": self._goal_projection(prospect_data, risk_level, ml_prediction)
+            }
         )
         
         # Update state
@@ -64,60 +77,123 @@ class GoalPlanningAgent(CriticalAgent):
         self.logger.info(f"Goal planning completed. Success probability: {goal_result.probability:.1%}")
         return state
     
-    async def _ml_goal_prediction(self, prospect_data) -> Dict[str, Any]:
-        """Perform ML-based goal success prediction."""
-        if not self.goal_model or not self.goal_encoders:
-            return self._rule_based_goal_prediction(prospect_data)
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Keep the model (or rule-based) prediction with default insights."""
+        prospect_data = state.prospect.prospect_data
+        risk_assessment = state.analysis.risk_assessment
+        risk_level = risk_assessment.risk_level if risk_assessment else None
         
-        try:
-            # Prepare input data - must match training features
-            input_data = {
-                "age": prospect_data.age,
-                "annual_income": prospect_data.annual_income,
-                "current_savings": prospect_data.current_savings,
-                "investment_horizon_years": prospect_data.investment_horizon_years,
-                "target_goal_amount": prospect_data.target_goal_amount,
-                "number_of_dependents": prospect_data.number_of_dependents,
-                "investment_experience_level": prospect_data.investment_experience_level,
-            }
-
-            input_df = pd.DataFrame([input_data])
-            
-            # Encode categorical variables
-            for col, encoder in self.goal_encoders.items():
-                if col in input_df.columns:
-                    try:
-                        input_df[col] = encoder.transform(input_df[col])
-                    except ValueError:
-                        # Handle unseen categories
-                        input_df[col] = encoder.transform([encoder.classes_[0]])[0]
-            
-            # Make prediction
-            if hasattr(self.goal_model, 'predict_proba'):
-                # Classification model
-                probabilities = self.goal_model.predict_proba(input_df)[0]
-                prediction = self.goal_model.predict(input_df)[0]
-                
-                # Assuming binary classification: 0=Unlikely, 1=Likely
-                goal_success = "Likely" if prediction == 1 else "Unlikely"
-                probability = float(probabilities[1]) if len(probabilities) > 1 else float(probabilities[0])
-            else:
-                # Regression model - predict probability directly
-                probability = float(self.goal_model.predict(input_df)[0])
-                goal_success = "Likely" if probability > 0.6 else "Unlikely"
-            
-            return {
-                "goal_success": goal_success,
-                "probability": probability,
-                "model_type": "ML"
+        ml_prediction = self._predict_goal(prospect_data, risk_level)
+        defaults = self._goal_analysis(GoalAnalysisOutput())
+        state.analysis.goal_prediction = GoalPredictionResult(
+            goal_success=ml_prediction['goal_success'],
+            probability=ml_prediction['probability'],
+            success_factors=defaults['success_factors'],
+            challenges=defaults['challenges'],
+            timeline_analysis={
+                **defaults['timeline_analysis'],
+                "projection": self._goal_projection(prospect_data, risk_level, ml_prediction)
             }
-            
+        )
+        return state
+    
+    async def _ml_goal_prediction(self, prospect_data, risk_level: Optional[str] = None) -> Dict[str, Any]:
+        """Perform ML-based goal success prediction."""
+        return self._predict_goal(prospect_data, risk_level)
+    
+    def _predict_goal(self, prospect_data, risk_level: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            return self.predict_goal_batch([prospect_data], [risk_level])[0]
         except Exception as e:
             self.logger.error(f"ML goal prediction failed: {str(e)}")
             return self._rule_based_goal_prediction(prospect_data)
     
-    def _rule_based_goal_prediction(self, prospect_data) -> Dict[str, Any]:
-        """Fallback rule-based goal prediction."""
+    def predict_goal_batch(
+        self,
+        prospects: Sequence[Any],
+        risk_levels: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Predict goal success for many prospects with a single model traversal.
+        
+        Falls back to the rule-based prediction when no model is available, with
+        all prospects simulated in one Monte Carlo batch.
+        """
+        # Cheap when unchanged; picks up retrained artifacts without a restart
+        self._load_models()
+        
+        predictor = self._get_batch_predictor()
+        if predictor is None:
+            projections = self.simulator.simulate(prospects, risk_levels)
+            return [
+                self._rule_based_goal_prediction(prospect, projection)
+                for prospect, projection in zip(prospects, projections)
+            ]
+        
+        labels, outputs = predictor.predict(list(prospects))
+        
+        if not predictor.is_classifier:
+            # Regression model - predict probability directly
+            return [
+                {
+                    "goal_success": "Likely" if float(value) > 0.6 else "Unlikely",
+                    "probability": float(value),
+                    "model_type": "ML"
+                }
+                for value in outputs
+            ]
+        
+        # Probability of the "success" class: a Likely/1 label when the model has
+        # one, otherwise the second column as for a binary 0=Unlikely, 1=Likely model
+        success_index = predictor.class_index(["Likely", 1])
+        if success_index is None:
+            success_index = 1 if outputs.shape[1] > 1 else 0
+        
+        return [
+            {
+                "goal_success": "Likely" if label in ("Likely", 1) else "Unlikely",
+                "probability": float(row[success_index]),
+                "model_type": "ML"
+            }
+            for label, row in zip(labels, outputs)
+        ]
+    
+    def _get_batch_predictor(self) -> Optional[BatchPredictor]:
+        """Return a predictor bound to the currently loaded model."""
+        if not self.goal_model or not self.goal_encoders:
+            return None
+        if self._batch_predictor is None or self._batch_predictor.model is not self.goal_model:
+            self._batch_predictor = BatchPredictor(
+                self.goal_model,
+                self.goal_encoders,
+                GOAL_FEATURES,
+                compile_model=self.settings.compiled_forest_inference,
+                compiled_max_rows=self.settings.compiled_forest_max_rows,
+                memo=self.prediction_memo,
+                model_version=self.model_registry.version(self.settings.goal_model_path),
+            )
+        return self._batch_predictor
+    
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """Agent metrics plus the model prediction memo hit rate."""
+        metrics = super().get_performance_metrics()
+        metrics["prediction_memo"] = self.prediction_memo.get_metrics()
+        return metrics
+    
+    def reset_metrics(self):
+        """Reset performance metrics."""
+        self.prediction_memo.reset_metrics()
+        super().reset_metrics()
+    
+    def _goal_projection(self, prospect_data, risk_level: Optional[str], prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """Monte Carlo projection for the timeline, reusing the rule-based one if present."""
+        return prediction.get("projection") or self.simulator.simulate([prospect_data], [risk_level])[0]
+    
+    def _rule_based_goal_prediction(self, prospect_data, projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fallback rule-based goal prediction.
+        
+        The success probability is the share of Monte Carlo paths that reach the
+        target; the required monthly investment uses a fixed 8% annuity.
+        """
         # Calculate required monthly investment
         target_amount = prospect_data.target_goal_amount
         current_savings = prospect_data.current_savings
@@ -144,25 +220,17 @@ class GoalPlanningAgent(CriticalAgent):
         monthly_income = annual_income / 12
         affordable_investment = monthly_income * 0.2  # Assume 20% of income can be invested
         
-        # Determine success probability
-        if required_monthly <= affordable_investment * 0.5:
-            probability = 0.9  # Very achievable
-            goal_success = "Likely"
-        elif required_monthly <= affordable_investment:
-            probability = 0.7  # Achievable with discipline
-            goal_success = "Likely"
-        elif required_monthly <= affordable_investment * 1.5:
-            probability = 0.4  # Challenging but possible
-            goal_success = "Unlikely"
-        else:
-            probability = 0.2  # Very challenging
-            goal_success = "Unlikely"
+        # Determine success probability from the simulated paths
+        projection = projection or self.simulator.simulate([prospect_data])[0]
+        probability = projection["success_probability"]
+        goal_success = "Likely" if probability > 0.6 else "Unlikely"
         
         return {
             "goal_success": goal_success,
             "probability": probability,
             "required_monthly_investment": required_monthly,
             "affordable_monthly_investment": affordable_investment,
+            "projection": projection,
             "model_type": "Rule-based"
         }
     
@@ -178,13 +246,13 @@ class GoalPlanningAgent(CriticalAgent):
             "required_monthly": ml_prediction.get('required_monthly_investment', 0)
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
-        
-        # Parse AI response
-        return self._parse_goal_analysis(response)
+        analysis, response = await self.generate_structured(prompt_template, input_variables, GoalAnalysisOutput)
+        if analysis is None:
+            analysis = self._parse_goal_analysis(response)
+        return self._goal_analysis(analysis)
     
-    def _parse_goal_analysis(self, ai_response: str) -> Dict[str, Any]:
-        """Parse AI goal analysis response."""
+    def _parse_goal_analysis(self, ai_response: str) -> GoalAnalysisOutput:
+        """Collect bulleted sections from a free-text goal analysis response."""
         lines = ai_response.split('\n')
         
         success_factors = []
@@ -211,26 +279,32 @@ class GoalPlanningAgent(CriticalAgent):
                 elif current_section == 'timeline':
                     timeline_insights.append(item)
         
-        # Default values if parsing fails
-        if not success_factors:
-            success_factors = [
-                "Consistent investment discipline",
-                "Long-term market growth",
-                "Regular portfolio review"
-            ]
+        return GoalAnalysisOutput(
+            success_factors=success_factors,
+            challenges=challenges,
+            timeline=GoalTimelineOutput(insights=timeline_insights)
+        )
+    
+    def _goal_analysis(self, analysis: GoalAnalysisOutput) -> Dict[str, Any]:
+        """Goal analysis fields with defaults for anything the model left out."""
+        success_factors = analysis.success_factors or [
+            "Consistent investment discipline",
+            "Long-term market growth",
+            "Regular portfolio review"
+        ]
         
-        if not challenges:
-            challenges = [
-                "Market volatility risks",
-                "Inflation impact",
-                "Changing life circumstances"
-            ]
+        challenges = analysis.challenges or [
+            "Market volatility risks",
+            "Inflation impact",
+            "Changing life circumstances"
+        ]
         
+        timeline = analysis.timeline
         timeline_analysis = {
-            "short_term": "Focus on building investment habit",
-            "medium_term": "Monitor progress and adjust strategy",
-            "long_term": "Stay committed to long-term goals",
-            "insights": timeline_insights
+            "short_term": timeline.short_term or "Focus on building investment habit",
+            "medium_term": timeline.medium_term or "Monitor progress and adjust strategy",
+            "long_term": timeline.long_term or "Stay committed to long-term goals",
+            "insights": timeline.insights
         }
         
         return {
@@ -256,25 +330,21 @@ class GoalPlanningAgent(CriticalAgent):
             - Probability: {probability:.1%}
             - Required Monthly Investment: ₹{required_monthly:,.0f}
             
-            Provide detailed analysis covering:
-            
-            Success Factors:
-            - List factors that support goal achievement
-            - Consider client's strengths and advantages
-            - Include market and strategy factors
-            
-            Challenges:
-            - Identify potential obstacles and risks
-            - Consider market, personal, and economic factors
-            - Highlight areas requiring attention
-            
-            Timeline Analysis:
-            - Short-term milestones (1-2 years)
-            - Medium-term checkpoints (3-5 years)
-            - Long-term considerations
-            - Key review points
+            List the factors that support achieving the goal (client strengths, market and strategy),
+            the obstacles to watch (market, personal and economic), and a timeline with short-term
+            (1-2 years), medium-term (3-5 years) and long-term guidance plus key review points.
             
-            Format your response with clear sections and bullet points.
+            Respond with a single JSON object and nothing else, using this schema:
+            {{
+                "success_factors": ["factors supporting the goal"],
+                "challenges": ["obstacles and risks"],
+                "timeline": {{
+                    "short_term": "guidance for years 1-2",
+                    "medium_term": "guidance for years 3-5",
+                    "long_term": "long-term considerations",
+                    "insights": ["key review points"]
+                }}
+            }}
             """)
         ])
     
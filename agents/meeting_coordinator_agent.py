@@ -1,22 +1,38 @@
 """Meeting Coordinator Agent for automated meeting guide generation."""
 
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import BaseAgent
-from state import WorkflowState, MeetingGuide
+from state import WorkflowState, MeetingGuide, MeetingGuideOutput, ListOutput, ObjectionHandlingOutput
 from settings import get_settings
+from utils.llm_governor import Priority
 
 
 class MeetingCoordinatorAgent(BaseAgent):
     """Agent responsible for generating comprehensive meeting guides and preparation materials."""
     
-    def __init__(self):
+    # sequential: one LLM call per section, awaited in order
+    # concurrent: the same per-section calls issued together
+    # structured: a single JSON prompt covering every section
+    GENERATION_MODES = ("sequential", "concurrent", "structured")
+    
+    # Meeting guides are prepared ahead of time; queue behind interactive and analysis calls
+    llm_priority = Priority.BATCH
+    
+    def __init__(self, generation_mode: Optional[str] = None):
         super().__init__(
             name="Meeting Coordinator Agent",
             description="Generates meeting guides, agendas, and preparation materials for client meetings"
         )
         self.settings = get_settings()
+        self.generation_mode = generation_mode or self.settings.meeting_guide_mode
+        if self.generation_mode not in self.GENERATION_MODES:
+            self.logger.warning(
+                f"Unknown meeting guide mode '{self.generation_mode}', using 'concurrent'"
+            )
+            self.generation_mode = "concurrent"
     
     async def execute(self, state: WorkflowState) -> WorkflowState:
         """Execute meeting guide generation."""
@@ -61,11 +77,21 @@ class MeetingCoordinatorAgent(BaseAgent):
     ) -> MeetingGuide:
         """Generate comprehensive meeting guide."""
         
-        # Generate each section
-        agenda_items = await self._generate_agenda(prospect_data, risk_assessment, persona_classification)
-        talking_points = await self._generate_talking_points(prospect_data, risk_assessment, recommendations)
-        questions = await self._generate_questions(prospect_data, persona_classification)
-        objection_handling = await self._generate_objection_handling(risk_assessment, persona_classification)
+        sections = None
+        if self.generation_mode == "structured":
+            sections = await self._generate_structured_sections(
+                prospect_data, risk_assessment, persona_classification, recommendations
+            )
+            if sections is None:
+                self.logger.warning("Structured meeting guide parsing failed, generating sections individually")
+        
+        if sections is None:
+            sections = await self._generate_sections(
+                prospect_data, risk_assessment, persona_classification, recommendations,
+                concurrent=self.generation_mode != "sequential"
+            )
+        
+        agenda_items, talking_points, questions, objection_handling = sections
         next_steps = await self._generate_next_steps(prospect_data, recommendations)
         
         # Estimate meeting duration
@@ -80,6 +106,73 @@ class MeetingCoordinatorAgent(BaseAgent):
             estimated_duration=duration
         )
     
+    async def _generate_sections(
+        self,
+        prospect_data,
+        risk_assessment,
+        persona_classification,
+        recommendations,
+        concurrent: bool = True
+    ) -> tuple:
+        """Generate agenda, talking points, questions and objection handling with one call each."""
+        section_calls = [
+            lambda: self._generate_agenda(prospect_data, risk_assessment, persona_classification),
+            lambda: self._generate_talking_points(prospect_data, risk_assessment, recommendations),
+            lambda: self._generate_questions(prospect_data, persona_classification),
+            lambda: self._generate_objection_handling(risk_assessment, persona_classification),
+        ]
+        
+        if concurrent:
+            return tuple(await asyncio.gather(*(call() for call in section_calls)))
+        
+        results = []
+        for call in section_calls:
+            results.append(await call())
+        return tuple(results)
+    
+    async def _generate_structured_sections(
+        self,
+        prospect_data,
+        risk_assessment,
+        persona_classification,
+        recommendations
+    ) -> Optional[tuple]:
+        """Generate every LLM-backed section with a single JSON prompt."""
+        recommendations_summary = ""
+        if recommendations:
+            recommendations_summary = "\n".join([
+                f"- {rec.product_name}: {rec.justification[:100]}..."
+                for rec in recommendations[:3]
+            ])
+        
+        input_variables = {
+            "client_name": prospect_data.name,
+            "age": prospect_data.age,
+            "annual_income": prospect_data.annual_income,
+            "target_goal": prospect_data.target_goal_amount,
+            "investment_horizon": prospect_data.investment_horizon_years,
+            "risk_level": risk_assessment.risk_level if risk_assessment else "To be determined",
+            "persona_type": persona_classification.persona_type if persona_classification else "To be determined",
+            "investment_goal": prospect_data.investment_goal or "General investment planning",
+            "recommendations_summary": recommendations_summary or "To be presented"
+        }
+        
+        parsed, _ = await self.generate_structured(self.get_structured_prompt(), input_variables, MeetingGuideOutput)
+        if parsed is None or not parsed.agenda_items:
+            return None
+        
+        return (
+            parsed.agenda_items,
+            parsed.key_talking_points or ["Review client goals and recommended strategy"],
+            parsed.questions_to_ask or ["What are your primary investment objectives?"],
+            parsed.objection_handling or self._parse_objection_responses("")
+        )
+    
+    async def _generate_list(self, prompt_template: ChatPromptTemplate, input_variables: Dict[str, Any]) -> tuple:
+        """Items from a single-list JSON prompt, or None with the raw text for free-text parsing."""
+        parsed, response = await self.generate_structured(prompt_template, input_variables, ListOutput)
+        return (parsed.items if parsed and parsed.items else None), response
+    
     async def _generate_agenda(self, prospect_data, risk_assessment, persona_classification) -> List[str]:
         """Generate meeting agenda items."""
         prompt_template = ChatPromptTemplate.from_messages([
@@ -99,7 +192,7 @@ class MeetingCoordinatorAgent(BaseAgent):
             4. Product presentation
             5. Next steps and follow-up
             
-            Format as a bulleted list with estimated time for each item.
+            Respond with a single JSON object and nothing else: {{"items": ["agenda item with estimated time"]}}
             """)
         ])
         
@@ -111,8 +204,8 @@ class MeetingCoordinatorAgent(BaseAgent):
             "investment_goal": prospect_data.investment_goal or "General investment planning"
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
-        return self._parse_bulleted_list(response)
+        items, response = await self._generate_list(prompt_template, input_variables)
+        return items or self._parse_bulleted_list(response)
     
     async def _generate_talking_points(self, prospect_data, risk_assessment, recommendations) -> List[str]:
         """Generate key talking points for the meeting."""
@@ -140,7 +233,7 @@ class MeetingCoordinatorAgent(BaseAgent):
             4. Address potential concerns
             5. Create urgency and next steps
             
-            Format as clear, actionable talking points.
+            Respond with a single JSON object and nothing else: {{"items": ["actionable talking point"]}}
             """)
         ])
         
@@ -161,8 +254,8 @@ class MeetingCoordinatorAgent(BaseAgent):
             "recommendations_summary": recommendations_summary or "To be presented"
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
-        return self._parse_bulleted_list(response)
+        items, response = await self._generate_list(prompt_template, input_variables)
+        return items or self._parse_bulleted_list(response)
     
     async def _generate_questions(self, prospect_data, persona_classification) -> List[str]:
         """Generate discovery questions to ask the client."""
@@ -184,7 +277,7 @@ class MeetingCoordinatorAgent(BaseAgent):
             5. Gauge decision-making process and timeline
             
             Focus on open-ended questions that encourage dialogue.
-            Format as a list of questions.
+            Respond with a single JSON object and nothing else: {{"items": ["question"]}}
             """)
         ])
         
@@ -195,8 +288,8 @@ class MeetingCoordinatorAgent(BaseAgent):
             "investment_goal": prospect_data.investment_goal or "General investment planning"
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
-        return self._parse_questions(response)
+        items, response = await self._generate_list(prompt_template, input_variables)
+        return items or self._parse_questions(response)
     
     async def _generate_objection_handling(self, risk_assessment, persona_classification) -> Dict[str, str]:
         """Generate objection handling strategies."""
@@ -215,8 +308,8 @@ class MeetingCoordinatorAgent(BaseAgent):
             4. "I want to compare with other options"
             5. "I don't have enough money to invest"
             
-            Format as: Objection -> Response strategy
             Keep responses professional and empathetic.
+            Respond with a single JSON object and nothing else: {{"objection_handling": {{"objection": "response strategy"}}}}
             """)
         ])
         
@@ -225,7 +318,9 @@ class MeetingCoordinatorAgent(BaseAgent):
             "persona_type": persona_classification.persona_type if persona_classification else "To be determined"
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
+        parsed, response = await self.generate_structured(prompt_template, input_variables, ObjectionHandlingOutput)
+        if parsed is not None and parsed.objection_handling:
+            return parsed.objection_handling
         return self._parse_objection_responses(response)
     
     async def _generate_next_steps(self, prospect_data, recommendations) -> List[str]:
@@ -363,6 +458,37 @@ class MeetingCoordinatorAgent(BaseAgent):
         
         return objections
     
+    def get_structured_prompt(self) -> ChatPromptTemplate:
+        """Get prompt template for single-call meeting guide generation."""
+        return ChatPromptTemplate.from_messages([
+            ("system", self.get_system_prompt()),
+            ("human", """
+            Prepare a meeting guide for this client consultation:
+            
+            Client: {client_name}, Age: {age}
+            Income: ₹{annual_income:,}
+            Target Goal: ₹{target_goal:,}
+            Horizon: {investment_horizon} years
+            Risk Profile: {risk_level}
+            Persona: {persona_type}
+            Investment Goal: {investment_goal}
+            
+            Top Recommendations:
+            {recommendations_summary}
+            
+            Respond with a single JSON object and nothing else, using this schema:
+            {{
+                "agenda_items": ["5-7 agenda items with estimated time"],
+                "key_talking_points": ["talking points that build trust and present the solutions"],
+                "questions_to_ask": ["open-ended discovery questions"],
+                "objection_handling": {{"objection": "response strategy"}}
+            }}
+            
+            Cover objections about fees, needing time to think, risk comfort,
+            comparing other options and not having enough money to invest.
+            """)
+        ])
+    
     def get_prompt_template(self) -> ChatPromptTemplate:
         """Default prompt template."""
         return ChatPromptTemplate.from_messages([
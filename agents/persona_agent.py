@@ -1,13 +1,22 @@
 """Persona Agent for client behavioral classification."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import BaseAgent
-from state import WorkflowState, PersonaResult
+from state import WorkflowState, PersonaResult, PersonaOutput
 from settings import get_settings
 
 
+# Personas the rule path may assign at each assessed risk level; any other
+# pairing is left to the LLM. Without a risk assessment every persona is allowed.
+RULE_PERSONAS_BY_RISK = {
+    "High": ("Aggressive Growth",),
+    "Moderate": ("Steady Saver",),
+    "Low": ("Cautious Planner",),
+}
+
+
 class PersonaAgent(BaseAgent):
     """Agent responsible for classifying client personas and behavioral insights."""
     
@@ -17,23 +26,40 @@ class PersonaAgent(BaseAgent):
             description="Classifies client personas and provides behavioral insights for personalized advisory"
         )
         self.settings = get_settings()
+        self.rule_threshold = self.settings.persona_rule_threshold
+        self.llm_calls_avoided = 0
         
         # Define persona types and their characteristics
         self.persona_types = {
             "Aggressive Growth": {
                 "description": "High risk tolerance, seeks maximum returns, comfortable with volatility",
                 "characteristics": ["High risk tolerance", "Growth-focused", "Long-term oriented", "Market-savvy"],
-                "typical_profile": "Young professionals, high income, long investment horizon"
+                "typical_profile": "Young professionals, high income, long investment horizon",
+                "behavioral_insights": [
+                    "Engages with market data and performance comparisons",
+                    "Decides quickly when the growth case is clear",
+                    "May underestimate drawdowns; discuss downside scenarios explicitly"
+                ]
             },
             "Steady Saver": {
                 "description": "Balanced approach, consistent investments, moderate risk tolerance",
                 "characteristics": ["Consistent investor", "Balanced risk approach", "Goal-oriented", "Disciplined"],
-                "typical_profile": "Middle-aged professionals, stable income, medium-term goals"
+                "typical_profile": "Middle-aged professionals, stable income, medium-term goals",
+                "behavioral_insights": [
+                    "Responds well to goal-based plans with regular milestones",
+                    "Prefers systematic investing over market timing",
+                    "Values periodic reviews and clear progress tracking"
+                ]
             },
             "Cautious Planner": {
                 "description": "Conservative approach, capital preservation focus, low risk tolerance",
                 "characteristics": ["Risk-averse", "Capital preservation", "Security-focused", "Conservative"],
-                "typical_profile": "Pre-retirees, risk-averse individuals, short-term goals"
+                "typical_profile": "Pre-retirees, risk-averse individuals, short-term goals",
+                "behavioral_insights": [
+                    "Needs reassurance on capital safety before discussing returns",
+                    "Takes time to decide; offer written material to review",
+                    "Likely to object to volatility and lock-in periods"
+                ]
             }
         }
     
@@ -47,18 +73,23 @@ class PersonaAgent(BaseAgent):
         if not prospect_data:
             raise ValueError("No prospect data available for persona classification")
         
-        # Perform AI-based persona classification
-        persona_result = await self._classify_persona(prospect_data, risk_assessment)
-        
-        # Enhance with behavioral insights
-        behavioral_insights = await self._generate_behavioral_insights(prospect_data, persona_result)
+        # Clear-cut profiles are classified by rules; the rest need one LLM call
+        persona_result = self._rule_based_persona(prospect_data, risk_assessment)
+        if persona_result is not None:
+            self.llm_calls_avoided += 1
+            self.logger.info(
+                f"Rule-based persona {persona_result['persona_type']} "
+                f"(score {persona_result['confidence_score']:.2f}), skipping LLM"
+            )
+        else:
+            persona_result = await self._classify_persona(prospect_data, risk_assessment)
         
         # Create final persona result
         final_result = PersonaResult(
             persona_type=persona_result['persona_type'],
             confidence_score=persona_result['confidence_score'],
             characteristics=self.persona_types[persona_result['persona_type']]['characteristics'],
-            behavioral_insights=behavioral_insights
+            behavioral_insights=persona_result['behavioral_insights']
         )
         
         # Update state
@@ -67,9 +98,57 @@ class PersonaAgent(BaseAgent):
         self.logger.info(f"Persona classification completed: {final_result.persona_type}")
         return state
     
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Classify from the risk level alone, with the persona's standard insights."""
+        prospect_data = state.prospect.prospect_data
+        persona_type = self._rule_based_persona_type(state.analysis.risk_assessment)
+        state.analysis.persona_classification = PersonaResult(
+            persona_type=persona_type,
+            confidence_score=self._calculate_confidence_score(prospect_data, persona_type),
+            characteristics=self.persona_types[persona_type]['characteristics'],
+            behavioral_insights=self.persona_types[persona_type]['behavioral_insights']
+        )
+        return state
+    
+    def _rule_based_persona(self, prospect_data, risk_assessment) -> Optional[Dict[str, Any]]:
+        """Classify without the LLM when one persona clearly fits the profile.
+
+        The best-scoring persona is used only if its rule score reaches the
+        threshold, beats every other persona and is allowed for the assessed
+        risk level in RULE_PERSONAS_BY_RISK; otherwise None is returned and the
+        case goes to the LLM.
+        """
+        scores = {
+            persona_type: self._calculate_confidence_score(prospect_data, persona_type)
+            for persona_type in self.persona_types
+        }
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        best, runner_up = ranked[0], ranked[1]
+        
+        if scores[best] < self.rule_threshold or scores[best] == scores[runner_up]:
+            return None
+        if risk_assessment and best not in RULE_PERSONAS_BY_RISK.get(risk_assessment.risk_level, ()):
+            return None  # e.g. an aggressive profile with a low assessed risk
+        
+        return {
+            "persona_type": best,
+            "confidence_score": scores[best],
+            "ai_reasoning": None,
+            "behavioral_insights": self.persona_types[best]['behavioral_insights']
+        }
+    
+    def _rule_based_persona_type(self, risk_assessment) -> str:
+        """Map the assessed risk level onto a persona type."""
+        risk_level = risk_assessment.risk_level if risk_assessment else None
+        if risk_level == "High":
+            return "Aggressive Growth"
+        elif risk_level == "Low":
+            return "Cautious Planner"
+        return "Steady Saver"
+    
     async def _classify_persona(self, prospect_data, risk_assessment) -> Dict[str, Any]:
-        """Classify client persona using AI."""
-        prompt_template = self.get_classification_prompt()
+        """Classify the persona and generate behavioral insights using AI."""
+        prompt_template = self.get_structured_prompt()
         
         # Prepare context
         risk_info = ""
@@ -82,18 +161,32 @@ class PersonaAgent(BaseAgent):
             "persona_types": self._format_persona_types()
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
-        
-        # Parse response to extract persona type and confidence
-        persona_type = self._extract_persona_type(response)
-        confidence_score = self._calculate_confidence_score(prospect_data, persona_type)
+        parsed, response = await self.generate_structured(prompt_template, input_variables, PersonaOutput)
+        persona_type = self._match_persona_type(parsed.persona_type) if parsed else None
+        if persona_type is not None:
+            reasoning = parsed.reasoning.strip() or response
+            insights = parsed.behavioral_insights
+        else:
+            # Free-text reply: fall back to keyword matching and bullet parsing
+            self.logger.warning("Structured persona parsing failed, using keyword fallback")
+            persona_type = self._extract_persona_type(response)
+            reasoning = response
+            insights = self._parse_insights(response)
         
         return {
             "persona_type": persona_type,
-            "confidence_score": confidence_score,
-            "ai_reasoning": response
+            "confidence_score": self._calculate_confidence_score(prospect_data, persona_type),
+            "ai_reasoning": reasoning,
+            "behavioral_insights": insights or self.persona_types[persona_type]['behavioral_insights']
         }
     
+    def _match_persona_type(self, name: str) -> Optional[str]:
+        """Accept case and spacing variations of a known persona name only."""
+        requested = name.strip().lower()
+        return next(
+            (persona_type for persona_type in self.persona_types if persona_type.lower() == requested), None
+        )
+    
     def _extract_persona_type(self, ai_response: str) -> str:
         """Extract persona type from AI response."""
         response_lower = ai_response.lower()
@@ -127,6 +220,8 @@ class PersonaAgent(BaseAgent):
             score += 0.15
         elif persona_type == "Cautious Planner" and prospect_data.investment_horizon_years < 5:
             score += 0.15
+        elif persona_type == "Steady Saver" and 5 <= prospect_data.investment_horizon_years <= 10:
+            score += 0.15
         
         # Experience level alignment
         experience_mapping = {"Beginner": 0, "Intermediate": 1, "Advanced": 2}
@@ -136,6 +231,8 @@ class PersonaAgent(BaseAgent):
             score += 0.1
         elif persona_type == "Cautious Planner" and experience_score == 0:
             score += 0.1
+        elif persona_type == "Steady Saver" and experience_score == 1:
+            score += 0.1
         
         # Income alignment
         if prospect_data.annual_income > 1000000 and persona_type == "Aggressive Growth":
@@ -143,29 +240,16 @@ class PersonaAgent(BaseAgent):
         
         return min(1.0, score)
     
-    async def _generate_behavioral_insights(self, prospect_data, persona_result: Dict[str, Any]) -> List[str]:
-        """Generate behavioral insights for the classified persona."""
-        prompt_template = self.get_insights_prompt()
-        
-        input_variables = {
-            "prospect_data": prospect_data.dict(),
-            "persona_type": persona_result['persona_type'],
-            "persona_description": self.persona_types[persona_result['persona_type']]['description']
-        }
-        
-        response = await self.generate_response(prompt_template, input_variables)
-        
-        # Parse insights from response
+    def _parse_insights(self, text: str) -> List[str]:
+        """Collect bullet points from a free-text response."""
         insights = []
-        lines = response.split('\n')
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
             if line.startswith('-') or line.startswith('•') or line.startswith('*'):
                 insight = line[1:].strip()
                 if insight:
                     insights.append(insight)
-        
-        return insights or ["Standard behavioral patterns apply for this persona type"]
+        return insights
     
     def _format_persona_types(self) -> str:
         """Format persona types for prompt."""
@@ -175,12 +259,13 @@ class PersonaAgent(BaseAgent):
             formatted += f"Typical Profile: {info['typical_profile']}\n"
         return formatted
     
-    def get_classification_prompt(self) -> ChatPromptTemplate:
-        """Get prompt template for persona classification."""
+    def get_structured_prompt(self) -> ChatPromptTemplate:
+        """Get prompt template for single-call classification and insights."""
         return ChatPromptTemplate.from_messages([
             ("system", self.get_system_prompt()),
             ("human", """
-            Classify the following prospect into one of the defined persona types based on their profile and risk assessment:
+            Classify the following prospect into one of the defined persona types based on their profile and risk assessment,
+            then give behavioral insights that will help the relationship manager:
             
             Prospect Data:
             {prospect_data}
@@ -191,43 +276,33 @@ class PersonaAgent(BaseAgent):
             Available Persona Types:
             {persona_types}
             
-            Instructions:
-            1. Analyze the prospect's age, income, investment horizon, experience level, and risk profile
-            2. Consider their financial goals and current situation
-            3. Match them to the most appropriate persona type
-            4. Provide clear reasoning for your classification
-            
-            Respond with the persona type name and your reasoning.
-            """)
-        ])
-    
-    def get_insights_prompt(self) -> ChatPromptTemplate:
-        """Get prompt template for behavioral insights."""
-        return ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("human", """
-            Generate specific behavioral insights for this prospect based on their classified persona:
-            
-            Prospect Data:
-            {prospect_data}
-            
-            Classified Persona: {persona_type}
-            Persona Description: {persona_description}
-            
-            Provide behavioral insights that will help the relationship manager:
-            - Communication preferences
-            - Decision-making patterns
-            - Likely concerns or objections
-            - Motivation factors
-            - Preferred investment approaches
+            Consider the prospect's age, income, investment horizon, experience level, risk profile
+            and financial goals. Insights should cover communication preferences, decision-making
+            patterns, likely concerns or objections, motivation factors and preferred investment approaches.
             
-            Format as bullet points with actionable insights.
+            Respond with a single JSON object and nothing else, using this schema:
+            {{
+                "persona_type": "one of the persona type names above",
+                "reasoning": "2-3 sentences explaining the classification",
+                "behavioral_insights": ["actionable insights for the relationship manager"]
+            }}
             """)
         ])
     
     def get_prompt_template(self) -> ChatPromptTemplate:
         """Default prompt template."""
-        return self.get_classification_prompt()
+        return self.get_structured_prompt()
+    
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """Agent metrics plus how many classifications skipped the LLM."""
+        metrics = super().get_performance_metrics()
+        metrics["llm_calls_avoided"] = self.llm_calls_avoided
+        return metrics
+    
+    def reset_metrics(self):
+        """Reset performance metrics."""
+        self.llm_calls_avoided = 0
+        super().reset_metrics()
     
     def validate_input(self, state: WorkflowState) -> bool:
         """Validate input for persona classification."""
@@ -1,11 +1,13 @@
 """Portfolio Optimizer Agent for investment allocation optimization."""
 
-from typing import Dict, Any, List
+import pandas as pd
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import OptionalAgent
-from state import WorkflowState
+from state import WorkflowState, PortfolioOptimizationResult
 from settings import get_settings
+from ml.portfolio_optimization import PortfolioOptimizer
 
 
 class PortfolioOptimizerAgent(OptionalAgent):
@@ -17,6 +19,18 @@ class PortfolioOptimizerAgent(OptionalAgent):
             description="Optimizes portfolio allocation and provides asset allocation recommendations"
         )
         self.settings = get_settings()
+        self.optimizer = None
+        self._load_optimizer()
+    
+    def _load_optimizer(self):
+        """Build the optimizer and solve its frontiers for every risk level."""
+        try:
+            self.optimizer = PortfolioOptimizer(pd.read_csv(self.settings.products_csv))
+            self.optimizer.precompute()
+        except Exception as e:
+            self.logger.error(f"Failed to build portfolio optimizer: {str(e)}")
+            # Continue without optimizer - will use rule-based allocation
+            self.optimizer = None
     
     async def execute(self, state: WorkflowState) -> WorkflowState:
         """Execute portfolio optimization."""
@@ -30,28 +44,53 @@ class PortfolioOptimizerAgent(OptionalAgent):
             self.logger.warning("Insufficient data for portfolio optimization")
             return state
         
-        # Generate portfolio allocation
-        portfolio_allocation = await self._generate_portfolio_allocation(
-            prospect_data, risk_assessment, recommendations
-        )
-        
-        # Update state
-        state.recommendations.portfolio_allocation = portfolio_allocation
+        if self.optimizer is not None:
+            optimization = self._optimize_portfolio(prospect_data, risk_assessment)
+            state.recommendations.portfolio_allocation = optimization["asset_allocation"]
+            state.recommendations.portfolio_optimization = PortfolioOptimizationResult(
+                product_weights=optimization["product_weights"],
+                expected_return=optimization["expected_return"],
+                volatility=optimization["volatility"],
+                volatility_budget=optimization["volatility_budget"],
+                affordable=optimization["affordable"]
+            )
+            if not optimization["affordable"]:
+                self.logger.warning("No affordable portfolio for the investable amount, using the frontier portfolio")
+        else:
+            state.recommendations.portfolio_allocation = await self._generate_portfolio_allocation(
+                prospect_data, risk_assessment, recommendations
+            )
         
         self.logger.info("Portfolio optimization completed")
         return state
     
+    def _optimize_portfolio(self, prospect_data, risk_assessment) -> Dict[str, Any]:
+        """Look up the prospect's point on the cached efficient frontier."""
+        return self.optimizer.optimize(
+            risk_level=risk_assessment.risk_level if risk_assessment else "Moderate",
+            age=prospect_data.age,
+            horizon_years=prospect_data.investment_horizon_years,
+            investable_amount=prospect_data.current_savings * 0.8
+        )
+    
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Use the rule-based asset allocation."""
+        state.recommendations.portfolio_allocation = self._rule_based_allocation(
+            state.prospect.prospect_data, state.analysis.risk_assessment
+        )
+        return state
+    
     async def _generate_portfolio_allocation(
         self, 
         prospect_data, 
         risk_assessment, 
         recommendations
     ) -> Dict[str, float]:
-        """Generate optimal portfolio allocation."""
-        
-        # Simple rule-based allocation for now
-        # In production, this would use sophisticated optimization algorithms
-        
+        """Generate a rule-based allocation when the optimizer is unavailable."""
+        return self._rule_based_allocation(prospect_data, risk_assessment)
+    
+    def _rule_based_allocation(self, prospect_data, risk_assessment) -> Dict[str, float]:
+        """Fixed asset allocation by risk level, shifted to debt for older clients."""
         allocation = {}
         total_allocation = 100.0
         
@@ -1,12 +1,16 @@
 """Product Specialist Agent for intelligent product recommendations."""
 
+import asyncio
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import CriticalAgent
 from state import WorkflowState, ProductRecommendation
 from settings import get_settings
+from utils.product_catalog import ProductCatalog, get_product_catalog
+from utils.product_scoring import suitability_matrix, top_k
 
 
 class ProductSpecialistAgent(CriticalAgent):
@@ -18,18 +22,19 @@ class ProductSpecialistAgent(CriticalAgent):
             description="Provides intelligent product recommendations based on client profile and analysis"
         )
         self.settings = get_settings()
-        self.products_df = None
+        self.catalog: Optional[ProductCatalog] = None
+        self.max_recommendations = 5
         self._load_products()
     
     def _load_products(self):
-        """Load product catalog."""
+        """Load the shared, indexed product catalog."""
         try:
-            self.products_df = pd.read_csv(self.settings.products_csv)
-            self.logger.info(f"Loaded {len(self.products_df)} products from catalog")
+            self.catalog = get_product_catalog(self.settings.products_csv)
+            self.logger.info(f"Loaded {len(self.catalog)} products from catalog")
         except Exception as e:
             self.logger.error(f"Failed to load products: {str(e)}")
             # Create dummy products for testing
-            self.products_df = self._create_dummy_products()
+            self.catalog = ProductCatalog(self._create_dummy_products())
     
     def _create_dummy_products(self) -> pd.DataFrame:
         """Create dummy products for testing."""
@@ -97,12 +102,10 @@ class ProductSpecialistAgent(CriticalAgent):
         self.logger.info(f"Generated {len(recommendations)} product recommendations")
         return state
     
-    def _filter_products(self, prospect_data, risk_assessment, persona_classification) -> pd.DataFrame:
-        """Filter products based on client profile."""
-        if self.products_df is None or self.products_df.empty:
-            return pd.DataFrame()
-        
-        filtered_df = self.products_df.copy()
+    def _filter_products(self, prospect_data, risk_assessment, persona_classification) -> np.ndarray:
+        """Select catalog positions of candidate products for the client profile."""
+        if self.catalog is None or self.catalog.empty:
+            return np.empty(0, dtype=np.intp)
         
         # Filter by risk level
         risk_mapping = {
@@ -112,91 +115,132 @@ class ProductSpecialistAgent(CriticalAgent):
         }
         
         suitable_risk_levels = risk_mapping.get(risk_assessment.risk_level, ["Low"])
-        filtered_df = filtered_df[filtered_df['risk_level'].isin(suitable_risk_levels)]
-        
-        # Filter by minimum investment
-        if prospect_data.current_savings > 0:
-            max_investment = min(prospect_data.current_savings * 0.8, 500000)  # Max 80% of savings or 5L
-            filtered_df = filtered_df[filtered_df['min_investment'] <= max_investment]
         
         # Persona-based filtering
         if persona_classification:
             if persona_classification.persona_type == "Aggressive Growth":
                 # Prefer equity and high-growth products
-                filtered_df = filtered_df.sort_values('risk_level', ascending=False)
+                suitable_risk_levels = suitable_risk_levels[::-1]
             elif persona_classification.persona_type == "Cautious Planner":
                 # Prefer debt and low-risk products
-                filtered_df = filtered_df[filtered_df['risk_level'] == 'Low']
+                suitable_risk_levels = ["Low"]
+        
+        # Filter by minimum investment
+        max_investment = None
+        if prospect_data.current_savings > 0:
+            max_investment = min(prospect_data.current_savings * 0.8, 500000)  # Max 80% of savings or 5L
         
-        return filtered_df.head(10)  # Limit to top 10 products
+        return self.catalog.candidates(suitable_risk_levels, max_investment)
     
     async def _generate_recommendations(
         self, 
         prospect_data, 
         risk_assessment, 
         persona_classification, 
-        suitable_products: pd.DataFrame
+        suitable_products: np.ndarray
     ) -> List[ProductRecommendation]:
         """Generate AI-powered product recommendations."""
         
-        if suitable_products.empty:
+        if len(suitable_products) == 0:
             return []
         
-        recommendations = []
+        top_products = self._rank_products(
+            prospect_data, risk_assessment, persona_classification, suitable_products
+        )
         
-        for _, product in suitable_products.iterrows():
-            # Calculate suitability score
-            suitability_score = self._calculate_suitability_score(
-                product, prospect_data, risk_assessment, persona_classification
-            )
-            
-            # Generate AI justification for this product
-            justification = await self._generate_product_justification(
-                product, prospect_data, risk_assessment, persona_classification
-            )
-            
-            recommendation = ProductRecommendation(
-                product_id=product['product_id'],
-                product_name=product['product_name'],
-                product_type=product['product_type'],
-                suitability_score=suitability_score,
-                justification=justification,
-                risk_alignment=product['risk_level'],
-                expected_returns=product.get('expected_return'),
-                fees=product.get('expense_ratio')
-            )
-            
-            recommendations.append(recommendation)
+        # Generate AI justifications only for the products we keep, concurrently
+        semaphore = asyncio.Semaphore(max(1, self.settings.max_concurrent_agents))
         
-        # Sort by suitability score
-        recommendations.sort(key=lambda x: x.suitability_score, reverse=True)
+        async def justify(product) -> str:
+            async with semaphore:
+                return await self._generate_product_justification(
+                    product, prospect_data, risk_assessment, persona_classification
+                )
         
-        return recommendations[:5]  # Return top 5 recommendations
-    
-    def _calculate_suitability_score(self, product, prospect_data, risk_assessment, persona_classification) -> float:
-        """Calculate suitability score for a product."""
-        score = 0.5  # Base score
+        justifications = await asyncio.gather(
+            *(justify(product) for _, product in top_products)
+        )
         
-        # Risk alignment
-        if product['risk_level'] == risk_assessment.risk_level:
-            score += 0.3
-        elif (product['risk_level'] == 'Moderate' and risk_assessment.risk_level in ['Low', 'High']):
-            score += 0.1
+        return [
+            self._build_recommendation(product, suitability_score, justification)
+            for (suitability_score, product), justification in zip(top_products, justifications)
+        ]
+    
+    def _rank_products(
+        self,
+        prospect_data,
+        risk_assessment,
+        persona_classification,
+        suitable_products: np.ndarray
+    ) -> List[tuple]:
+        """Return the best (suitability_score, product) pairs, highest first."""
+        # Score every candidate first - scoring is cheap, LLM justifications are not
+        scores = self._score_products(
+            prospect_data, risk_assessment, persona_classification, suitable_products
+        )[0]
+        return [
+            (float(scores[column]), self.catalog.record(suitable_products[column]))
+            for column in top_k(scores, self.max_recommendations)
+        ]
+    
+    def _score_products(
+        self,
+        prospect_data,
+        risk_assessment,
+        persona_classification,
+        positions: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Suitability scores of catalog products for one prospect, shape (1, products)."""
+        return suitability_matrix(
+            self.catalog,
+            [risk_assessment.risk_level],
+            [prospect_data.current_savings],
+            [persona_classification.persona_type if persona_classification else None],
+            positions
+        )
+    
+    def _build_recommendation(self, product, suitability_score: float, justification: str) -> ProductRecommendation:
+        return ProductRecommendation(
+            product_id=product['product_id'],
+            product_name=product['product_name'],
+            product_type=product['product_type'],
+            suitability_score=suitability_score,
+            justification=justification,
+            risk_alignment=product['risk_level'],
+            expected_returns=product.get('expected_return'),
+            fees=product.get('expense_ratio')
+        )
+    
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Recommend the top-scored products with template justifications."""
+        prospect_data = state.prospect.prospect_data
+        risk_assessment = state.analysis.risk_assessment
+        persona_classification = state.analysis.persona_classification
         
-        # Investment amount alignment
-        if product['min_investment'] <= prospect_data.current_savings * 0.1:
-            score += 0.1
+        suitable_products = self._filter_products(prospect_data, risk_assessment, persona_classification)
+        if len(suitable_products) == 0:
+            return None
         
-        # Persona alignment
-        if persona_classification:
-            if (persona_classification.persona_type == "Aggressive Growth" and 
-                product['risk_level'] == 'High'):
-                score += 0.1
-            elif (persona_classification.persona_type == "Cautious Planner" and 
-                  product['risk_level'] == 'Low'):
-                score += 0.1
+        recommendations = [
+            self._build_recommendation(
+                product,
+                suitability_score,
+                f"{product['product_name']} is a {product['risk_level'].lower()}-risk "
+                f"{product['product_type']} that fits a {risk_assessment.risk_level.lower()} risk profile "
+                f"over a {prospect_data.investment_horizon_years}-year horizon."
+            )
+            for suitability_score, product in self._rank_products(
+                prospect_data, risk_assessment, persona_classification, suitable_products
+            )
+        ]
         
-        return min(1.0, score)
+        state.recommendations.recommended_products = recommendations
+        state.recommendations.justification_text = (
+            f"These {len(recommendations)} products were shortlisted for a {risk_assessment.risk_level} "
+            f"risk profile by suitability score. Detailed justifications were unavailable within the "
+            f"time limit; review each product with the client before proceeding."
+        )
+        return state
     
     async def _generate_product_justification(
         self, 
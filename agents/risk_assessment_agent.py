@@ -1,13 +1,14 @@
 """Risk Assessment Agent for ML-based risk profiling."""
 
-import joblib
-import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import CriticalAgent
-from state import WorkflowState, RiskAssessmentResult
+from state import WorkflowState, RiskAssessmentResult, RiskAnalysisOutput
 from settings import get_settings
+from ml.model_registry import get_model_registry
+from ml.prediction_memo import PredictionMemo
+from ml.batch_inference import BatchPredictor, RISK_FEATURES
 
 
 class RiskAssessmentAgent(CriticalAgent):
@@ -19,16 +20,18 @@ class RiskAssessmentAgent(CriticalAgent):
             description="Performs comprehensive risk assessment using ML models and AI analysis"
         )
         self.settings = get_settings()
+        self.model_registry = get_model_registry()
         self.risk_model = None
         self.label_encoders = None
+        self._batch_predictor = None
+        self.prediction_memo = PredictionMemo(self.settings.prediction_memo_max_entries)
         self._load_models()
     
     def _load_models(self):
-        """Load pre-trained ML models."""
+        """Fetch pre-trained ML models from the shared model registry."""
         try:
-            self.risk_model = joblib.load(self.settings.risk_model_path)
-            self.label_encoders = joblib.load(self.settings.risk_encoders_path)
-            self.logger.info("Risk assessment models loaded successfully")
+            self.risk_model = self.model_registry.get(self.settings.risk_model_path)
+            self.label_encoders = self.model_registry.get(self.settings.risk_encoders_path)
         except Exception as e:
             self.logger.error(f"Failed to load risk models: {str(e)}")
             # Continue without models - will use AI-only assessment
@@ -61,62 +64,89 @@ class RiskAssessmentAgent(CriticalAgent):
         self.logger.info(f"Risk assessment completed. Risk level: {risk_result.risk_level}")
         return state
     
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Keep the model (or rule-based) risk level and skip the AI analysis."""
+        ml_risk_result = self._predict_risk(state.prospect.prospect_data)
+        state.analysis.risk_assessment = RiskAssessmentResult(
+            risk_level=ml_risk_result['risk_level'],
+            confidence_score=ml_risk_result['confidence_score'],
+            risk_factors=["Standard risk factors apply"],
+            recommendations=["Follow standard risk management practices"]
+        )
+        return state
+    
     async def _ml_risk_assessment(self, prospect_data) -> Dict[str, Any]:
         """Perform ML-based risk assessment."""
-        if not self.risk_model or not self.label_encoders:
-            # Fallback to rule-based assessment
+        return self._predict_risk(prospect_data)
+    
+    def _predict_risk(self, prospect_data) -> Dict[str, Any]:
+        try:
+            return self.predict_risk_batch([prospect_data])[0]
+        except Exception as e:
+            self.logger.error(f"ML risk assessment failed: {str(e)}")
             return self._rule_based_risk_assessment(prospect_data)
+    
+    def predict_risk_batch(self, prospects: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Score many prospects with a single predict_proba call.
         
-        try:
-            # Prepare input data - must match training features
-            input_data = {
-                "age": prospect_data.age,
-                "annual_income": prospect_data.annual_income,
-                "current_savings": prospect_data.current_savings,
-                "investment_horizon_years": prospect_data.investment_horizon_years,
-                "number_of_dependents": prospect_data.number_of_dependents,
-                "investment_experience_level": prospect_data.investment_experience_level,
-            }
-
-            input_df = pd.DataFrame([input_data])
-            
-            # Encode categorical variables
-            for col, encoder in self.label_encoders.items():
-                if col in input_df.columns:
-                    try:
-                        input_df[col] = encoder.transform(input_df[col])
-                    except ValueError:
-                        # Handle unseen categories
-                        input_df[col] = encoder.transform([encoder.classes_[0]])[0]
-            
-            # Make prediction
-            prediction = self.risk_model.predict(input_df)[0]
-            probabilities = self.risk_model.predict_proba(input_df)[0]
-            
-            # Map prediction to risk level
-            risk_mapping = {0: "Low", 1: "Moderate", 2: "High"}
-            # Handle both numeric and string predictions
-            if isinstance(prediction, str):
-                risk_level = prediction
-                if risk_level == "Medium":
-                    risk_level = "Moderate"
-            else:
-                risk_level = risk_mapping.get(prediction, "Moderate")
-            confidence_score = float(max(probabilities))
-            
-            return {
-                "risk_level": risk_level,
-                "confidence_score": confidence_score,
+        Falls back to the rule-based assessment when no model is available.
+        """
+        # Cheap when unchanged; picks up retrained artifacts without a restart
+        self._load_models()
+        
+        predictor = self._get_batch_predictor()
+        if predictor is None:
+            return [self._rule_based_risk_assessment(prospect) for prospect in prospects]
+        
+        labels, probabilities = predictor.predict(list(prospects))
+        class_names = [self._normalize_risk_label(label) for label in predictor.classes_]
+        
+        return [
+            {
+                "risk_level": self._normalize_risk_label(label),
+                "confidence_score": float(row.max()),
                 "probabilities": {
-                    "Low": float(probabilities[0]),
-                    "Moderate": float(probabilities[1]),
-                    "High": float(probabilities[2])
+                    name: float(probability) for name, probability in zip(class_names, row)
                 }
             }
-            
-        except Exception as e:
-            self.logger.error(f"ML risk assessment failed: {str(e)}")
-            return self._rule_based_risk_assessment(prospect_data)
+            for label, row in zip(labels, probabilities)
+        ]
+    
+    def _get_batch_predictor(self) -> Optional[BatchPredictor]:
+        """Return a predictor bound to the currently loaded model."""
+        if not self.risk_model or not self.label_encoders:
+            return None
+        if self._batch_predictor is None or self._batch_predictor.model is not self.risk_model:
+            self._batch_predictor = BatchPredictor(
+                self.risk_model,
+                self.label_encoders,
+                RISK_FEATURES,
+                compile_model=self.settings.compiled_forest_inference,
+                compiled_max_rows=self.settings.compiled_forest_max_rows,
+                memo=self.prediction_memo,
+                model_version=self.model_registry.version(self.settings.risk_model_path),
+            )
+        return self._batch_predictor
+    
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """Agent metrics plus the model prediction memo hit rate."""
+        metrics = super().get_performance_metrics()
+        metrics["prediction_memo"] = self.prediction_memo.get_metrics()
+        return metrics
+    
+    def reset_metrics(self):
+        """Reset performance metrics."""
+        self.prediction_memo.reset_metrics()
+        super().reset_metrics()
+    
+    @staticmethod
+    def _normalize_risk_label(label) -> str:
+        """Map numeric or string model labels onto Low / Moderate / High."""
+        risk_mapping = {0: "Low", 1: "Moderate", 2: "High"}
+        # Handle both numeric and string predictions
+        if isinstance(label, str):
+            return "Moderate" if label == "Medium" else label
+        return risk_mapping.get(int(label), "Moderate")
     
     def _rule_based_risk_assessment(self, prospect_data) -> Dict[str, Any]:
         """Fallback rule-based risk assessment."""
@@ -177,9 +207,17 @@ class RiskAssessmentAgent(CriticalAgent):
             "confidence_score": ml_result['confidence_score']
         }
         
-        response = await self.generate_response(prompt_template, input_variables)
+        analysis, response = await self.generate_structured(prompt_template, input_variables, RiskAnalysisOutput)
+        if analysis is None:
+            analysis = self._parse_risk_analysis(response)
         
-        # Parse AI response (in production, use structured output)
+        return {
+            "risk_factors": analysis.risk_factors or ["Standard risk factors apply"],
+            "recommendations": analysis.recommendations or ["Follow standard risk management practices"]
+        }
+    
+    def _parse_risk_analysis(self, response: str) -> RiskAnalysisOutput:
+        """Collect bulleted risk factors and recommendations from a free-text response."""
         lines = response.split('\n')
         risk_factors = []
         recommendations = []
@@ -198,10 +236,7 @@ class RiskAssessmentAgent(CriticalAgent):
                 elif current_section == 'recommendations':
                     recommendations.append(item)
         
-        return {
-            "risk_factors": risk_factors or ["Standard risk factors apply"],
-            "recommendations": recommendations or ["Follow standard risk management practices"]
-        }
+        return RiskAnalysisOutput(risk_factors=risk_factors, recommendations=recommendations)
     
     def get_prompt_template(self) -> ChatPromptTemplate:
         """Get prompt template for AI risk analysis."""
@@ -217,19 +252,15 @@ class RiskAssessmentAgent(CriticalAgent):
             - Risk Level: {ml_risk_level}
             - Confidence: {confidence_score}
             
-            Please provide:
-            
-            Risk Factors:
-            - List specific risk factors based on the prospect's profile
-            - Consider age, income, investment horizon, experience, and dependents
-            - Identify both positive and negative risk indicators
-            
-            Recommendations:
-            - Provide specific risk management recommendations
-            - Suggest appropriate investment strategies
-            - Consider regulatory and compliance aspects
+            Identify the specific positive and negative risk factors in this profile (age, income,
+            investment horizon, experience, dependents), then give risk management and investment
+            strategy recommendations that respect regulatory and compliance requirements.
             
-            Format your response with clear sections for Risk Factors and Recommendations.
+            Respond with a single JSON object and nothing else, using this schema:
+            {{
+                "risk_factors": ["specific risk factors"],
+                "recommendations": ["specific recommendations"]
+            }}
             """)
         ])
     
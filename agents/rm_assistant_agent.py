@@ -1,16 +1,21 @@
 """RM Assistant Agent for interactive chat and query handling."""
 
-from typing import Dict, Any, List, Optional
+from datetime import datetime
+from typing import Dict, Any, List, Optional, AsyncIterator
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import BaseAgent
 from state import WorkflowState
 from settings import get_settings
+from utils.llm_governor import Priority
 
 
 class RMAssistantAgent(BaseAgent):
     """Agent responsible for handling RM queries and providing interactive assistance."""
     
+    # An RM is waiting on the answer, so chat calls are admitted first
+    llm_priority = Priority.INTERACTIVE
+    
     def __init__(self):
         super().__init__(
             name="RM Assistant Agent",
@@ -28,8 +33,38 @@ class RMAssistantAgent(BaseAgent):
         
         # Generate response based on current query and context
         response = await self._generate_response(state)
+        self._record_exchange(state, response)
+        
+        self.logger.info("RM query processed successfully")
+        return state
+    
+    def timeout_fallback(self, state: WorkflowState) -> Optional[WorkflowState]:
+        """Answer with the analysis summary when the LLM misses the deadline."""
+        context = self._prepare_context(state) or "No analysis is available for this client yet"
+        self._record_exchange(
+            state,
+            "I couldn't prepare a detailed answer in time. Here is the current analysis summary: "
+            f"{context}. Please try asking again in a moment."
+        )
+        return state
+    
+    async def stream_query(self, state: WorkflowState, query: str) -> AsyncIterator[str]:
+        """Stream the answer to a query token by token.
+
+        The completed answer is recorded in the chat history once the stream ends;
+        latency metrics for the query are available in stream_metrics.
+        """
+        state.chat.current_query = query
+        chunks = []
         
-        # Update chat state
+        async for chunk in self.stream_response(self.get_prompt_template(), self._build_input_variables(state)):
+            chunks.append(chunk)
+            yield chunk
+        
+        self._record_exchange(state, "".join(chunks).strip())
+    
+    def _record_exchange(self, state: WorkflowState, response: str) -> None:
+        """Store the query/response pair in the chat state and clear the query."""
         state.chat.response = response
         state.chat.conversation_history.append({
             "role": "user",
@@ -44,27 +79,21 @@ class RMAssistantAgent(BaseAgent):
         
         # Clear current query
         state.chat.current_query = None
-        
-        self.logger.info("RM query processed successfully")
-        return state
     
     async def _generate_response(self, state: WorkflowState) -> str:
         """Generate response to RM query."""
-        prompt_template = self.get_prompt_template()
-        
-        # Prepare context
-        context = self._prepare_context(state)
-        
-        input_variables = {
+        return await self.generate_response(self.get_prompt_template(), self._build_input_variables(state))
+    
+    def _build_input_variables(self, state: WorkflowState) -> Dict[str, Any]:
+        """Collect prompt inputs for the current query."""
+        return {
             "query": state.chat.current_query,
             "prospect_data": self._format_prospect_data(state),
             "analysis_results": self._format_analysis_results(state),
             "recommendations": self._format_recommendations(state),
             "conversation_history": self._format_conversation_history(state),
-            "context": context
+            "context": self._prepare_context(state)
         }
-        
-        return await self.generate_response(prompt_template, input_variables)
     
     def _prepare_context(self, state: WorkflowState) -> str:
         """Prepare context information for the query."""
@@ -120,6 +149,18 @@ class RMAssistantAgent(BaseAgent):
             persona = state.analysis.persona_classification
             results.append(f"Persona: {persona.persona_type} (Confidence: {persona.confidence_score:.1%})")
         
+        if state.analysis.goal_prediction:
+            goal = state.analysis.goal_prediction
+            results.append(f"Goal Success: {goal.goal_success} (Probability: {goal.probability:.1%})")
+            projection = goal.timeline_analysis.get("projection")
+            if projection:
+                percentiles = projection["final_value_percentiles"]
+                results.append(
+                    f"Simulated Goal Value: median ₹{percentiles['p50']:,.0f}, "
+                    f"10th percentile ₹{percentiles['p10']:,.0f} "
+                    f"({projection['success_probability']:.1%} of paths reach the target)"
+                )
+        
         if state.prospect.data_quality_score:
             results.append(f"Data Quality: {state.prospect.data_quality_score:.1%}")
         
@@ -4,7 +4,8 @@ import streamlit as st
 import pandas as pd
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional
+import os
+from typing import Dict, Any, Optional, AsyncIterator, Iterator, TYPE_CHECKING
 
 # Configure page
 st.set_page_config(
@@ -20,6 +21,9 @@ from utils.logging_config import setup_logging, get_logger
 from graph import ProspectAnalysisWorkflow
 from state import WorkflowState
 
+if TYPE_CHECKING:
+    from agents.rm_assistant_agent import RMAssistantAgent
+
 # Initialize
 settings = get_settings()
 setup_logging()
@@ -31,36 +35,42 @@ def get_workflow():
     """Initialize and cache the workflow."""
     return ProspectAnalysisWorkflow()
 
-@st.cache_data
 def check_model_status():
-    """Check the status of ML models."""
-    import joblib
-    from pathlib import Path
+    """Check the status of ML models.
 
-    models_dir = Path("ml/models")
+    "available" means the artifacts exist on disk; "loaded" means the model
+    registry has unpickled them. Artifacts are only unpickled (importing
+    sklearn) when an analysis first needs them, so a cold start reports them
+    as available. Not cached: the file checks are cheap and the status changes
+    once an analysis loads the models.
+    """
+    from ml.model_registry import get_model_registry
+
+    registry = get_model_registry()
+    models = {
+        "Risk Assessment": (settings.risk_model_path, settings.risk_encoders_path),
+        "Goal Prediction": (settings.goal_model_path, settings.goal_encoders_path),
+    }
     model_status = {}
 
-    # Risk Assessment Model
-    try:
-        risk_model = joblib.load(models_dir / "risk_profile_model.pkl")
-        risk_encoders = joblib.load(models_dir / "label_encoders.pkl")
-        model_status["Risk Assessment"] = {
-            "loaded": True,
-            "info": f"Model: {type(risk_model).__name__}, Encoders: {len(risk_encoders)}"
-        }
-    except Exception:
-        model_status["Risk Assessment"] = {"loaded": False}
-
-    # Goal Success Model
-    try:
-        goal_model = joblib.load(models_dir / "goal_success_model.pkl")
-        goal_encoders = joblib.load(models_dir / "goal_success_label_encoders.pkl")
-        model_status["Goal Prediction"] = {
-            "loaded": True,
-            "info": f"Model: {type(goal_model).__name__}, Encoders: {len(goal_encoders)}"
-        }
-    except Exception:
-        model_status["Goal Prediction"] = {"loaded": False}
+    for model_name, (model_path, encoders_path) in models.items():
+        if not (os.path.exists(model_path) and os.path.exists(encoders_path)):
+            model_status[model_name] = {"available": False, "loaded": False}
+        elif registry.is_loaded(model_path) and registry.is_loaded(encoders_path):
+            model = registry.get(model_path)
+            encoders = registry.get(encoders_path)
+            model_status[model_name] = {
+                "available": True,
+                "loaded": True,
+                "info": f"Model: {type(model).__name__}, Encoders: {len(encoders)}"
+            }
+        else:
+            size_kb = os.path.getsize(model_path) / 1024
+            model_status[model_name] = {
+                "available": True,
+                "loaded": False,
+                "info": f"Model: {os.path.basename(model_path)} ({size_kb:,.0f} KB), loads on first analysis"
+            }
 
     return model_status
 
@@ -108,16 +118,33 @@ async def analyze_prospect_async(workflow: ProspectAnalysisWorkflow, prospect_da
     """Async wrapper for prospect analysis."""
     return await workflow.analyze_prospect(prospect_data)
 
-def run_analysis(workflow: ProspectAnalysisWorkflow, prospect_data: Dict[str, Any]) -> WorkflowState:
-    """Run prospect analysis synchronously."""
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop of the current script thread, creating one if needed."""
     try:
-        loop = asyncio.get_event_loop()
+        return asyncio.get_event_loop()
     except RuntimeError:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-    
+        return loop
+
+def run_analysis(workflow: ProspectAnalysisWorkflow, prospect_data: Dict[str, Any]) -> WorkflowState:
+    """Run prospect analysis synchronously."""
+    loop = get_event_loop()
     return loop.run_until_complete(analyze_prospect_async(workflow, prospect_data))
 
+def iterate_async(stream: AsyncIterator[Any]) -> Iterator[Any]:
+    """Consume an async iterator from synchronous Streamlit code, item by item."""
+    loop = get_event_loop()
+    iterator = stream.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(iterator.aclose())
+
 def safe_get(obj, path, default=None):
     """Safely get nested attributes/keys from object or dict."""
     try:
@@ -241,6 +268,17 @@ def display_analysis_results(state):
             with st.expander("⚠️ Challenges"):
                 for challenge in challenges:
                     st.write(f"• {challenge}")
+        
+        projection = safe_get(goal_prediction, 'timeline_analysis', {}).get('projection')
+        if projection and projection.get('milestones'):
+            with st.expander("📈 Projected Portfolio Value"):
+                milestones_df = pd.DataFrame(projection['milestones']).set_index('year')
+                st.line_chart(milestones_df[['p10', 'p50', 'p90']])
+                percentiles = projection['final_value_percentiles']
+                st.caption(
+                    f"{projection['paths']:,} simulated paths · median ₹{percentiles['p50']:,.0f} "
+                    f"(10th-90th percentile ₹{percentiles['p10']:,.0f} - ₹{percentiles['p90']:,.0f})"
+                )
     
     # Product Recommendations
     recommended_products = safe_get(state, 'recommendations.recommended_products', [])
@@ -269,6 +307,20 @@ def display_analysis_results(state):
             st.info(justification_text)
             st.caption("🤖 AI-Generated Justification")
     
+    # Optimized Portfolio
+    portfolio_allocation = safe_get(state, 'recommendations.portfolio_allocation')
+    if portfolio_allocation:
+        st.subheader("📊 Portfolio Allocation")
+        st.bar_chart(pd.Series(portfolio_allocation, name="Allocation (%)"))
+        optimization = safe_get(state, 'recommendations.portfolio_optimization')
+        if optimization:
+            st.caption(
+                f"Mean-variance optimized: {safe_get(optimization, 'expected_return', 0):.1%} expected return, "
+                f"{safe_get(optimization, 'volatility', 0):.1%} volatility"
+            )
+            if not safe_get(optimization, 'affordable', True):
+                st.warning("Minimum investments exceed the investable amount; allocation is indicative only.")
+    
     # Key Insights and Action Items
     col1, col2 = st.columns(2)
     
@@ -373,101 +425,47 @@ def display_analysis_results(state):
 #     except Exception as e:
 #         logger.error(f"Chat response generation failed: {str(e)}")
 #         return generate_fallback_response(query, analysis_state)
-def generate_chat_response(query: str, analysis_state, chat_history: list = None) -> str:
-    """Generate AI response to user questions about the analysis."""
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_community.chat_models import ChatOllama
-
-    # Extract key information from analysis state
-    risk_assessment = safe_get(analysis_state, 'analysis.risk_assessment')
-    persona_classification = safe_get(analysis_state, 'analysis.persona_classification')
-    goal_prediction = safe_get(analysis_state, 'analysis.goal_prediction')
-    recommended_products = safe_get(analysis_state, 'recommendations.recommended_products', [])
-    prospect_data = safe_get(analysis_state, 'prospect.prospect_data')
-
-    # Format chat history
-    history_text = ""
-    if chat_history:
-        for msg in chat_history:
-            role = msg["role"]
-            content = msg["content"]
-            history_text += f"{role.upper()}: {content}\n"
-
-    # Create context summary
-    context = f"""
-    PROSPECT ANALYSIS SUMMARY:
-
-    Client Profile:
-    - Name: {safe_get(prospect_data, 'name', 'Unknown')}
-    - Age: {safe_get(prospect_data, 'age', 'Unknown')}
-    - Annual Income: ₹{safe_get(prospect_data, 'annual_income', 0):,}
-    - Current Savings: ₹{safe_get(prospect_data, 'current_savings', 0):,}
-    - Target Goal: ₹{safe_get(prospect_data, 'target_goal_amount', 0):,}
-    - Investment Horizon: {safe_get(prospect_data, 'investment_horizon_years', 0)} years
-    - Experience Level: {safe_get(prospect_data, 'investment_experience_level', 'Unknown')}
-
-    Analysis Results:
-    - Risk Level: {safe_get(risk_assessment, 'risk_level', 'Unknown')}
-    - Risk Confidence: {safe_get(risk_assessment, 'confidence_score', 0):.1%}
-    - Persona Type: {safe_get(persona_classification, 'persona_type', 'Unknown')}
-    - Goal Success: {safe_get(goal_prediction, 'goal_success', 'Unknown')}
-    - Success Probability: {safe_get(goal_prediction, 'probability', 0):.1%}
-    - Recommended Products: {len(recommended_products)} products
-
-    Top Product Recommendation: {safe_get(recommended_products[0] if recommended_products else {}, 'product_name', 'None')}
-    """
-
-    # Prompt template
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", """
-        You are an expert Relationship Manager (RM) Assistant for a financial advisory firm.
-        You help RMs understand and explain prospect analysis results to provide better client service.
-
-        Guidelines:
-        - Be professional, knowledgeable, and helpful
-        - Provide specific, actionable insights
-        - Reference the actual analysis data when answering
-        - Suggest concrete next steps when appropriate
-        - Keep responses concise but comprehensive
-        - Use financial advisory terminology appropriately
-        
-        Previous Conversation History:
-        {history}
-        """),
-        ("human", """
-        Based on this prospect analysis:
-
-        {context}
+def get_rm_assistant() -> "RMAssistantAgent":
+    """Return the chat assistant of the current Streamlit session."""
+    if "rm_assistant" not in st.session_state:
+        from agents.rm_assistant_agent import RMAssistantAgent
+
+        st.session_state["rm_assistant"] = RMAssistantAgent()
+    return st.session_state["rm_assistant"]
+
+def build_chat_state(analysis_state, chat_history: list = None) -> WorkflowState:
+    """Rebuild a WorkflowState from the stored analysis result for the chat assistant."""
+    state = (
+        analysis_state.model_copy(deep=True)
+        if isinstance(analysis_state, WorkflowState)
+        else WorkflowState.model_validate(analysis_state)
+    )
+    state.chat.conversation_history = [
+        {"role": msg["role"], "content": msg["content"]} for msg in (chat_history or [])
+    ]
+    return state
 
-        Client Question: {query}
+def stream_chat_response(query: str, analysis_state, chat_history: list = None) -> Iterator[str]:
+    """Stream the RM assistant's answer token by token.
 
-        Please provide a helpful, professional response that addresses their question using the analysis data.
-        """)
-    ])
+    Falls back to the rule-based response if the LLM fails before producing output.
+    """
+    assistant = get_rm_assistant()
+    streamed_any = False
 
     try:
-        # ✅ Initialize Ollama LLM (local, no API key)
-        llm = ChatOllama(
-            model="llama3",
-            temperature=0.3,
-            host="http://nonunited-felicitas-patterny.ngrok-free.dev"
-        )
-
-        # Generate response
-        chain = prompt_template | llm
-        response = chain.invoke({
-            "context": context,
-            "query": query,
-            "history": history_text
-        })
-
-        return response.content.strip()
-
+        state = build_chat_state(analysis_state, chat_history)
+        for chunk in iterate_async(assistant.stream_query(state, query)):
+            streamed_any = True
+            yield chunk
     except Exception as e:
         logger.error(f"Chat response generation failed: {str(e)}")
-        return generate_fallback_response(query, analysis_state)
-
+        if not streamed_any:
+            yield generate_fallback_response(query, analysis_state)
 
+def generate_chat_response(query: str, analysis_state, chat_history: list = None) -> str:
+    """Generate AI response to user questions about the analysis."""
+    return "".join(stream_chat_response(query, analysis_state, chat_history)).strip()
 
 def generate_fallback_response(query: str, analysis_state) -> str:
     """Generate a rule-based response when AI is unavailable."""
@@ -595,8 +593,9 @@ def main():
         model_status = check_model_status()
 
         for model_name, status in model_status.items():
-            if status['loaded']:
-                st.success(f"✅ {model_name} (ML Model Loaded)")
+            if status['available']:
+                state_label = "Loaded" if status['loaded'] else "Available"
+                st.success(f"✅ {model_name} (ML Model {state_label})")
                 if 'info' in status:
                     st.caption(status['info'])
             else:
@@ -674,7 +673,7 @@ def main():
                     
                     # Show model status
                     model_status = check_model_status()
-                    ml_models_available = sum(1 for status in model_status.values() if status['loaded'])
+                    ml_models_available = sum(1 for status in model_status.values() if status['available'])
                     total_models = len(model_status)
                     
                     if ml_models_available == total_models:
@@ -741,29 +740,36 @@ def main():
                     with open("chat_history.txt", "a", encoding="utf-8") as f:
                         f.write(f"User: {prompt}\n")
 
-                    with st.spinner("🤖 Analyzing your question..."):
-                        try:
-                            # Generate response passing history
-                            response = generate_chat_response(
+                    try:
+                        assistant = get_rm_assistant()
+                        previous_metrics = assistant.stream_metrics[-1] if assistant.stream_metrics else None
+
+                        # Stream the response into the chat message as tokens arrive
+                        with st.chat_message("assistant"):
+                            response = st.write_stream(stream_chat_response(
                                 prompt, 
                                 st.session_state['analysis_result'],
                                 st.session_state.messages[:-1] # Pass history excluding current message for context
-                            )
-                            
-                            # Display assistant response in chat message container
-                            with st.chat_message("assistant"):
-                                st.markdown(response)
-                            
-                            # Add assistant response to chat history
-                            st.session_state.messages.append({"role": "assistant", "content": response})
+                            ))
+
+                            if assistant.stream_metrics and assistant.stream_metrics[-1] is not previous_metrics:
+                                metrics = assistant.stream_metrics[-1]
+                                st.session_state.setdefault("chat_metrics", []).append(metrics)
+                                st.caption(
+                                    f"⚡ First token in {metrics['time_to_first_token']:.2f}s · "
+                                    f"{metrics['tokens_per_second']:.1f} tokens/s"
+                                )
+                        
+                        # Add assistant response to chat history
+                        st.session_state.messages.append({"role": "assistant", "content": response})
+                        
+                        # Save to file
+                        with open("chat_history.txt", "a", encoding="utf-8") as f:
+                            f.write(f"Assistant: {response}\n")
+                            f.write("-" * 50 + "\n")
                             
-                            # Save to file
-                            with open("chat_history.txt", "a", encoding="utf-8") as f:
-                                f.write(f"Assistant: {response}\n")
-                                f.write("-" * 50 + "\n")
-                                
-                        except Exception as e:
-                            st.error(f"Sorry, I encountered an error: {str(e)}")
+                    except Exception as e:
+                        st.error(f"Sorry, I encountered an error: {str(e)}")
     
     # Footer
     st.markdown("---")
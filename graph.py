@@ -1,38 +1,100 @@
 """Main prospect analysis workflow using LangGraph."""
 
+import asyncio
+import time
 import uuid
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, Iterable, AsyncIterator, TYPE_CHECKING
 from datetime import datetime
+from importlib import import_module
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
-from state import WorkflowState, ProspectData
-from agents.data_analyst_agent import DataAnalystAgent
-from agents.risk_assessment_agent import RiskAssessmentAgent
-from agents.persona_agent import PersonaAgent
-from agents.product_specialist_agent import ProductSpecialistAgent
+from settings import get_settings
+from state import WorkflowState, ProspectData, AnalysisState, BatchAnalysisResult
+from utils.checkpointer import create_checkpointer
 from utils.logging_config import get_logger
 
+if TYPE_CHECKING:
+    from agents.base_agent import BaseAgent
+
+
+# Analysis stages that depend on validated prospect data and the risk level
+# (persona and goal assumptions are chosen per risk level). They run as
+# concurrent branches after risk_assessment and join before product_recommendation.
+PARALLEL_ANALYSIS_STEPS = ["goal_planning", "persona_classification"]
+
+# Relative share of the workflow deadline for each stage; "analysis" covers the
+# parallel branches. Time a stage leaves unused rolls over to the later stages.
+STAGE_BUDGET_WEIGHTS = {
+    "data_analysis": 1,
+    "risk_assessment": 1,
+    "analysis": 2,
+    "product_recommendation": 3,
+    "portfolio_optimization": 1,
+}
+
+
+class LazyAgent:
+    """Workflow attribute that imports and constructs its agent on first access.
+
+    Agent modules pull in the LLM client stack, and constructing an agent
+    loads model pickles or the product catalog, so nothing happens until a
+    node first runs the agent. The instance is then stored on the workflow
+    and later reads are plain attribute lookups.
+    """
+
+    def __init__(self, module: str, class_name: str, agent_name: str):
+        self.module = module
+        self.class_name = class_name
+        self.agent_name = agent_name
+        self.attribute = None
+
+    def __set_name__(self, owner, attribute: str):
+        self.attribute = attribute
+
+    def __get__(self, workflow, owner=None):
+        if workflow is None:
+            return self
+        with workflow._agents_lock:
+            agent = workflow.__dict__.get(self.attribute)
+            if agent is None:
+                agent_class = getattr(import_module(self.module), self.class_name)
+                agent = agent_class()
+                workflow.__dict__[self.attribute] = agent
+                workflow.logger.info(f"Initialized {agent.name}")
+        return agent
+
 
 class ProspectAnalysisWorkflow:
     """Main workflow for comprehensive prospect analysis."""
 
-    def __init__(self):
+    data_analyst = LazyAgent("agents.data_analyst_agent", "DataAnalystAgent", "Data Analyst Agent")
+    risk_assessor = LazyAgent("agents.risk_assessment_agent", "RiskAssessmentAgent", "Risk Assessment Agent")
+    goal_planner = LazyAgent("agents.goal_planning_agent", "GoalPlanningAgent", "Goal Planning Agent")
+    persona_classifier = LazyAgent("agents.persona_agent", "PersonaAgent", "Persona Agent")
+    product_specialist = LazyAgent(
+        "agents.product_specialist_agent", "ProductSpecialistAgent", "Product Specialist Agent"
+    )
+    portfolio_optimizer = LazyAgent(
+        "agents.portfolio_optimizer_agent", "PortfolioOptimizerAgent", "Portfolio Optimizer Agent"
+    )
+
+    def __init__(self, checkpointer: Optional[BaseCheckpointSaver] = None):
         self.logger = get_logger("ProspectAnalysisWorkflow")
+        self.settings = get_settings()
         self.graph = None
-        self.checkpointer = MemorySaver()
+        self._agents_lock = threading.RLock()
+        self.checkpointer = checkpointer if checkpointer is not None else create_checkpointer()
         self._build_workflow()
 
     def _build_workflow(self):
         """Build the LangGraph workflow."""
         self.logger.info("Building prospect analysis workflow")
 
-        # Initialize agents
-        self.data_analyst = DataAnalystAgent()
-        self.risk_assessor = RiskAssessmentAgent()
-        self.persona_classifier = PersonaAgent()
-        self.product_specialist = ProductSpecialistAgent()
+        # Agents are LazyAgent attributes, created when their node first runs
 
         # Create workflow graph
         workflow = StateGraph(WorkflowState)
@@ -40,31 +102,38 @@ class ProspectAnalysisWorkflow:
         # Add nodes (agents)
         workflow.add_node("data_analysis", self._data_analysis_node)
         workflow.add_node("risk_assessment", self._risk_assessment_node)
+        workflow.add_node("goal_planning", self._goal_planning_node)
         workflow.add_node("persona_classification", self._persona_classification_node)
         workflow.add_node("product_recommendation", self._product_recommendation_node)
+        workflow.add_node("portfolio_optimization", self._portfolio_optimization_node)
         workflow.add_node("finalize_analysis", self._finalize_analysis_node)
 
         # Define workflow edges
         workflow.set_entry_point("data_analysis")
 
-        # Sequential flow with conditional routing
+        # Risk first; goal and persona both read the risk level, then fan out
+        # and join before recommendations
         workflow.add_edge("data_analysis", "risk_assessment")
-        workflow.add_edge("risk_assessment", "persona_classification")
-        workflow.add_edge("persona_classification", "product_recommendation")
-        workflow.add_edge("product_recommendation", "finalize_analysis")
+        for step in PARALLEL_ANALYSIS_STEPS:
+            workflow.add_edge("risk_assessment", step)
+        workflow.add_edge(PARALLEL_ANALYSIS_STEPS, "product_recommendation")
+        workflow.add_edge("product_recommendation", "portfolio_optimization")
+        workflow.add_edge("portfolio_optimization", "finalize_analysis")
         workflow.add_edge("finalize_analysis", END)
 
         # Compile the graph
         self.graph = workflow.compile(checkpointer=self.checkpointer)
         self.logger.info("Workflow compiled successfully")
 
-    async def _data_analysis_node(self, state: WorkflowState) -> WorkflowState:
+    async def _data_analysis_node(self, state: WorkflowState, config: RunnableConfig) -> WorkflowState:
         """Data analysis node."""
         self.logger.info("Executing data analysis node")
         state.current_step = "data_analysis"
 
         try:
-            result_state = await self.data_analyst.run(state)
+            result_state = await self.data_analyst.run(
+                state, timeout=self._stage_timeout(config, "data_analysis")
+            )
             result_state.completed_steps.append("data_analysis")
             return result_state
         except Exception as e:
@@ -72,13 +141,15 @@ class ProspectAnalysisWorkflow:
             state.failed_steps.append("data_analysis")
             raise
 
-    async def _risk_assessment_node(self, state: WorkflowState) -> WorkflowState:
+    async def _risk_assessment_node(self, state: WorkflowState, config: RunnableConfig) -> WorkflowState:
         """Risk assessment node."""
         self.logger.info("Executing risk assessment node")
         state.current_step = "risk_assessment"
 
         try:
-            result_state = await self.risk_assessor.run(state)
+            result_state = await self.risk_assessor.run(
+                state, timeout=self._stage_timeout(config, "risk_assessment")
+            )
             result_state.completed_steps.append("risk_assessment")
             return result_state
         except Exception as e:
@@ -86,28 +157,67 @@ class ProspectAnalysisWorkflow:
             state.failed_steps.append("risk_assessment")
             raise
 
-    async def _persona_classification_node(self, state: WorkflowState) -> WorkflowState:
+    async def _goal_planning_node(self, state: WorkflowState, config: RunnableConfig) -> Dict[str, Any]:
+        """Goal planning node."""
+        self.logger.info("Executing goal planning node")
+        # Non-critical - recommendations do not depend on the goal prediction
+        return await self._run_analysis_branch(
+            self.goal_planner, "goal_planning", "goal_prediction", state, config, critical=False
+        )
+
+    async def _persona_classification_node(self, state: WorkflowState, config: RunnableConfig) -> Dict[str, Any]:
         """Persona classification node."""
         self.logger.info("Executing persona classification node")
-        state.current_step = "persona_classification"
+        # Non-critical - continue without persona
+        return await self._run_analysis_branch(
+            self.persona_classifier, "persona_classification", "persona_classification", state, config,
+            critical=False
+        )
+
+    async def _run_analysis_branch(
+        self,
+        agent: "BaseAgent",
+        step: str,
+        analysis_field: str,
+        state: WorkflowState,
+        config: RunnableConfig,
+        critical: bool
+    ) -> Dict[str, Any]:
+        """Run an analysis agent as one of the parallel branches.
+
+        Sibling branches receive the same state objects, so each agent works on a
+        private deep copy and only the sub-fields it owns are returned. The
+        reducers declared on WorkflowState merge the branch updates at the join.
+        """
+        branch_state = state.model_copy(deep=True)
+        branch_state.current_step = step
 
         try:
-            result_state = await self.persona_classifier.run(state)
-            result_state.completed_steps.append("persona_classification")
-            return result_state
+            result_state = await agent.run(branch_state, timeout=self._stage_timeout(config, "analysis"))
+            result_state.completed_steps.append(step)
         except Exception as e:
-            self.logger.error(f"Persona classification failed: {str(e)}")
-            state.failed_steps.append("persona_classification")
-            # Non-critical - continue without persona
-            return state
+            self.logger.error(f"{agent.name} failed in step {step}: {str(e)}")
+            branch_state.failed_steps.append(step)
+            if critical:
+                raise
+            result_state = branch_state
 
-    async def _product_recommendation_node(self, state: WorkflowState) -> WorkflowState:
+        return {
+            "analysis": AnalysisState(**{analysis_field: getattr(result_state.analysis, analysis_field)}),
+            "completed_steps": result_state.completed_steps,
+            "failed_steps": result_state.failed_steps,
+            "agent_executions": result_state.agent_executions,
+        }
+
+    async def _product_recommendation_node(self, state: WorkflowState, config: RunnableConfig) -> WorkflowState:
         """Product recommendation node."""
         self.logger.info("Executing product recommendation node")
         state.current_step = "product_recommendation"
 
         try:
-            result_state = await self.product_specialist.run(state)
+            result_state = await self.product_specialist.run(
+                state, timeout=self._stage_timeout(config, "product_recommendation")
+            )
             result_state.completed_steps.append("product_recommendation")
             return result_state
         except Exception as e:
@@ -115,6 +225,44 @@ class ProspectAnalysisWorkflow:
             state.failed_steps.append("product_recommendation")
             raise
 
+    async def _portfolio_optimization_node(self, state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+        """Portfolio optimization node."""
+        self.logger.info("Executing portfolio optimization node")
+        state.current_step = "portfolio_optimization"
+
+        # Non-critical - the optimizer agent degrades to a rule-based allocation
+        result_state = await self.portfolio_optimizer.run(
+            state, timeout=self._stage_timeout(config, "portfolio_optimization")
+        )
+        if result_state.recommendations.portfolio_allocation is not None:
+            result_state.completed_steps.append("portfolio_optimization")
+        else:
+            result_state.failed_steps.append("portfolio_optimization")
+        return result_state
+
+    def _stage_timeout(self, config: Optional[RunnableConfig], stage: str) -> Optional[float]:
+        """Seconds the agents of a stage may use before the workflow deadline.
+
+        Returns None (the agent's own default) when the run has no deadline.
+        """
+        deadline = ((config or {}).get("configurable") or {}).get("deadline")
+        if deadline is None:
+            return None
+
+        stages = list(STAGE_BUDGET_WEIGHTS)
+        remaining_weight = sum(STAGE_BUDGET_WEIGHTS[name] for name in stages[stages.index(stage):])
+        budget = max(0.0, deadline - time.monotonic()) * STAGE_BUDGET_WEIGHTS[stage] / remaining_weight
+        if self.settings.agent_timeout > 0:
+            budget = min(budget, self.settings.agent_timeout)
+        return budget
+
+    def _run_config(self, session_id: str) -> Dict[str, Any]:
+        """Invocation config for a session, with a fresh workflow deadline."""
+        configurable: Dict[str, Any] = {"thread_id": session_id}
+        if self.settings.workflow_timeout > 0:
+            configurable["deadline"] = time.monotonic() + self.settings.workflow_timeout
+        return {"configurable": configurable}
+
     async def _finalize_analysis_node(self, state: WorkflowState) -> WorkflowState:
         """Finalize analysis and generate summary."""
         self.logger.info("Finalizing analysis")
@@ -161,6 +309,10 @@ class ProspectAnalysisWorkflow:
         if state.analysis.risk_assessment:
             insights.append(f"Risk Profile: {state.analysis.risk_assessment.risk_level}")
 
+        if state.analysis.goal_prediction:
+            goal = state.analysis.goal_prediction
+            insights.append(f"Goal Success: {goal.goal_success} ({goal.probability:.0%} probability)")
+
         if state.analysis.persona_classification:
             insights.append(f"Investor Persona: {state.analysis.persona_classification.persona_type}")
 
@@ -168,6 +320,13 @@ class ProspectAnalysisWorkflow:
             top_product = state.recommendations.recommended_products[0]
             insights.append(f"Top Recommendation: {top_product.product_name}")
 
+        if state.recommendations.portfolio_optimization:
+            optimization = state.recommendations.portfolio_optimization
+            insights.append(
+                f"Optimized Portfolio: {optimization.expected_return:.1%} expected return "
+                f"at {optimization.volatility:.1%} volatility"
+            )
+
         if state.prospect.data_quality_score:
             if state.prospect.data_quality_score > 0.8:
                 insights.append("High data quality - reliable analysis")
@@ -225,8 +384,7 @@ class ProspectAnalysisWorkflow:
 
         try:
             # Execute workflow
-            config = {"configurable": {"thread_id": session_id}}
-            final_state = await self.graph.ainvoke(initial_state, config=config)
+            final_state = await self.graph.ainvoke(initial_state, config=self._run_config(session_id))
 
             self.logger.info(f"Prospect analysis completed successfully. Workflow ID: {workflow_id}")
             return final_state
@@ -235,6 +393,103 @@ class ProspectAnalysisWorkflow:
             self.logger.error(f"Prospect analysis failed: {str(e)}")
             raise
 
+    async def analyze_prospects(
+        self,
+        prospects: Iterable[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[BatchAnalysisResult]:
+        """Analyze many prospects concurrently, yielding each result as it finishes.
+
+        Agents and their loaded models are shared across the whole batch. The input
+        is consumed lazily, so large extracts never sit in memory as pending tasks,
+        and a failing prospect is reported in its result instead of aborting the batch.
+        """
+        concurrency = max(1, max_concurrency or self.settings.max_concurrent_agents)
+        pending = iter(enumerate(prospects))
+        results: asyncio.Queue = asyncio.Queue()
+        worker_done = object()
+
+        async def worker():
+            try:
+                for index, prospect_data in pending:
+                    results.put_nowait(await self._analyze_batch_item(index, prospect_data))
+            except Exception as e:
+                results.put_nowait(e)
+            finally:
+                results.put_nowait(worker_done)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        self.logger.info(f"Starting batch prospect analysis with concurrency {concurrency}")
+
+        try:
+            active_workers = len(workers)
+            while active_workers:
+                item = await results.get()
+                if item is worker_done:
+                    active_workers -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _analyze_batch_item(self, index: int, prospect_data: Dict[str, Any]) -> BatchAnalysisResult:
+        """Analyze one prospect of a batch, capturing failures in the result."""
+        prospect_id = prospect_data.get("prospect_id")
+        prospect_id = str(prospect_id) if prospect_id is not None else None
+        start_time = time.perf_counter()
+
+        try:
+            final_state = await self.analyze_prospect(prospect_data)
+            return BatchAnalysisResult(
+                index=index,
+                prospect_id=prospect_id,
+                success=True,
+                state=final_state,
+                execution_time=time.perf_counter() - start_time
+            )
+        except Exception as e:
+            self.logger.error(f"Batch analysis failed for prospect {prospect_id}: {str(e)}")
+            return BatchAnalysisResult(
+                index=index,
+                prospect_id=prospect_id,
+                success=False,
+                error=str(e),
+                execution_time=time.perf_counter() - start_time
+            )
+
+    async def resume_analysis(self, session_id: str) -> WorkflowState:
+        """Resume an interrupted analysis from its last completed node.
+
+        Nodes that finished before the interruption are not re-run; their results
+        are restored from the checkpointer. A session that already completed
+        returns its final state unchanged.
+        """
+        config = {"configurable": {"thread_id": session_id}}
+        snapshot = await self.graph.aget_state(config)
+        if snapshot is None or not snapshot.values:
+            raise ValueError(f"No checkpoint found for session {session_id}")
+
+        if not snapshot.next:
+            self.logger.info(f"Session {session_id} already completed, nothing to resume")
+            return snapshot.values
+
+        self.logger.info(f"Resuming session {session_id} at {', '.join(snapshot.next)}")
+        try:
+            # The remaining nodes get a fresh workflow budget
+            return await self.graph.ainvoke(None, config=self._run_config(session_id))
+        except Exception as e:
+            self.logger.error(f"Resumed prospect analysis failed: {str(e)}")
+            raise
+
+    def prune_checkpoints(self) -> int:
+        """Drop expired checkpoint threads; a no-op for the in-memory backend."""
+        prune = getattr(self.checkpointer, "prune", None)
+        return prune() if prune is not None else 0
+
     async def get_workflow_state(self, session_id: str) -> Optional[WorkflowState]:
         """Get the current state of a workflow session."""
         try:
@@ -245,29 +500,28 @@ class ProspectAnalysisWorkflow:
             self.logger.error(f"Failed to get workflow state: {str(e)}")
             return None
 
+    def _agent_names(self, *attributes: str) -> list:
+        """Display names of workflow agents without constructing them."""
+        return [getattr(type(self), attribute).agent_name for attribute in attributes]
+
     def get_workflow_summary(self) -> Dict[str, Any]:
         """Get workflow configuration summary."""
         return {
             "workflow_name": "Prospect Analysis Workflow",
-            "agents": [
-                self.data_analyst.name,
-                self.risk_assessor.name,
-                self.persona_classifier.name,
-                self.product_specialist.name
-            ],
+            "agents": self._agent_names(
+                "data_analyst", "risk_assessor", "goal_planner",
+                "persona_classifier", "product_specialist", "portfolio_optimizer"
+            ),
             "steps": [
                 "data_analysis",
                 "risk_assessment",
+                "goal_planning",
                 "persona_classification",
                 "product_recommendation",
+                "portfolio_optimization",
                 "finalize_analysis"
             ],
-            "critical_agents": [
-                self.data_analyst.name,
-                self.risk_assessor.name,
-                self.product_specialist.name
-            ],
-            "optional_agents": [
-                self.persona_classifier.name
-            ]
+            "critical_agents": self._agent_names("data_analyst", "risk_assessor", "product_specialist"),
+            "optional_agents": self._agent_names("goal_planner", "persona_classifier", "portfolio_optimizer"),
+            "parallel_steps": PARALLEL_ANALYSIS_STEPS
         }
@@ -12,10 +12,7 @@ ML Prediction Nodes:
   - ml.training.predict_goal_success: Goal success prediction
 """
 
-# Import training utilities and prediction nodes
-from ml.training.train_models import main as train_all_models
-from ml.training.predict_risk_profile import predict_risk_profile, train_risk_model
-from ml.training.predict_goal_success import predict_goal_success, train_goal_model
+from importlib import import_module
 
 __all__ = [
     # Prediction nodes
@@ -28,3 +25,12 @@ __all__ = [
 ]
 
 __version__ = '2.0.0'
+
+
+def __getattr__(name):
+    # Resolved through ml.training, which imports sklearn only on first use
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module('ml.training'), name)
+    globals()[name] = value
+    return value
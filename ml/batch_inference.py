@@ -0,0 +1,167 @@
+"""
+Vectorized batch inference for the risk and goal models.
+
+Instead of building a one-row DataFrame per prospect and label-encoding it
+column by column, prospects are packed into a single NumPy feature matrix,
+categorical columns are encoded through a precomputed lookup array, and the
+model is traversed once with predict_proba. Labels are derived from the
+probabilities with argmax, which is exactly what predict() does internally.
+
+Forests can additionally be compiled into flat node arrays
+(ml.compiled_forest); small batches such as a single prospect are then
+evaluated with a handful of NumPy operations, while large batches still go
+to sklearn's Cython traversal, which wins once there are thousands of rows.
+
+With a PredictionMemo attached, outputs are memoized per encoded feature row
+and model version, and only rows not seen before reach the model.
+"""
+
+import warnings
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ml.compiled_forest import compile_forest
+from ml.prediction_memo import PredictionMemo, feature_keys
+
+
+RISK_FEATURES = [
+    "age",
+    "annual_income",
+    "current_savings",
+    "investment_horizon_years",
+    "number_of_dependents",
+    "investment_experience_level",
+]
+
+GOAL_FEATURES = [
+    "age",
+    "annual_income",
+    "current_savings",
+    "investment_horizon_years",
+    "target_goal_amount",
+    "number_of_dependents",
+    "investment_experience_level",
+]
+
+
+def _field(record: Any, name: str) -> Any:
+    """Read a feature from a pydantic model, plain object or dict."""
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+class FeatureEncoder:
+    """Turns prospect records into a float feature matrix in model column order."""
+
+    def __init__(self, feature_columns: Sequence[str], label_encoders: Optional[Dict[str, Any]] = None):
+        self.feature_columns = list(feature_columns)
+        # Sorted class arrays double as lookup tables for np.searchsorted
+        self.lookups: Dict[str, np.ndarray] = {
+            col: np.asarray(encoder.classes_, dtype=object)
+            for col, encoder in (label_encoders or {}).items()
+            if col in self.feature_columns
+        }
+
+    def encode_column(self, column: str, values: Sequence[Any]) -> np.ndarray:
+        """Encode one categorical column; unseen categories map to code 0."""
+        classes = self.lookups[column]
+        values = np.asarray([str(value) for value in values], dtype=object)
+        codes = np.searchsorted(classes, values)
+        codes = np.clip(codes, 0, len(classes) - 1)
+        return np.where(classes[codes] == values, codes, 0).astype(np.float64)
+
+    def transform(self, records: Sequence[Any]) -> np.ndarray:
+        """Build an (n_records, n_features) matrix."""
+        matrix = np.empty((len(records), len(self.feature_columns)), dtype=np.float64)
+        for j, column in enumerate(self.feature_columns):
+            values = [_field(record, column) for record in records]
+            if column in self.lookups:
+                matrix[:, j] = self.encode_column(column, values)
+            else:
+                matrix[:, j] = np.asarray(values, dtype=np.float64)
+        return matrix
+
+
+class BatchPredictor:
+    """Single-traversal batch predictions for a fitted estimator."""
+
+    def __init__(
+        self,
+        model: Any,
+        label_encoders: Optional[Dict[str, Any]],
+        feature_columns: Sequence[str],
+        compile_model: bool = False,
+        compiled_max_rows: int = 1000,
+        memo: Optional[PredictionMemo] = None,
+        model_version: Hashable = None,
+    ):
+        self.model = model
+        self.memo = memo
+        self.model_version = model_version
+        # Compiled copy for batches up to compiled_max_rows; None if not a forest
+        self.compiled = compile_forest(model) if compile_model else None
+        self.compiled_max_rows = compiled_max_rows
+        columns = getattr(model, "feature_names_in_", None)
+        self.encoder = FeatureEncoder(
+            list(columns) if columns is not None else feature_columns,
+            label_encoders
+        )
+        self.classes_ = np.asarray(getattr(model, "classes_", []), dtype=object)
+        self.is_classifier = hasattr(model, "predict_proba")
+
+    def _call_model(self, method: str, matrix: np.ndarray) -> np.ndarray:
+        if self.compiled is not None and len(matrix) <= self.compiled_max_rows:
+            return getattr(self.compiled, method)(matrix)
+        with warnings.catch_warnings():
+            # Models fitted on DataFrames warn when given a bare matrix
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return getattr(self.model, method)(matrix)
+
+    def _outputs(self, matrix: np.ndarray) -> np.ndarray:
+        """Probabilities (classifier) or predictions (regressor) per row, via the memo."""
+        method = "predict_proba" if self.is_classifier else "predict"
+        if self.memo is None:
+            return self._call_model(method, matrix)
+
+        keys = feature_keys(matrix)
+        outputs = self.memo.lookup(self.model_version, keys)
+        # Each distinct missing row goes to the model once
+        missing: Dict[Tuple[float, ...], int] = {}
+        for index, (key, output) in enumerate(zip(keys, outputs)):
+            if output is None:
+                missing.setdefault(key, index)
+        if missing:
+            computed = self._call_model(method, matrix[list(missing.values())])
+            computed.setflags(write=False)
+            self.memo.store(self.model_version, list(missing), computed)
+            by_key = dict(zip(missing, computed))
+            outputs = [by_key[key] if output is None else output for key, output in zip(keys, outputs)]
+        return np.array(outputs)
+
+    def predict_proba(self, records: Sequence[Any]) -> np.ndarray:
+        """Class probabilities for every record, shape (n_records, n_classes)."""
+        return self._outputs(self.encoder.transform(records))
+
+    def predict(self, records: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (labels, probabilities); regressors return (predictions, predictions)."""
+        if not records:
+            return np.empty(0, dtype=object), np.empty((0, len(self.classes_)))
+
+        if not self.is_classifier:
+            predictions = self._outputs(self.encoder.transform(records))
+            return predictions, predictions
+
+        probabilities = self.predict_proba(records)
+        labels = self.classes_.take(np.argmax(probabilities, axis=1))
+        return labels, probabilities
+
+    def class_index(self, candidates: Sequence[Any]) -> Optional[int]:
+        """Index of the first candidate label present in the model classes."""
+        for candidate in candidates:
+            matches = np.flatnonzero(self.classes_ == candidate)
+            if matches.size:
+                return int(matches[0])
+        return None
+
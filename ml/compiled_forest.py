@@ -0,0 +1,162 @@
+"""
+Flattened tree ensembles evaluated with plain NumPy.
+
+A fitted RandomForest (or a single decision tree) is exported once into
+contiguous node arrays: split feature, threshold, left/right child and leaf
+value, with every tree's nodes laid out back to back. Prediction walks all
+trees for all rows together, one array step per tree level, so a single
+prospect costs a few small NumPy operations instead of sklearn's input
+validation and per-tree joblib dispatch.
+
+Leaves point to themselves and always go "left", so rows that reach a leaf
+early stay there while deeper trees finish. Inputs are compared as float32,
+matching sklearn's tree code, so predictions agree to float rounding.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+
+
+class CompiledForest:
+    """Tree ensemble as flat node arrays; drop-in for predict/predict_proba."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        values: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features_in_: int,
+        feature_names_in_: Optional[np.ndarray] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # Interleaved (left, right) pairs: child of node i is children[2 * i + goes_right]
+        self.children = np.stack([left, right], axis=1).ravel()
+        self.values = values  # (n_nodes, n_outputs): class probabilities or regression value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in_
+        if feature_names_in_ is not None:
+            self.feature_names_in_ = feature_names_in_
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def _flatten(cls, model: Any, **kwargs) -> "CompiledForest":
+        estimators = getattr(model, "estimators_", None) or [model]
+        trees = [estimator.tree_ for estimator in estimators]
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("Multi-output trees are not supported")
+
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        nodes = np.arange(sizes.sum())
+
+        feature = np.concatenate([tree.feature for tree in trees]).astype(np.intp)
+        threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        left = np.concatenate([tree.children_left + offset for tree, offset in zip(trees, roots)])
+        right = np.concatenate([tree.children_right + offset for tree, offset in zip(trees, roots)])
+
+        # Leaves (child -1, shifted by the offset) loop back to themselves via "left"
+        leaf = np.concatenate([tree.children_left == -1 for tree in trees])
+        left = np.where(leaf, nodes, left).astype(np.intp)
+        right = np.where(leaf, nodes, right).astype(np.intp)
+        feature[leaf] = 0
+        threshold[leaf] = np.inf
+
+        values = np.concatenate([tree.value[:, 0, :] for tree in trees]).astype(np.float64)
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=right,
+            values=values,
+            roots=roots.astype(np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in_=model.n_features_in_,
+            feature_names_in_=getattr(model, "feature_names_in_", None),
+            **kwargs,
+        )
+
+    def apply(self, X: Any) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        # Round to float32 like sklearn, then compare in float64 against the thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected a 2-D array with {self.n_features_in_} features")
+        flat_X = X.astype(np.float64).ravel()
+
+        # One (row, tree) pair per element; all lookups are 1-D takes
+        n_rows, n_trees = len(X), len(self.roots)
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * self.n_features_in_, n_trees)
+        node = np.tile(self.roots, n_rows)
+        for _ in range(self.max_depth):
+            goes_right = flat_X.take(row_offsets + self.feature.take(node)) > self.threshold.take(node)
+            node = self.children.take(2 * node + goes_right)
+        return node.reshape(n_rows, n_trees)
+
+    def _mean_leaf_values(self, X: Any) -> np.ndarray:
+        return self.values.take(self.apply(X), axis=0).mean(axis=1)
+
+
+class CompiledForestClassifier(CompiledForest):
+    """Compiled RandomForestClassifier / DecisionTreeClassifier."""
+
+    def __init__(self, *args, classes_: np.ndarray, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.classes_ = classes_
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "CompiledForestClassifier":
+        compiled = cls._flatten(model, classes_=np.asarray(model.classes_))
+        # Each tree votes with its leaf's class distribution, as in predict_proba
+        totals = compiled.values.sum(axis=1, keepdims=True)
+        compiled.values = np.divide(compiled.values, totals, out=np.zeros_like(compiled.values), where=totals > 0)
+        return compiled
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        return self._mean_leaf_values(X)
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class CompiledForestRegressor(CompiledForest):
+    """Compiled RandomForestRegressor / DecisionTreeRegressor."""
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "CompiledForestRegressor":
+        return cls._flatten(model)
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self._mean_leaf_values(X)[:, 0]
+
+
+# Averaging ensembles of plain trees; boosted trees combine differently
+COMPILABLE_MODELS = (
+    "RandomForestClassifier", "RandomForestRegressor", "ExtraTreesClassifier", "ExtraTreesRegressor",
+    "DecisionTreeClassifier", "DecisionTreeRegressor", "ExtraTreeClassifier", "ExtraTreeRegressor",
+)
+
+
+def compile_forest(model: Any) -> Optional[CompiledForest]:
+    """Export a fitted sklearn tree model, or None if it cannot be compiled."""
+    if type(model).__name__ not in COMPILABLE_MODELS:
+        return None
+    try:
+        if hasattr(model, "classes_"):
+            if np.ndim(model.classes_) != 1:
+                return None  # multi-output classifier
+            return CompiledForestClassifier.from_sklearn(model)
+        return CompiledForestRegressor.from_sklearn(model)
+    except (AttributeError, ValueError):
+        return None
@@ -0,0 +1,182 @@
+"""
+Monte Carlo projection of investment goal outcomes.
+
+Each prospect's portfolio is simulated month by month over its investment
+horizon: log-normal monthly returns for its risk level plus a fixed monthly
+contribution. A batch of prospects is simulated as one (prospects, months,
+paths) array, and the wealth recursion
+
+    W[t] = W[t-1] * g[t] + c
+
+is solved in closed form with cumulative sums in log space,
+
+    W[t] = G[t] * (W[0] + c * sum(1 / G[s] for s <= t)),  G[t] = g[1] * ... * g[t]
+
+so no Python loop runs over months or paths.
+
+All prospects share the same standard normal shocks (common random numbers,
+with antithetic pairs), scaled by their own drift and volatility. Shocks only
+depend on the seed, so a seeded simulator draws them once and reuses them:
+projections are reproducible and independent of how prospects are batched.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ml.batch_inference import _field
+
+
+# Expected annual return and volatility of a typical portfolio per risk level
+RETURN_ASSUMPTIONS = {
+    "Low": (0.07, 0.05),
+    "Moderate": (0.10, 0.12),
+    "High": (0.12, 0.18),
+}
+
+# Share of monthly income assumed to be invested, as in the rule-based prediction
+DEFAULT_SAVINGS_RATE = 0.2
+
+PERCENTILES = (10, 50, 90)
+
+
+class GoalSimulator:
+    """Vectorized Monte Carlo simulator for goal success probabilities."""
+
+    def __init__(
+        self,
+        n_paths: int = 10000,
+        seed: Optional[int] = None,
+        savings_rate: float = DEFAULT_SAVINGS_RATE,
+        max_batch_elements: int = 8_000_000,
+    ):
+        self.n_paths = max(1, n_paths)
+        self.seed = seed
+        self.savings_rate = savings_rate
+        # Caps prospects * paths * months per chunk (float32: ~32MB per array)
+        self.max_batch_elements = max_batch_elements
+        self._shock_cache: Optional[np.ndarray] = None
+
+    def simulate(
+        self,
+        prospects: Sequence[Any],
+        risk_levels: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Project every prospect's goal; returns one summary dict per prospect.
+
+        Unknown or missing risk levels use the Moderate assumptions.
+        """
+        if not prospects:
+            return []
+
+        risk_levels = list(risk_levels) if risk_levels is not None else [None] * len(prospects)
+
+        current = np.array([float(_field(p, "current_savings") or 0) for p in prospects])
+        target = np.array([float(_field(p, "target_goal_amount") or 0) for p in prospects])
+        income = np.array([float(_field(p, "annual_income") or 0) for p in prospects])
+        years = np.array([max(1, int(_field(p, "investment_horizon_years") or 1)) for p in prospects])
+        contribution = income / 12 * self.savings_rate
+
+        assumptions = np.array([
+            RETURN_ASSUMPTIONS.get(level, RETURN_ASSUMPTIONS["Moderate"]) for level in risk_levels
+        ])
+        annual_return, volatility = assumptions[:, 0], assumptions[:, 1]
+
+        # Group prospects with similar horizons so chunks carry little padding
+        order = np.argsort(years, kind="stable")
+        shocks = self._cumulative_shocks(int(years.max()) * 12)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prospects)
+
+        start = 0
+        while start < len(order):
+            # Horizons grow along the sorted order, so the last prospect sets the chunk's month count
+            end = start + 1
+            while (
+                end < len(order)
+                and (end + 1 - start) * self.n_paths * int(years[order[end]]) * 12 <= self.max_batch_elements
+            ):
+                end += 1
+            index = order[start:end]
+            for i, summary in zip(index, self._simulate_chunk(
+                shocks,
+                current[index], target[index], contribution[index], years[index],
+                annual_return[index], volatility[index],
+            )):
+                results[i] = summary
+            start = end
+
+        return results
+
+    def _cumulative_shocks(self, n_months: int) -> np.ndarray:
+        """Running sums of standard normal draws, shape (n_months, n_paths)."""
+        cached = self._shock_cache
+        if cached is not None and len(cached) >= n_months:
+            return cached[:n_months]
+
+        # Drawn month-major, so a longer horizon extends the same stream
+        rng = np.random.default_rng(self.seed)
+        draws = rng.standard_normal((n_months, (self.n_paths + 1) // 2), dtype=np.float32)
+        shocks = np.concatenate([draws, -draws], axis=1)[:, :self.n_paths]
+        np.cumsum(shocks, axis=0, out=shocks)
+
+        if self.seed is not None:
+            self._shock_cache = shocks
+        return shocks
+
+    def _simulate_chunk(
+        self,
+        shocks: np.ndarray,
+        current: np.ndarray,
+        target: np.ndarray,
+        contribution: np.ndarray,
+        years: np.ndarray,
+        annual_return: np.ndarray,
+        volatility: np.ndarray,
+    ) -> List[Dict[str, Any]]:
+        n_months = int(years.max()) * 12
+        elapsed = np.arange(1, n_months + 1, dtype=np.float32)
+
+        # Monthly log-returns whose compounded mean matches the annual return
+        monthly_vol = (volatility / np.sqrt(12)).astype(np.float32)
+        monthly_drift = (np.log1p(annual_return) / 12 - (volatility ** 2) / 24).astype(np.float32)
+
+        # log G[t] = drift * t + vol * (running sum of shocks)
+        log_growth = shocks[None, :n_months, :] * monthly_vol[:, None, None]
+        log_growth += (monthly_drift[:, None] * elapsed[None, :])[:, :, None]
+
+        # Contributions discounted to month 0, accumulated, then grown back at year ends
+        discounted = np.exp(-log_growth)
+        np.cumsum(discounted, axis=1, out=discounted)
+        yearly = discounted[:, 11::12, :]
+        yearly *= contribution.astype(np.float32)[:, None, None]
+        yearly += current.astype(np.float32)[:, None, None]
+        yearly *= np.exp(log_growth[:, 11::12, :])
+
+        # yearly[i, y, path] is the wealth of prospect i at the end of year y + 1
+        yearly_percentiles = np.percentile(yearly, PERCENTILES, axis=2)
+        yearly_success = (yearly >= target.astype(np.float32)[:, None, None]).mean(axis=2)
+
+        summaries = []
+        for i, horizon in enumerate(years):
+            final = yearly[i, horizon - 1].astype(np.float64)
+            shortfall = target[i] - final[final < target[i]]
+            summaries.append({
+                "success_probability": float(yearly_success[i, horizon - 1]),
+                "paths": self.n_paths,
+                "expected_annual_return": float(annual_return[i]),
+                "volatility": float(volatility[i]),
+                "monthly_contribution": float(contribution[i]),
+                "final_value_percentiles": {
+                    f"p{q}": float(yearly_percentiles[k, i, horizon - 1]) for k, q in enumerate(PERCENTILES)
+                },
+                "median_shortfall": float(np.median(shortfall)) if shortfall.size else 0.0,
+                "milestones": [
+                    {
+                        "year": year + 1,
+                        "success_probability": float(yearly_success[i, year]),
+                        **{f"p{q}": float(yearly_percentiles[k, i, year]) for k, q in enumerate(PERCENTILES)},
+                    }
+                    for year in range(horizon)
+                ],
+            })
+        return summaries
@@ -0,0 +1,89 @@
+"""
+Process-wide registry for trained model artifacts.
+
+Every consumer (agents, the Streamlit app and the prediction helpers) fetches
+pickles through this registry so each artifact is deserialized once per
+process. File modification times are checked on access, and a changed
+artifact is reloaded transparently (hot reload after retraining). If a reload
+fails, the previous artifact keeps being served and that file signature is
+not retried until the file changes again.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import joblib
+from loguru import logger
+
+from settings import get_settings
+
+
+class ModelRegistry:
+    """Load-once cache of joblib artifacts keyed by absolute path."""
+
+    def __init__(self, mmap_mode: Optional[str] = None):
+        self.mmap_mode = mmap_mode
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.load_count = 0
+
+    def get(self, path: str) -> Any:
+        """Return the artifact at path, loading or reloading it if needed."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(key)
+        if entry is not None and signature in (entry["signature"], entry["failed_signature"]):
+            return entry["artifact"]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and signature in (entry["signature"], entry["failed_signature"]):
+                return entry["artifact"]
+
+            try:
+                artifact = joblib.load(key, mmap_mode=self.mmap_mode)
+            except Exception as e:
+                if entry is not None:
+                    # A half-written or broken replacement must not take serving down;
+                    # remember it so the same file is not retried on every call
+                    entry["failed_signature"] = signature
+                    logger.error(f"Reloading {path} failed, keeping previous version: {str(e)}")
+                    return entry["artifact"]
+                raise
+
+            version = entry["version"] + 1 if entry is not None else 1
+            self._entries[key] = {
+                "artifact": artifact,
+                "signature": signature,
+                "failed_signature": None,
+                "version": version,
+            }
+            self.load_count += 1
+
+            action = "Reloaded" if version > 1 else "Loaded"
+            logger.info(f"{action} model artifact {path} (version {version})")
+            return artifact
+
+    def version(self, path: str) -> int:
+        """Return how many times the artifact at path has been loaded (0 if never)."""
+        entry = self._entries.get(os.path.abspath(path))
+        return entry["version"] if entry is not None else 0
+
+    def is_loaded(self, path: str) -> bool:
+        """Check whether the artifact at path is currently cached."""
+        return os.path.abspath(path) in self._entries
+
+    def clear(self) -> None:
+        """Drop every cached artifact."""
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache()
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    return ModelRegistry(mmap_mode=get_settings().model_mmap_mode)
@@ -0,0 +1,273 @@
+"""
+Mean-variance portfolio optimization over the product catalog.
+
+Expected returns come from the catalog's ``expected_return`` ranges (midpoint,
+net of ``expense_ratio``). Volatilities follow each product's risk level and
+correlations its asset category, so the covariance matrix is built in one
+vectorized step from a small category correlation table.
+
+Efficient frontiers are solved once per risk level with SLSQP (long-only,
+fully invested, capped weights) and cached. Optimizing for a prospect is then a
+lookup of the highest-return frontier point within the prospect's volatility
+budget. With an investable amount, products whose share of it falls below their
+minimum investment are dropped and their weight is spread over the rest, still
+under the weight cap. If that is impossible or breaks the volatility budget,
+the next lower frontier point is tried.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+
+# Products a risk level may hold, as in the product filter
+ELIGIBLE_RISK_LEVELS = {
+    "Low": ["Low"],
+    "Moderate": ["Low", "Moderate"],
+    "High": ["Low", "Moderate", "High"],
+}
+
+# Annual volatility by product risk level; fixed-rate products barely move
+RISK_VOLATILITY = {"Low": 0.04, "Moderate": 0.12, "High": 0.20}
+GUARANTEED_VOLATILITY = 0.005
+
+# Portfolio volatility budget per client risk level
+TARGET_VOLATILITY = {"Low": 0.04, "Moderate": 0.09, "High": 0.15}
+
+CATEGORIES = ["Equity", "Hybrid", "Debt"]
+CATEGORY_CORRELATION = np.array([
+    # Equity Hybrid Debt
+    [0.85, 0.70, 0.10],
+    [0.70, 0.75, 0.40],
+    [0.10, 0.40, 0.50],
+])
+
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)")
+
+
+def parse_return_range(value: Any) -> Optional[float]:
+    """Midpoint of "12-15%" or "6.5%" as a fraction; None when unparseable."""
+    numbers = [float(match) for match in _PERCENT.findall(str(value))]
+    if not numbers:
+        return None
+    return sum(numbers) / len(numbers) / 100
+
+
+def parse_percent(value: Any) -> float:
+    """"1.2%" as 0.012; missing values count as 0."""
+    numbers = _PERCENT.findall(str(value))
+    return float(numbers[0]) / 100 if numbers else 0.0
+
+
+class PortfolioOptimizer:
+    """Cached efficient frontiers with per-prospect lookups."""
+
+    def __init__(
+        self,
+        products: pd.DataFrame,
+        max_weight: float = 0.4,
+        frontier_points: int = 25,
+    ):
+        self.max_weight = max_weight
+        self.frontier_points = frontier_points
+        self._frontiers: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._load_products(products)
+
+    def _load_products(self, products: pd.DataFrame) -> None:
+        gross = products["expected_return"].map(parse_return_range)
+        products = products[gross.notna()]
+        gross = gross[gross.notna()].to_numpy(dtype=np.float64)
+
+        self.product_ids = products["product_id"].astype(str).to_numpy()
+        self.product_names = products["product_name"].astype(str).to_numpy()
+        self.risk_levels = products["risk_level"].astype(str).to_numpy()
+        self.categories = products["category"].astype(str).to_numpy()
+        self.min_investment = products["min_investment"].to_numpy(dtype=np.float64)
+        self.expense_ratio = products["expense_ratio"].map(parse_percent).to_numpy(dtype=np.float64)
+        self.expected_returns = gross - self.expense_ratio
+
+        # A single quoted rate with no fees is a fixed-rate product
+        guaranteed = ~products["expected_return"].astype(str).str.contains("-").to_numpy() & (self.expense_ratio == 0)
+        self.volatility = np.where(
+            guaranteed,
+            GUARANTEED_VOLATILITY,
+            np.array([RISK_VOLATILITY.get(level, RISK_VOLATILITY["Moderate"]) for level in self.risk_levels]),
+        )
+
+        # Unknown categories correlate like Hybrid
+        category_index = np.array([
+            CATEGORIES.index(category) if category in CATEGORIES else 1 for category in self.categories
+        ])
+        correlation = CATEGORY_CORRELATION[category_index[:, None], category_index[None, :]]
+        np.fill_diagonal(correlation, 1.0)
+        self.covariance = correlation * np.outer(self.volatility, self.volatility)
+
+    def frontier(self, risk_level: str) -> Dict[str, np.ndarray]:
+        """Efficient frontier for a client risk level, solved on first use."""
+        risk_level = risk_level if risk_level in ELIGIBLE_RISK_LEVELS else "Moderate"
+        frontier = self._frontiers.get(risk_level)
+        if frontier is None:
+            with self._lock:
+                frontier = self._frontiers.get(risk_level)
+                if frontier is None:
+                    frontier = self._solve_frontier(risk_level)
+                    self._frontiers[risk_level] = frontier
+        return frontier
+
+    def precompute(self) -> None:
+        """Solve every risk level's frontier up front."""
+        for risk_level in ELIGIBLE_RISK_LEVELS:
+            self.frontier(risk_level)
+
+    def _solve_frontier(self, risk_level: str) -> Dict[str, np.ndarray]:
+        eligible = np.flatnonzero(np.isin(self.risk_levels, ELIGIBLE_RISK_LEVELS[risk_level]))
+        mu = self.expected_returns[eligible]
+        cov = self.covariance[np.ix_(eligible, eligible)]
+        n = len(eligible)
+        cap = max(self.max_weight, 1.0 / n)
+
+        min_variance = self._min_variance(mu, cov, cap)
+        # Highest reachable return: fill the best products up to the cap
+        best_first = np.argsort(-mu)
+        greedy = np.minimum(cap, np.clip(1.0 - cap * np.arange(n), 0.0, None))
+        max_return = float(greedy @ mu[best_first])
+
+        targets = np.linspace(float(min_variance @ mu), max_return, self.frontier_points)
+        weights = np.zeros((len(targets), len(self.product_ids)))
+        previous = min_variance
+        for k, target in enumerate(targets):
+            previous = self._min_variance(mu, cov, cap, target=target, start=previous)
+            weights[k, eligible] = previous
+
+        return {
+            "weights": weights,
+            "cap": cap,
+            "returns": weights @ self.expected_returns,
+            "volatility": np.sqrt(np.einsum("ki,ij,kj->k", weights, self.covariance, weights)),
+        }
+
+    @staticmethod
+    def _min_variance(
+        mu: np.ndarray,
+        cov: np.ndarray,
+        cap: float,
+        target: Optional[float] = None,
+        start: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        n = len(mu)
+        constraints = [{"type": "eq", "fun": lambda w: w.sum() - 1.0, "jac": lambda w: np.ones(n)}]
+        if target is not None:
+            constraints.append({"type": "eq", "fun": lambda w: w @ mu - target, "jac": lambda w: mu})
+
+        result = minimize(
+            lambda w: w @ cov @ w,
+            start if start is not None else np.full(n, 1.0 / n),
+            jac=lambda w: 2 * cov @ w,
+            bounds=[(0.0, cap)] * n,
+            constraints=constraints,
+            method="SLSQP",
+            options={"ftol": 1e-12, "maxiter": 200},
+        )
+        weights = np.clip(result.x, 0.0, cap)
+        return weights / weights.sum()
+
+    def volatility_budget(self, risk_level: str, age: int, horizon_years: int) -> float:
+        """Portfolio volatility allowed for a prospect."""
+        budget = TARGET_VOLATILITY.get(risk_level, TARGET_VOLATILITY["Moderate"])
+        if horizon_years < 3:
+            budget *= 0.5
+        elif horizon_years < 5:
+            budget *= 0.75
+        if age > 55:
+            budget *= 0.85
+        return budget
+
+    def optimize(
+        self,
+        risk_level: str,
+        age: int,
+        horizon_years: int,
+        investable_amount: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Allocate across catalog products for one prospect.
+
+        affordable is False when no frontier point within the budget can be
+        bought with investable_amount; the unadjusted frontier portfolio is
+        returned in that case.
+        """
+        frontier = self.frontier(risk_level)
+        budget = self.volatility_budget(risk_level, age, horizon_years)
+
+        # Frontier volatility rises with return; take the last point within budget
+        index = max(0, int(np.searchsorted(frontier["volatility"], budget, side="right")) - 1)
+        weights = self._trim(frontier["weights"][index])
+        affordable = True
+
+        if investable_amount is not None:
+            # Walk down the frontier to the first point that stays affordable, capped and in budget
+            for k in range(index, -1, -1):
+                adjusted = self._affordable_weights(frontier["weights"][k], investable_amount, frontier["cap"])
+                if adjusted is None:
+                    continue
+                volatility = np.sqrt(adjusted @ self.covariance @ adjusted)
+                if volatility <= max(budget, frontier["volatility"][k]) + 1e-9:
+                    weights = adjusted
+                    break
+            else:
+                affordable = False
+
+        held = np.flatnonzero(weights)
+
+        expected_return = float(weights @ self.expected_returns)
+        volatility = float(np.sqrt(weights @ self.covariance @ weights))
+        return {
+            "product_weights": {self.product_ids[i]: float(weights[i]) for i in held[np.argsort(-weights[held])]},
+            "asset_allocation": self._asset_allocation(weights),
+            "expected_return": expected_return,
+            "volatility": volatility,
+            "volatility_budget": budget,
+            "affordable": affordable,
+        }
+
+    @staticmethod
+    def _trim(weights: np.ndarray) -> np.ndarray:
+        """Drop solver dust below 0.01% and renormalize."""
+        weights = np.where(weights < 1e-4, 0.0, weights)
+        return weights / weights.sum()
+
+    def _affordable_weights(self, weights: np.ndarray, amount: float, cap: float) -> Optional[np.ndarray]:
+        """Weights without products whose allotted amount is below their minimum.
+
+        The dropped weight goes to the remaining products in proportion,
+        capped at cap. This only raises their weights, so every remaining
+        product stays affordable. None when the rest cannot hold 100% under cap.
+        """
+        weights = self._trim(weights)
+        weights = np.where(weights * amount >= self.min_investment, weights, 0.0)
+        if np.count_nonzero(weights) * cap < 1.0 - 1e-9:
+            return None
+
+        weights = weights / weights.sum()
+        while weights.max() > cap + 1e-9:
+            capped = weights >= cap
+            excess = (weights[capped] - cap).sum()
+            weights[capped] = cap
+            free = ~capped & (weights > 0)
+            weights[free] += excess * weights[free] / weights[free].sum()
+        return weights
+
+    def _asset_allocation(self, weights: np.ndarray) -> Dict[str, float]:
+        """Category percentages that add up to 100."""
+        allocation: Dict[str, float] = {}
+        for category, weight in zip(self.categories, weights):
+            if weight > 0:
+                allocation[category] = allocation.get(category, 0.0) + weight * 100
+        return {
+            category: round(float(share), 1)
+            for category, share in sorted(allocation.items(), key=lambda item: -item[1])
+        }
@@ -0,0 +1,94 @@
+"""
+LRU memo for model outputs keyed on encoded feature vectors.
+
+Prospects are often re-analysed unchanged, and many share the same profile
+(age, income, savings, horizon, dependents, experience), so the same feature
+row reaches the model again and again. The memo stores the model output
+(class probabilities or regression value) per encoded row, tagged with the
+model version from the registry. When a retrained artifact is loaded, the
+version changes and every entry from the old model is dropped.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+FeatureKey = Tuple[float, ...]
+
+
+class PredictionMemo:
+    """Thread-safe bounded LRU of model outputs for one model path."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[FeatureKey, Any]" = OrderedDict()
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: Hashable) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def lookup(self, version: Hashable, keys: Sequence[FeatureKey]) -> List[Optional[Any]]:
+        """Cached output for each key under version; None where missing."""
+        with self._lock:
+            self._check_version(version)
+            values = []
+            for key in keys:
+                value = self._entries.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                values.append(value)
+            return values
+
+    def store(self, version: Hashable, keys: Sequence[FeatureKey], values: Sequence[Any]) -> None:
+        """Remember outputs computed by the model at version."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def reset_metrics(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+            "invalidations": self.invalidations,
+            "model_version": self._version,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def feature_keys(matrix: np.ndarray) -> List[FeatureKey]:
+    """Hashable key per encoded feature row."""
+    return [tuple(row) for row in matrix.tolist()]
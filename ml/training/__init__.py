@@ -3,9 +3,16 @@ ML Training Module
 Contains model training and prediction nodes for the Prospect Analysis workflow.
 """
 
-from ml.training.predict_risk_profile import predict_risk_profile, train_risk_model
-from ml.training.predict_goal_success import predict_goal_success, train_goal_model
-from ml.training.train_models import main as train_all_models
+from importlib import import_module
+
+# Prediction nodes import sklearn; load them on first use only
+_LAZY_ATTRIBUTES = {
+    'predict_risk_profile': ('ml.training.predict_risk_profile', 'predict_risk_profile'),
+    'train_risk_model': ('ml.training.predict_risk_profile', 'train_risk_model'),
+    'predict_goal_success': ('ml.training.predict_goal_success', 'predict_goal_success'),
+    'train_goal_model': ('ml.training.predict_goal_success', 'train_goal_model'),
+    'train_all_models': ('ml.training.train_models', 'main'),
+}
 
 __all__ = [
     # Prediction nodes
@@ -28,3 +35,12 @@ Architecture:
       - train_models: Training orchestration script
     - models/: Trained model files (generated after training)
 """
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    value = getattr(import_module(module_name), attribute)
+    globals()[name] = value
+    return value
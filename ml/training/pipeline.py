@@ -0,0 +1,324 @@
+"""
+Parallel Model Training Pipeline
+Trains the risk and goal models concurrently and publishes them atomically.
+
+Each model is fitted in its own worker process. A worker reads only the
+columns its model needs from the Parquet or CSV training data, chunk by chunk,
+downcasting as it goes, so peak memory stays close to the size of the final
+feature matrix. Inside the worker, the estimator uses n_jobs threads.
+
+Artifacts are first written to ``<models_dir>/versions/<version>/`` and then
+copied over the serving paths with a temp file + os.replace. Readers such as
+the model registry therefore see either the old pickle or the new one, never
+a partial write. Only the newest MODEL_VERSIONS_KEEP version directories are
+kept; older ones are deleted after each run.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ml.batch_inference import GOAL_FEATURES, RISK_FEATURES
+from settings import get_settings
+
+
+DEFAULT_CHUNK_SIZE = 250_000
+CATEGORICAL_FEATURES = ("investment_experience_level",)
+
+
+@dataclass
+class TrainingJob:
+    """One model to fit: target, feature columns, estimator and output file names."""
+    name: str
+    target: str
+    features: List[str]
+    task: str  # "classification" or "regression"
+    model_file: str
+    encoders_file: str
+    estimator: str = "RandomForestClassifier"
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def default_jobs() -> List[TrainingJob]:
+    """Risk classifier and goal probability regressor, in the serving feature layout.
+
+    Same estimators and hyperparameters as the scripts the pipeline replaced:
+    a default 100-tree RandomForest for risk, a LinearRegression for goals.
+    """
+    settings = get_settings()
+    return [
+        TrainingJob(
+            name="Risk Profile Model",
+            target="risk_level",
+            features=list(RISK_FEATURES),
+            task="classification",
+            model_file=Path(settings.risk_model_path).name,
+            encoders_file=Path(settings.risk_encoders_path).name,
+            estimator="RandomForestClassifier",
+            params={"n_estimators": 100, "random_state": 42},
+        ),
+        TrainingJob(
+            name="Goal Success Model",
+            target="goal_success_probability",
+            features=list(GOAL_FEATURES),
+            task="regression",
+            model_file=Path(settings.goal_model_path).name,
+            encoders_file=Path(settings.goal_encoders_path).name,
+            estimator="LinearRegression",
+        ),
+    ]
+
+
+def iter_training_chunks(path: str, columns: Sequence[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the requested columns of a Parquet or CSV file in chunks."""
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(columns)):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=list(columns), chunksize=chunk_size)
+
+
+def load_training_data(path: str, columns: Sequence[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """Read columns chunk by chunk: numbers as float32, text as categories."""
+    chunks = []
+    for chunk in iter_training_chunks(path, columns, chunk_size):
+        for column in chunk.columns:
+            if pd.api.types.is_numeric_dtype(chunk[column]):
+                chunk[column] = chunk[column].astype(np.float32)
+            else:
+                chunk[column] = chunk[column].astype(str).astype("category")
+        chunks.append(chunk)
+    if not chunks:
+        raise ValueError(f"No training data in {path}")
+    # Chunks may have seen different categories; union them when concatenating
+    data = pd.concat(chunks, ignore_index=True)
+    for column in data.columns:
+        if not pd.api.types.is_numeric_dtype(data[column]):
+            data[column] = data[column].astype(str)
+    return data
+
+
+def _atomic_write(path: Path, write) -> Path:
+    """Call write(file) on a temp file next to path, then os.replace it into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return path
+
+
+def atomic_dump(artifact: Any, path: Path) -> Path:
+    """joblib.dump that never leaves a partially written file at path."""
+    return _atomic_write(path, lambda f: joblib.dump(artifact, f))
+
+
+def atomic_copy(source: Path, path: Path) -> Path:
+    """Copy source over path atomically."""
+    with open(source, "rb") as src:
+        return _atomic_write(path, lambda f: shutil.copyfileobj(src, f))
+
+
+def _build_estimator(job: TrainingJob, n_jobs: int):
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    estimators = {
+        "RandomForestClassifier": RandomForestClassifier,
+        "RandomForestRegressor": RandomForestRegressor,
+        "LinearRegression": LinearRegression,
+    }
+    if job.estimator not in estimators:
+        raise ValueError(f"Unknown estimator {job.estimator!r} for {job.name}")
+    return estimators[job.estimator](n_jobs=n_jobs, **job.params)
+
+
+def train_job(
+    job: TrainingJob,
+    data_path: str,
+    models_dir: str,
+    version: str,
+    n_jobs: int = -1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Fit one model and write its versioned artifacts; runs in a worker process."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    start_time = time.perf_counter()
+    data = load_training_data(data_path, job.features + [job.target], chunk_size)
+    X = data[job.features]
+    y = data[job.target]
+
+    label_encoders = {}
+    for column in job.features:
+        if column in CATEGORICAL_FEATURES or not pd.api.types.is_numeric_dtype(X[column]):
+            encoder = LabelEncoder()
+            X[column] = encoder.fit_transform(X[column]).astype(np.float32)
+            label_encoders[column] = encoder
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = _build_estimator(job, n_jobs)
+    model.fit(X_train, y_train)
+    score = float(model.score(X_test, y_test))
+
+    version_dir = Path(models_dir) / "versions" / version
+    atomic_dump(label_encoders, version_dir / job.encoders_file)
+    atomic_dump(model, version_dir / job.model_file)
+
+    return {
+        "name": job.name,
+        "rows": len(data),
+        "metric": "accuracy" if job.task == "classification" else "r2",
+        "score": score,
+        "training_time": time.perf_counter() - start_time,
+        "model_file": job.model_file,
+        "encoders_file": job.encoders_file,
+    }
+
+
+def publish_version(models_dir: str, version: str, results: Sequence[Dict[str, Any]]) -> None:
+    """Atomically replace the serving artifacts with those of a trained version.
+
+    Encoders are published before their model: a reader that sees the new
+    model always finds matching encoders.
+    """
+    models_dir = Path(models_dir)
+    version_dir = models_dir / "versions" / version
+    for result in results:
+        for file_name in (result["encoders_file"], result["model_file"]):
+            atomic_copy(version_dir / file_name, models_dir / file_name)
+
+
+def prune_versions(models_dir: str, keep: int) -> List[str]:
+    """Delete all but the newest keep version directories; returns the removed versions.
+
+    Version names are timestamps, so name order is age order. keep <= 0 keeps all.
+    """
+    versions_dir = Path(models_dir) / "versions"
+    if keep <= 0 or not versions_dir.is_dir():
+        return []
+    versions = sorted(path for path in versions_dir.iterdir() if path.is_dir())
+    removed = versions[:-keep]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return [path.name for path in removed]
+
+
+def train_models(
+    data_path: str,
+    models_dir: Optional[str] = None,
+    jobs: Optional[Sequence[TrainingJob]] = None,
+    n_jobs: int = -1,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    publish: bool = True,
+    keep_versions: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Train every job concurrently, then publish the new version.
+
+    Nothing is published unless every model trained successfully, so the
+    serving models always come from the same version. Afterwards only the
+    newest keep_versions versions (default MODEL_VERSIONS_KEEP) are kept.
+    """
+    settings = get_settings()
+    models_dir = models_dir or str(Path(settings.risk_model_path).parent)
+    keep_versions = settings.model_versions_keep if keep_versions is None else keep_versions
+    jobs = list(jobs) if jobs is not None else default_jobs()
+    version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    workers = max(1, min(len(jobs), max_workers or os.cpu_count() or 1))
+
+    # Spawned workers start clean on every platform (no forked locks or threads)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+        futures = [
+            executor.submit(train_job, job, data_path, models_dir, version, n_jobs, chunk_size)
+            for job in jobs
+        ]
+        results = [future.result() for future in futures]
+
+    manifest = {
+        "version": version,
+        "data_path": str(data_path),
+        "created_at": datetime.now().isoformat(),
+        "jobs": [asdict(job) for job in jobs],
+        "results": results,
+    }
+    manifest_path = Path(models_dir) / "versions" / version / "manifest.json"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if publish:
+        publish_version(models_dir, version, results)
+    manifest["pruned_versions"] = prune_versions(models_dir, keep_versions)
+    return manifest
+
+
+def main(argv=None):
+    """Train all models from a dataset, generating a synthetic one if none is given."""
+    parser = argparse.ArgumentParser(description="Train the risk and goal models in parallel")
+    parser.add_argument("--data", help="Training data (.parquet or .csv); synthetic data if omitted")
+    parser.add_argument("--n-samples", type=int, default=100_000, help="Synthetic rows when --data is omitted")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--models-dir", default=None, help="Output directory (default: ml/models)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="RandomForest threads per model")
+    parser.add_argument("--workers", type=int, default=None, help="Models trained at once")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--no-publish", action="store_true", help="Write the versioned artifacts only")
+    parser.add_argument("--keep-versions", type=int, default=None,
+                        help="Versions to keep under versions/ (default MODEL_VERSIONS_KEEP, 0 = all)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_path = args.data
+        if data_path is None:
+            from utils.retrain_models import write_synthetic_parquet
+
+            data_path = str(write_synthetic_parquet(
+                Path(temp_dir) / "synthetic.parquet", args.n_samples, args.chunk_size, args.seed
+            ))
+
+        manifest = train_models(
+            data_path,
+            models_dir=args.models_dir,
+            n_jobs=args.n_jobs,
+            max_workers=args.workers,
+            chunk_size=args.chunk_size,
+            publish=not args.no_publish,
+            keep_versions=args.keep_versions,
+        )
+
+    for result in manifest["results"]:
+        print(
+            f"[OK] {result['name']}: {result['rows']:,} rows, {result['metric']}={result['score']:.3f}, "
+            f"{result['training_time']:.1f}s"
+        )
+    print(f"[DONE] Model version {manifest['version']}" + ("" if args.no_publish else " published"))
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
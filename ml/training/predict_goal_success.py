@@ -3,24 +3,22 @@ Goal Success Prediction Node
 Predicts probability of goal success using ML model.
 """
 
-import joblib
 import os
 import pandas as pd
-import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from pathlib import Path
 from state import WorkflowState
+from ml.model_registry import get_model_registry
+from ml.training.pipeline import atomic_dump
 
 
-def train_goal_model():
+def train_goal_model(force=False):
     """Train goal success prediction model using the available dataset"""
 
     model_path = "ml/models/goal_success_model.pkl"
     encoder_path = "ml/models/goal_success_label_encoders.pkl"
 
-    if os.path.exists(model_path):
+    if os.path.exists(model_path) and not force:
         print(f" Goal success model already exists at {model_path}")
         return True
 
@@ -81,8 +79,9 @@ def train_goal_model():
         os.makedirs("ml/models", exist_ok=True)
 
         # Save model and encoders
-        joblib.dump(model, model_path)
-        joblib.dump(label_encoders, encoder_path)
+        # Atomic writes: a serving process never loads a half-written pickle
+        atomic_dump(label_encoders, encoder_path)
+        atomic_dump(model, model_path)
 
         print(f"[SUCCESS] Goal success model trained and saved to {model_path}")
         print(f"[INFO] Model features: {feature_cols}")
@@ -103,8 +102,9 @@ async def predict_goal_success(state: WorkflowState) -> WorkflowState:
 
         # Try to load trained model
         if os.path.exists(model_path) and os.path.exists(encoder_path):
-            model = joblib.load(model_path)
-            label_encoders = joblib.load(encoder_path)
+            registry = get_model_registry()
+            model = registry.get(model_path)
+            label_encoders = registry.get(encoder_path)
 
             print("[ML] Using trained Goal Success model")
 
@@ -3,24 +3,22 @@ Risk Profile Prediction Node
 Predicts risk profile and risk scores using ML model.
 """
 
-import joblib
 import os
 import pandas as pd
-import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from pathlib import Path
 from state import WorkflowState
+from ml.model_registry import get_model_registry
+from ml.training.pipeline import atomic_dump
 
 
-def train_risk_model():
+def train_risk_model(force=False):
     """Train risk profile model using the available dataset"""
 
     model_path = "ml/models/risk_profile_model.pkl"
     encoder_path = "ml/models/label_encoders.pkl"
 
-    if os.path.exists(model_path):
+    if os.path.exists(model_path) and not force:
         print(f" Risk model already exists at {model_path}")
         return True
 
@@ -76,8 +74,9 @@ def train_risk_model():
         os.makedirs("ml/models", exist_ok=True)
 
         # Save model and encoders
-        joblib.dump(model, model_path)
-        joblib.dump(label_encoders, encoder_path)
+        # Atomic writes: a serving process never loads a half-written pickle
+        atomic_dump(label_encoders, encoder_path)
+        atomic_dump(model, model_path)
 
         print(f"[SUCCESS] Risk model trained and saved to {model_path}")
         print(f"[INFO] Model features: {feature_cols}")
@@ -98,8 +97,9 @@ async def predict_risk_profile(state: WorkflowState) -> WorkflowState:
 
         # Try to load trained model
         if os.path.exists(model_path) and os.path.exists(encoder_path):
-            model = joblib.load(model_path)
-            label_encoders = joblib.load(encoder_path)
+            registry = get_model_registry()
+            model = registry.get(model_path)
+            label_encoders = registry.get(encoder_path)
 
             print("[ML] Using trained Risk Assessment model")
 
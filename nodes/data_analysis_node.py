@@ -3,11 +3,17 @@ Data Analysis Node
 Validates and processes prospect data through the DataAnalystAgent.
 """
 
+from functools import lru_cache
+
 from state import WorkflowState
-from langraph_agents.agents.data_analyst_agent import DataAnalystAgent
 
-# Initialize agent at module level
-data_analyst_agent = DataAnalystAgent()
+
+@lru_cache(maxsize=None)
+def get_data_analyst_agent():
+    """Import and construct the agent when the node first runs."""
+    from agents.data_analyst_agent import DataAnalystAgent
+
+    return DataAnalystAgent()
 
 
 async def data_analysis_node(state: WorkflowState) -> WorkflowState:
@@ -17,4 +23,4 @@ async def data_analysis_node(state: WorkflowState) -> WorkflowState:
     This node is executed by the DataAnalystAgent through the workflow.
     It handles data validation, cleaning, and quality assessment.
     """
-    return await data_analyst_agent.run(state)
+    return await get_data_analyst_agent().run(state)
@@ -3,11 +3,17 @@ Persona Classification Node
 Classifies investor behavior and personas through the PersonaAgent.
 """
 
+from functools import lru_cache
+
 from state import WorkflowState
-from langraph_agents.agents.persona_agent import PersonaAgent
 
-# Initialize agent at module level
-persona_agent = PersonaAgent()
+
+@lru_cache(maxsize=None)
+def get_persona_agent():
+    """Import and construct the agent when the node first runs."""
+    from agents.persona_agent import PersonaAgent
+
+    return PersonaAgent()
 
 
 async def persona_node(state: WorkflowState) -> WorkflowState:
@@ -17,4 +23,4 @@ async def persona_node(state: WorkflowState) -> WorkflowState:
     This node is executed by the PersonaAgent through the workflow.
     It identifies investor personality types and behavioral insights.
     """
-    return await persona_agent.run(state)
+    return await get_persona_agent().run(state)
@@ -3,11 +3,17 @@ Product Recommendation Node
 Generates product recommendations through the ProductSpecialistAgent.
 """
 
+from functools import lru_cache
+
 from state import WorkflowState
-from langraph_agents.agents.product_specialist_agent import ProductSpecialistAgent
 
-# Initialize agent at module level
-product_specialist_agent = ProductSpecialistAgent()
+
+@lru_cache(maxsize=None)
+def get_product_specialist_agent():
+    """Import and construct the agent when the node first runs."""
+    from agents.product_specialist_agent import ProductSpecialistAgent
+
+    return ProductSpecialistAgent()
 
 
 async def product_recommendation_node(state: WorkflowState) -> WorkflowState:
@@ -17,4 +23,4 @@ async def product_recommendation_node(state: WorkflowState) -> WorkflowState:
     This node is executed by the ProductSpecialistAgent through the workflow.
     It recommends suitable investment products based on prospect profile and risk assessment.
     """
-    return await product_specialist_agent.run(state)
+    return await get_product_specialist_agent().run(state)
@@ -3,11 +3,17 @@ Risk Assessment Node
 Performs risk profiling and assessment through the RiskAssessmentAgent.
 """
 
+from functools import lru_cache
+
 from state import WorkflowState
-from langraph_agents.agents.risk_assessment_agent import RiskAssessmentAgent
 
-# Initialize agent at module level
-risk_assessment_agent = RiskAssessmentAgent()
+
+@lru_cache(maxsize=None)
+def get_risk_assessment_agent():
+    """Import and construct the agent when the node first runs."""
+    from agents.risk_assessment_agent import RiskAssessmentAgent
+
+    return RiskAssessmentAgent()
 
 
 async def risk_assessment_node(state: WorkflowState) -> WorkflowState:
@@ -17,4 +23,4 @@ async def risk_assessment_node(state: WorkflowState) -> WorkflowState:
     This node is executed by the RiskAssessmentAgent through the workflow.
     It calculates risk scores and identifies risk factors.
     """
-    return await risk_assessment_agent.run(state)
+    return await get_risk_assessment_agent().run(state)
@@ -1,7 +1,7 @@
 """Application settings and configuration management."""
 
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -29,8 +29,24 @@ class Settings(BaseSettings):
     # Performance Settings
     max_concurrent_agents: int = 5
     agent_timeout: int = 300
+    workflow_timeout: int = 900  # per-analysis budget split across stages; 0 disables
     cache_ttl: int = 3600
 
+    # LLM Admission Control (global cap defaults to max_concurrent_agents)
+    llm_max_concurrency: Optional[int] = None
+    llm_reserved_interactive_slots: int = 1
+    llm_agent_quotas: Dict[str, int] = Field(default_factory=dict)
+
+    # LLM Response Cache
+    enable_llm_cache: bool = True
+    llm_cache_max_entries: int = 512
+    llm_cache_path: Optional[str] = "cache/llm_responses.sqlite"
+
+    # Workflow Checkpoints: "memory" or "sqlite"
+    checkpoint_backend: str = "memory"
+    checkpoint_db_path: str = "cache/workflow_checkpoints.sqlite"
+    checkpoint_ttl: int = 86400
+
     # File Paths
     data_dir: str = "data"
     models_dir: str = "ml/models"
@@ -41,6 +57,17 @@ class Settings(BaseSettings):
     goal_model_path: str = "ml/models/goal_success_model.pkl"
     risk_encoders_path: str = "ml/models/label_encoders.pkl"
     goal_encoders_path: str = "ml/models/goal_success_label_encoders.pkl"
+    model_mmap_mode: Optional[str] = None  # e.g. "r" to memory-map model arrays
+    model_versions_keep: int = 5  # trained versions kept under ml/models/versions (0 = all)
+    # Evaluate forests from flat node arrays for batches up to compiled_forest_max_rows
+    compiled_forest_inference: bool = True
+    compiled_forest_max_rows: int = 1000
+    # Memoized model outputs per encoded feature row (0 disables)
+    prediction_memo_max_entries: int = 4096
+
+    # Monte Carlo goal projection (a fixed seed keeps projections reproducible)
+    goal_simulation_paths: int = 10000
+    goal_simulation_seed: Optional[int] = 42
 
     # Data Files
     prospects_csv: str = "data/input_data/prospects.csv"
@@ -55,6 +82,21 @@ class Settings(BaseSettings):
     default_temperature: float = 0.1
     max_tokens: int = 4000
 
+    # LLM backend: "ollama" or "fake" (deterministic local stand-in for benchmarks)
+    llm_backend: str = "ollama"
+    ollama_model: str = "llama3"
+    ollama_base_url: str = "http://localhost:11434"
+    llm_max_connections: int = 10
+    llm_keepalive_timeout: float = 30.0
+    fake_llm_latency: float = 0.0
+    fake_llm_tokens_per_second: float = 0.0
+
+    # Meeting guide generation: "sequential", "concurrent" or "structured"
+    meeting_guide_mode: str = "concurrent"
+
+    # Persona rule score at or above which the LLM is skipped (above 1.0 always asks the LLM)
+    persona_rule_threshold: float = 0.85
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
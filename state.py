@@ -1,7 +1,7 @@
 """Pydantic models for LangGraph state management."""
 
-from typing import Dict, List, Optional, Any, Union
-from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional, Any, Union
+from pydantic import BaseModel, BeforeValidator, Field
 from datetime import datetime
 import pandas as pd
 
@@ -60,6 +60,15 @@ class ProductRecommendation(BaseModel):
     fees: Optional[str] = None
 
 
+class PortfolioOptimizationResult(BaseModel):
+    """Mean-variance allocation across catalog products."""
+    product_weights: Dict[str, float]  # product_id -> weight, summing to 1
+    expected_return: float
+    volatility: float
+    volatility_budget: float
+    affordable: bool = True  # False when no frontier point fits the investable amount
+
+
 class MeetingGuide(BaseModel):
     """Meeting guide model."""
     agenda_items: List[str]
@@ -70,6 +79,69 @@ class MeetingGuide(BaseModel):
     estimated_duration: int  # minutes
 
 
+def _string_list(value: Any) -> List[str]:
+    """Accept a single item or a list from the LLM; drop blank entries."""
+    if value is None:
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _string_dict(value: Any) -> Dict[str, str]:
+    if not isinstance(value, dict):
+        return value  # rejected by the Dict[str, str] check
+    return {str(key).strip(): str(item).strip() for key, item in value.items() if str(key).strip()}
+
+
+StringList = Annotated[List[str], BeforeValidator(_string_list)]
+StringDict = Annotated[Dict[str, str], BeforeValidator(_string_dict)]
+
+
+class RiskAnalysisOutput(BaseModel):
+    """JSON returned by the risk analysis prompt."""
+    risk_factors: StringList = Field(default_factory=list)
+    recommendations: StringList = Field(default_factory=list)
+
+
+class GoalTimelineOutput(BaseModel):
+    short_term: Optional[str] = None
+    medium_term: Optional[str] = None
+    long_term: Optional[str] = None
+    insights: StringList = Field(default_factory=list)
+
+
+class GoalAnalysisOutput(BaseModel):
+    """JSON returned by the goal analysis prompt."""
+    success_factors: StringList = Field(default_factory=list)
+    challenges: StringList = Field(default_factory=list)
+    timeline: GoalTimelineOutput = Field(default_factory=GoalTimelineOutput)
+
+
+class PersonaOutput(BaseModel):
+    """JSON returned by the persona classification prompt."""
+    persona_type: str
+    reasoning: str = ""
+    behavioral_insights: StringList = Field(default_factory=list)
+
+
+class ListOutput(BaseModel):
+    """JSON returned by single-list prompts."""
+    items: StringList = Field(default_factory=list)
+
+
+class ObjectionHandlingOutput(BaseModel):
+    objection_handling: StringDict = Field(default_factory=dict)
+
+
+class MeetingGuideOutput(BaseModel):
+    """JSON returned by the single-call meeting guide prompt."""
+    agenda_items: StringList = Field(default_factory=list)
+    key_talking_points: StringList = Field(default_factory=list)
+    questions_to_ask: StringList = Field(default_factory=list)
+    objection_handling: StringDict = Field(default_factory=dict)
+
+
 class ComplianceCheck(BaseModel):
     """Compliance validation results."""
     is_compliant: bool
@@ -79,6 +151,19 @@ class ComplianceCheck(BaseModel):
     required_disclosures: List[str]
 
 
+class BatchAnalysisResult(BaseModel):
+    """Outcome of one prospect within a batch analysis."""
+    index: int
+    prospect_id: Optional[str] = None
+    success: bool
+    state: Optional[Any] = None
+    error: Optional[str] = None
+    execution_time: float = 0.0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
 class AgentExecution(BaseModel):
     """Agent execution tracking."""
     agent_name: str
@@ -87,6 +172,7 @@ class AgentExecution(BaseModel):
     status: str = "running"  # running, completed, failed
     error_message: Optional[str] = None
     execution_time: Optional[float] = None
+    timed_out: bool = False  # deadline hit; status tells whether a fallback succeeded
 
     class Config:
         arbitrary_types_allowed = True
@@ -119,6 +205,7 @@ class RecommendationState(BaseModel):
     """State for product recommendations."""
     recommended_products: List[ProductRecommendation] = Field(default_factory=list)
     portfolio_allocation: Optional[Dict[str, float]] = None
+    portfolio_optimization: Optional[PortfolioOptimizationResult] = None
     justification_text: Optional[str] = None
     compliance_check: Optional[ComplianceCheck] = None
 
@@ -147,11 +234,53 @@ class ChatState(BaseModel):
         arbitrary_types_allowed = True
 
 
+def merge_analysis_state(left: Optional[AnalysisState], right: Optional[AnalysisState]) -> AnalysisState:
+    """Reducer for ``WorkflowState.analysis``.
+
+    Parallel analysis branches each report only the sub-field they own, so the
+    merge keeps every result already present and overlays the non-empty fields
+    of the incoming update.
+    """
+    if left is None:
+        return right if right is not None else AnalysisState()
+    if right is None:
+        return left
+    if isinstance(right, dict):
+        right = AnalysisState(**right)
+
+    merged = left.model_copy()
+    for field_name in AnalysisState.model_fields:
+        value = getattr(right, field_name)
+        if value is not None:
+            setattr(merged, field_name, value)
+    return merged
+
+
+def merge_step_lists(left: Optional[List[Any]], right: Optional[List[Any]]) -> List[Any]:
+    """Reducer for append-only tracking lists (steps, agent executions).
+
+    Every node returns the full list it was given plus its own additions, so
+    sibling branches share a common prefix. Only the items past that prefix
+    are appended, which keeps sequential nodes idempotent and lets concurrent
+    branches contribute without clobbering each other.
+    """
+    left = list(left or [])
+    right = list(right or [])
+
+    common = 0
+    for existing, incoming in zip(left, right):
+        if existing != incoming:
+            break
+        common += 1
+
+    return left + right[common:]
+
+
 class WorkflowState(BaseModel):
     """Complete workflow state combining all sub-states."""
     # Core states
     prospect: ProspectState = Field(default_factory=ProspectState)
-    analysis: AnalysisState = Field(default_factory=AnalysisState)
+    analysis: Annotated[AnalysisState, merge_analysis_state] = Field(default_factory=AnalysisState)
     recommendations: RecommendationState = Field(default_factory=RecommendationState)
     meeting: MeetingState = Field(default_factory=MeetingState)
     chat: ChatState = Field(default_factory=ChatState)
@@ -165,9 +294,9 @@ class WorkflowState(BaseModel):
 
     # Execution tracking
     current_step: str = "start"
-    completed_steps: List[str] = Field(default_factory=list)
-    failed_steps: List[str] = Field(default_factory=list)
-    agent_executions: List[AgentExecution] = Field(default_factory=list)
+    completed_steps: Annotated[List[str], merge_step_lists] = Field(default_factory=list)
+    failed_steps: Annotated[List[str], merge_step_lists] = Field(default_factory=list)
+    agent_executions: Annotated[List[AgentExecution], merge_step_lists] = Field(default_factory=list)
 
     # Configuration
     workflow_config: Dict[str, Any] = Field(default_factory=dict)
@@ -189,13 +318,20 @@ class WorkflowState(BaseModel):
         self.agent_executions.append(execution)
         return execution
 
-    def complete_agent_execution(self, agent_name: str, success: bool = True, error: Optional[str] = None):
+    def complete_agent_execution(
+        self,
+        agent_name: str,
+        success: bool = True,
+        error: Optional[str] = None,
+        timed_out: bool = False
+    ):
         """Mark an agent execution as completed."""
         for execution in reversed(self.agent_executions):
             if execution.agent_name == agent_name and execution.status == "running":
                 execution.end_time = datetime.now()
                 execution.status = "completed" if success else "failed"
                 execution.error_message = error
+                execution.timed_out = timed_out
                 if execution.start_time and execution.end_time:
                     execution.execution_time = (execution.end_time - execution.start_time).total_seconds()
                 break
@@ -205,6 +341,7 @@ class WorkflowState(BaseModel):
         total_executions = len(self.agent_executions)
         completed = len([e for e in self.agent_executions if e.status == "completed"])
         failed = len([e for e in self.agent_executions if e.status == "failed"])
+        timed_out = len([e for e in self.agent_executions if e.timed_out])
 
         total_time = sum([
             e.execution_time for e in self.agent_executions
@@ -215,6 +352,7 @@ class WorkflowState(BaseModel):
             "total_executions": total_executions,
             "completed": completed,
             "failed": failed,
+            "timed_out": timed_out,
             "success_rate": completed / total_executions if total_executions > 0 else 0,
             "total_execution_time": total_time,
             "average_execution_time": total_time / completed if completed > 0 else 0
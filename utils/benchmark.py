@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Latency and throughput benchmarks for the prospect analysis workflow.
+
+Agents run against the deterministic fake LLM (LLM_BACKEND=fake), so results
+are reproducible without a live Ollama and comparable across commits.
+
+Usage:
+    python -m utils.benchmark --latency 0.05 --batch-sizes 1 10 100 1000 --output benchmark.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langgraph.checkpoint.memory import MemorySaver
+from loguru import logger
+
+from settings import get_settings
+from state import WorkflowState
+from utils.llm_governor import get_llm_governor
+
+
+EXPERIENCE_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+INVESTMENT_GOALS = ["Retirement Planning", "Wealth Creation", "Child Education", "Home Purchase"]
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000]
+DEFAULT_INFERENCE_ROWS = [1, 10000]
+
+
+def configure_fake_llm(latency: float, tokens_per_second: float) -> None:
+    """Point agent construction at the deterministic fake LLM."""
+    settings = get_settings()
+    settings.llm_backend = "fake"
+    settings.fake_llm_latency = latency
+    settings.fake_llm_tokens_per_second = tokens_per_second
+
+
+def summarize_latencies(latencies: Sequence[float], wall_time: Optional[float] = None) -> Dict[str, Any]:
+    """Percentile summary of latencies in seconds; throughput is calls per second."""
+    values = np.asarray(latencies, dtype=np.float64)
+    if values.size == 0:
+        return {"count": 0}
+
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    elapsed = wall_time if wall_time is not None else float(values.sum())
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "throughput": values.size / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def generate_synthetic_prospects(n_prospects: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Create reproducible prospects in the prospects.csv schema."""
+    rng = np.random.default_rng(seed)
+    current_savings = rng.integers(50000, 1500000, n_prospects)
+    columns = {
+        "age": rng.integers(25, 65, n_prospects),
+        "annual_income": rng.integers(300000, 2000000, n_prospects),
+        "current_savings": current_savings,
+        "target_goal_amount": current_savings + rng.integers(500000, 5000000, n_prospects),
+        "investment_horizon_years": rng.integers(1, 20, n_prospects),
+        "number_of_dependents": rng.integers(0, 5, n_prospects),
+        "investment_experience_level": rng.choice(EXPERIENCE_LEVELS, n_prospects),
+        "investment_goal": rng.choice(INVESTMENT_GOALS, n_prospects),
+    }
+
+    return [
+        {
+            "prospect_id": f"SYN{index:05d}",
+            "name": f"Synthetic Prospect {index}",
+            **{name: values[index].item() for name, values in columns.items()},
+        }
+        for index in range(n_prospects)
+    ]
+
+
+def build_benchmark_workflow():
+    """Create a workflow whose agents bypass the response cache."""
+    from graph import ProspectAnalysisWorkflow
+
+    workflow = ProspectAnalysisWorkflow(checkpointer=MemorySaver())
+    for agent in get_workflow_agents(workflow):
+        agent.response_cache = None
+    return workflow
+
+
+def get_workflow_agents(workflow) -> list:
+    return [
+        workflow.data_analyst,
+        workflow.risk_assessor,
+        workflow.goal_planner,
+        workflow.persona_classifier,
+        workflow.product_specialist,
+        workflow.portfolio_optimizer,
+    ]
+
+
+async def benchmark_agents(workflow, prospect: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    """Time each agent's run() on a copy of a fully analyzed state."""
+    base_state = WorkflowState.model_validate(await workflow.analyze_prospect(prospect))
+    results = {}
+
+    for agent in get_workflow_agents(workflow):
+        errors_before = agent.error_count
+        latencies = []
+        for _ in range(iterations):
+            state = base_state.model_copy(deep=True)
+            start_time = time.perf_counter()
+            await agent.run(state)
+            latencies.append(time.perf_counter() - start_time)
+        results[agent.name] = {
+            **summarize_latencies(latencies),
+            "errors": agent.error_count - errors_before,
+        }
+
+    return results
+
+
+async def benchmark_analyze_prospect(workflow, prospects: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    """Time sequential end-to-end analyze_prospect calls."""
+    latencies = []
+    for index in range(iterations):
+        start_time = time.perf_counter()
+        await workflow.analyze_prospect(prospects[index % len(prospects)])
+        latencies.append(time.perf_counter() - start_time)
+    return summarize_latencies(latencies)
+
+
+async def benchmark_batch(workflow, batch_size: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """Time analyze_prospects over a batch of synthetic prospects."""
+    prospects = generate_synthetic_prospects(batch_size, seed=seed)
+
+    start_time = time.perf_counter()
+    results = [result async for result in workflow.analyze_prospects(prospects, max_concurrency=concurrency)]
+    wall_time = time.perf_counter() - start_time
+
+    succeeded = [result.execution_time for result in results if result.success]
+    return {
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "wall_time": wall_time,
+        "failures": len(results) - len(succeeded),
+        **summarize_latencies(succeeded, wall_time=wall_time),
+    }
+
+
+def benchmark_model_inference(
+    row_counts: Sequence[int] = DEFAULT_INFERENCE_ROWS,
+    iterations: int = 20,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """Time sklearn against the compiled forest for the risk and goal models."""
+    from ml.batch_inference import GOAL_FEATURES, RISK_FEATURES, BatchPredictor
+    from ml.model_registry import get_model_registry
+
+    settings = get_settings()
+    registry = get_model_registry()
+    models = {
+        "risk": (settings.risk_model_path, settings.risk_encoders_path, RISK_FEATURES),
+        "goal": (settings.goal_model_path, settings.goal_encoders_path, GOAL_FEATURES),
+    }
+    prospects = generate_synthetic_prospects(max(row_counts), seed=seed)
+
+    results = {}
+    for name, (model_path, encoders_path, features) in models.items():
+        try:
+            predictor = BatchPredictor(
+                registry.get(model_path), registry.get(encoders_path), features, compile_model=True
+            )
+        except FileNotFoundError:
+            continue
+        if predictor.compiled is None:
+            continue
+        method = "predict_proba" if predictor.is_classifier else "predict"
+
+        rows = []
+        for n_rows in row_counts:
+            matrix = predictor.encoder.transform(prospects[:n_rows])
+            timings = {}
+            for engine in ("sklearn", "compiled"):
+                predictor.compiled_max_rows = n_rows if engine == "compiled" else -1
+                latencies = []
+                for _ in range(iterations):
+                    start_time = time.perf_counter()
+                    predictor._call_model(method, matrix)
+                    latencies.append(time.perf_counter() - start_time)
+                timings[engine] = summarize_latencies(latencies)
+            rows.append({
+                "rows": n_rows,
+                **timings,
+                "speedup": timings["sklearn"]["p50"] / max(timings["compiled"]["p50"], 1e-12),
+            })
+        results[name] = {"trees": predictor.compiled.n_estimators, "batches": rows}
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_benchmarks(
+    iterations: int = 20,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    concurrency: Optional[int] = None,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """Run every benchmark and return a JSON-serializable report."""
+    settings = get_settings()
+    concurrency = concurrency or settings.max_concurrent_agents
+    workflow = build_benchmark_workflow()
+    prospects = generate_synthetic_prospects(max(iterations, 1), seed=seed)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "llm_backend": settings.llm_backend,
+            "fake_llm_latency": settings.fake_llm_latency,
+            "fake_llm_tokens_per_second": settings.fake_llm_tokens_per_second,
+            "iterations": iterations,
+            "seed": seed,
+        },
+        "agents": await benchmark_agents(workflow, prospects[0], iterations),
+        "analyze_prospect": await benchmark_analyze_prospect(workflow, prospects, iterations),
+        "batches": [
+            await benchmark_batch(workflow, batch_size, concurrency, seed)
+            for batch_size in batch_sizes
+        ],
+        "model_inference": benchmark_model_inference(iterations=iterations, seed=seed),
+    }
+    report["llm_governor"] = get_llm_governor().get_metrics()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the prospect analysis workflow")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM time to first token (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake LLM token rate (0 = instant)")
+    parser.add_argument("--iterations", type=int, default=20, help="Runs per agent and end-to-end benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--concurrency", type=int, default=None, help="Batch concurrency (default MAX_CONCURRENT_AGENTS)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    configure_fake_llm(args.latency, args.tokens_per_second)
+
+    report = asyncio.run(run_benchmarks(
+        iterations=args.iterations,
+        batch_sizes=args.batch_sizes,
+        concurrency=args.concurrency,
+        seed=args.seed,
+    ))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Benchmark report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
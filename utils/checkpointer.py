@@ -0,0 +1,457 @@
+"""File-backed LangGraph checkpointer for resumable workflow runs."""
+
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from loguru import logger
+
+from settings import get_settings
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channel_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_threads_updated_at ON threads (updated_at);
+"""
+
+_COMPRESSED_SUFFIX = "+zlib"
+
+
+class CompressedSerializer:
+    """Wraps a LangGraph serializer and zlib-compresses large payloads."""
+
+    def __init__(self, serde: SerializerProtocol, min_size: int = 512, level: int = 6):
+        self.serde = serde
+        self.min_size = min_size
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.min_size:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return type_ + _COMPRESSED_SUFFIX, compressed
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_COMPRESSED_SUFFIX):
+            type_ = type_[:-len(_COMPRESSED_SUFFIX)]
+            payload = zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer persisted to a SQLite database in WAL mode.
+
+    Channel values are stored once per channel version, so a new checkpoint only
+    serializes the channels that changed in that step. Threads that have not been
+    updated within ttl seconds are pruned on startup and periodically on write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: int = 86400,
+        prune_interval: int = 300,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.serde = CompressedSerializer(self.serde)
+        self.path = Path(path)
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self.prune()
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the requested checkpoint, or the latest one for the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._row_to_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by metadata."""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        yielded = 0
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and yielded >= limit:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            with self._lock:
+                item = self._row_to_tuple(thread_id, checkpoint_ns, row)
+            yielded += 1
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Persist a checkpoint and the channel values that changed in it."""
+        checkpoint_copy = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        values: Dict[str, Any] = checkpoint_copy.pop("channel_values")
+
+        blob_rows = []
+        for channel, version in new_versions.items():
+            type_, blob = (
+                self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+            )
+            blob_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint_copy)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        now = time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO channel_blobs "
+                "(thread_id, checkpoint_ns, channel, version, type, blob) VALUES (?, ?, ?, ?, ?, ?)",
+                blob_rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, type, checkpoint, metadata_type, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized_checkpoint,
+                    metadata_type,
+                    serialized_metadata,
+                    now,
+                ),
+            )
+            self._touch_thread(thread_id, now)
+            self._conn.commit()
+
+        self._maybe_prune(now)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Persist intermediate writes of a task so completed nodes are not re-run."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path,
+            ))
+
+        # Special writes (errors, interrupts) overwrite; regular writes are kept once
+        columns = "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path)"
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO checkpoint_writes {columns} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] < 0],
+            )
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO checkpoint_writes {columns} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] >= 0],
+            )
+            self._touch_thread(thread_id, time.time())
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, write and blob of a thread."""
+        with self._lock:
+            self._delete_threads([thread_id])
+            self._conn.commit()
+
+    def prune(self, ttl: Optional[int] = None) -> int:
+        """Delete threads idle for longer than ttl seconds and return how many were removed."""
+        ttl = self.ttl if ttl is None else ttl
+        self._last_prune = time.time()
+        if ttl <= 0:
+            return 0
+
+        with self._lock:
+            expired = [
+                row[0] for row in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE updated_at < ?", (time.time() - ttl,)
+                )
+            ]
+            if expired:
+                self._delete_threads(expired)
+                self._conn.commit()
+
+        if expired:
+            logger.info(f"Pruned {len(expired)} expired workflow checkpoint threads")
+        return len(expired)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Async API (SQLite calls are short, so they run inline)
+    # ------------------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _row_to_tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence[Any]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, blob))
+
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob_row = self._conn.execute(
+                "SELECT type, blob FROM channel_blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob_row is not None and blob_row[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob_row)
+
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, blob FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((write_type, write_blob)))
+                for task_id, channel, write_type, write_blob in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def _touch_thread(self, thread_id: str, now: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+            (thread_id, now),
+        )
+
+    def _delete_threads(self, thread_ids: Sequence[str]) -> None:
+        params = [(thread_id,) for thread_id in thread_ids]
+        for table in ("checkpoints", "channel_blobs", "checkpoint_writes", "threads"):
+            self._conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", params)
+
+    def _maybe_prune(self, now: float) -> None:
+        if self.ttl > 0 and now - self._last_prune >= self.prune_interval:
+            try:
+                self.prune()
+            except Exception as e:
+                logger.warning(f"Checkpoint pruning failed: {str(e)}")
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    """Build the workflow checkpointer configured in settings."""
+    settings = get_settings()
+    if settings.checkpoint_backend == "sqlite":
+        try:
+            return SQLiteCheckpointSaver(settings.checkpoint_db_path, ttl=settings.checkpoint_ttl)
+        except Exception as e:
+            logger.warning(f"SQLite checkpointer unavailable, falling back to memory: {str(e)}")
+    elif settings.checkpoint_backend != "memory":
+        logger.warning(f"Unknown checkpoint backend '{settings.checkpoint_backend}', using memory")
+    return MemorySaver()
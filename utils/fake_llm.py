@@ -0,0 +1,141 @@
+"""Deterministic local stand-in for the Ollama chat model.
+
+Used by benchmarks and offline runs: responses are chosen by hashing the
+prompt, so repeated runs produce identical output, and latency is simulated
+with a fixed time-to-first-token plus a configurable token rate.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+# Covers the section headers and bullet formats the agent parsers look for
+DEFAULT_FAKE_RESPONSE = """Persona: Steady Saver
+Risk Factors:
+- Market volatility could affect short-term returns
+- Emergency fund is small relative to annual expenses
+Recommendations:
+- Maintain a diversified portfolio across asset classes
+- Review the allocation annually
+Success Factors:
+- Consistent monthly savings discipline
+Challenges:
+- Inflation erodes purchasing power over the horizon
+Timeline:
+- Goal is reachable within the stated investment horizon"""
+
+# Answers prompts that ask for a JSON object; extra keys are ignored by each schema
+DEFAULT_FAKE_JSON_RESPONSE = json.dumps({
+    "persona_type": "Steady Saver",
+    "reasoning": "Balanced profile with a medium-term goal.",
+    "behavioral_insights": ["Responds well to goal-based milestones"],
+    "risk_factors": [
+        "Market volatility could affect short-term returns",
+        "Emergency fund is small relative to annual expenses"
+    ],
+    "recommendations": [
+        "Maintain a diversified portfolio across asset classes",
+        "Review the allocation annually"
+    ],
+    "success_factors": ["Consistent monthly savings discipline"],
+    "challenges": ["Inflation erodes purchasing power over the horizon"],
+    "timeline": {"insights": ["Goal is reachable within the stated investment horizon"]},
+    "items": ["Welcome and introductions (5 min)", "Review goals and risk profile (15 min)"],
+    "agenda_items": ["Welcome and introductions (5 min)", "Review goals and risk profile (15 min)"],
+    "key_talking_points": ["Diversification keeps the plan on track through volatility"],
+    "questions_to_ask": ["What would you do if the portfolio fell 10% in a year?"],
+    "objection_handling": {"The fees seem high": "Compare net returns after fees over the full horizon"}
+}, indent=2)
+
+
+class DeterministicChatModel(BaseChatModel):
+    """Chat model that answers from canned responses with simulated latency."""
+
+    responses: List[str] = [DEFAULT_FAKE_RESPONSE]
+    json_responses: List[str] = [DEFAULT_FAKE_JSON_RESPONSE]
+    latency: float = 0.0  # seconds before the first token
+    tokens_per_second: float = 0.0  # 0 emits every token immediately
+    model: str = "deterministic-fake"
+    temperature: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "deterministic-fake"
+
+    def _select_response(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        responses = self.json_responses if "JSON object" in prompt else self.responses
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return responses[int.from_bytes(digest[:4], "big") % len(responses)]
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        # Whitespace-delimited words, keeping the separator with each token
+        tokens, start = [], 0
+        for index, char in enumerate(text):
+            if char.isspace() and index > start:
+                tokens.append(text[start:index])
+                start = index
+        if start < len(text):
+            tokens.append(text[start:])
+        return tokens
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _total_delay(self, text: str) -> float:
+        return self.latency + self._token_delay() * len(self._tokenize(text))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._select_response(messages)
+        time.sleep(self._total_delay(text))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._select_response(messages)
+        await asyncio.sleep(self._total_delay(text))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for token in self._tokenize(self._select_response(messages)):
+            time.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for token in self._tokenize(self._select_response(messages)):
+            await asyncio.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
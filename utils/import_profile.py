@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Import-time profile and Streamlit cold-start measurement.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+``python -X importtime -c "import <module>"`` for the import profile, and a
+first Streamlit script run (streamlit.testing AppTest, no browser needed) for
+the app cold start.
+
+Usage:
+    python -m utils.import_profile --modules graph agents.base_agent --streamlit app.py --output imports.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULES = ["graph"]
+
+_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+app.run()
+finished = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_seconds": imported - start,
+    "first_run_seconds": finished - imported,
+    "exceptions": [str(getattr(e, "message", e)) for e in app.exception],
+}))
+"""
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` lines into {module, depth, self_us, cumulative_us} rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        module = name.lstrip()
+        rows.append({
+            "module": module,
+            # Nested imports are indented by two spaces per level
+            "depth": (len(name) - len(module) - 1) // 2,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    return rows
+
+
+def summarize_importtime(rows: Sequence[Dict[str, Any]], top: int = 15) -> Dict[str, Any]:
+    """Total import time plus the most expensive modules and top-level packages."""
+    total_us = sum(row["cumulative_us"] for row in rows if row["depth"] == 0)
+
+    packages: Dict[str, int] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + row["self_us"]
+
+    return {
+        "total_seconds": total_us / 1e6,
+        "modules_imported": len(rows),
+        "slowest_cumulative": [
+            {"module": row["module"], "seconds": row["cumulative_us"] / 1e6}
+            for row in sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)[:top]
+        ],
+        "slowest_self": [
+            {"module": row["module"], "seconds": row["self_us"] / 1e6}
+            for row in sorted(rows, key=lambda row: row["self_us"], reverse=True)[:top]
+        ],
+        "packages": [
+            {"package": package, "seconds": self_us / 1e6}
+            for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def profile_imports(module: str, top: int = 15, python: str = sys.executable) -> Dict[str, Any]:
+    """Import module in a fresh interpreter and summarize where the time went."""
+    start_time = time.perf_counter()
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    wall_time = time.perf_counter() - start_time
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    return {
+        "module": module,
+        "wall_seconds": wall_time,
+        **summarize_importtime(parse_importtime(completed.stderr), top=top),
+    }
+
+
+def measure_streamlit_cold_start(
+    script: str = "app.py",
+    timeout: float = 120.0,
+    python: str = sys.executable,
+) -> Dict[str, Any]:
+    """Time a fresh interpreter through the first full run of a Streamlit script."""
+    start_time = time.perf_counter()
+    completed = subprocess.run(
+        [python, "-c", _COLD_START_SCRIPT, script, str(timeout)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=timeout + 30
+    )
+    wall_time = time.perf_counter() - start_time
+    if completed.returncode != 0:
+        raise RuntimeError(f"Streamlit run of {script} failed:\n{completed.stderr[-2000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"script": script, "wall_seconds": wall_time, **result}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text summary of a profile report."""
+    lines = []
+    for profile in report.get("imports", []):
+        lines.append(
+            f"import {profile['module']}: {profile['total_seconds']:.3f}s "
+            f"({profile['modules_imported']} modules, {profile['wall_seconds']:.3f}s wall)"
+        )
+        for entry in profile["slowest_cumulative"]:
+            lines.append(f"  {entry['seconds']:8.3f}s  {entry['module']}")
+    cold_start = report.get("streamlit")
+    if cold_start:
+        lines.append(
+            f"streamlit {cold_start['script']}: {cold_start['wall_seconds']:.3f}s wall, "
+            f"first run {cold_start['first_run_seconds']:.3f}s"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Profile import time and Streamlit cold start")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to import-profile")
+    parser.add_argument("--top", type=int, default=15, help="Entries per ranking")
+    parser.add_argument("--streamlit", metavar="SCRIPT", help="Also time a cold start of this Streamlit app")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Streamlit run timeout (seconds)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report: Dict[str, Any] = {"imports": [profile_imports(module, top=args.top) for module in args.modules]}
+    if args.streamlit:
+        report["streamlit"] = measure_streamlit_cold_start(args.streamlit, timeout=args.timeout)
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Import profile written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Content-addressed response cache for LLM calls."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+from loguru import logger
+
+from settings import get_settings
+
+
+def make_cache_key(messages: Sequence[Any], model_name: str, temperature: Optional[float]) -> str:
+    """Build a stable cache key from rendered messages and model parameters."""
+    payload = {
+        "model": model_name,
+        "temperature": temperature,
+        "messages": [
+            [getattr(message, "type", "human"), getattr(message, "content", str(message))]
+            for message in messages
+        ],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Interface for LLM response caches."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss."""
+
+    @abstractmethod
+    def set(self, key: str, response: str) -> None:
+        """Store a response under key."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop all cached responses."""
+
+
+class InMemoryLRUCache(ResponseCache):
+    """Bounded in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 512, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            response, created_at = entry
+            if self.ttl > 0 and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        with self._lock:
+            self._entries[key] = (response, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """On-disk cache that survives process restarts."""
+
+    def __init__(self, path: str, ttl: int = 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.prune()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self.ttl > 0 and time.time() - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+            self._conn.commit()
+
+    def prune(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        if self.ttl <= 0:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+
+class TieredResponseCache(ResponseCache):
+    """Chain of caches checked in order; hits are promoted to faster tiers."""
+
+    def __init__(self, tiers: List[ResponseCache]):
+        self.tiers = tiers
+
+    def get(self, key: str) -> Optional[str]:
+        for index, tier in enumerate(self.tiers):
+            response = tier.get(key)
+            if response is not None:
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, response)
+                return response
+        return None
+
+    def set(self, key: str, response: str) -> None:
+        for tier in self.tiers:
+            tier.set(key, response)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+
+@lru_cache()
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache configured in settings."""
+    settings = get_settings()
+    if not settings.enable_llm_cache:
+        return None
+
+    tiers: List[ResponseCache] = [
+        InMemoryLRUCache(max_entries=settings.llm_cache_max_entries, ttl=settings.cache_ttl)
+    ]
+    if settings.llm_cache_path:
+        try:
+            tiers.append(SQLiteResponseCache(settings.llm_cache_path, ttl=settings.cache_ttl))
+        except Exception as e:
+            logger.warning(f"Disk response cache unavailable, using memory only: {str(e)}")
+
+    return TieredResponseCache(tiers)
@@ -0,0 +1,242 @@
+"""Process-wide LLM client factory with pooled keep-alive HTTP connections.
+
+ChatOllama opens a new HTTP connection (and a new aiohttp session) for every
+call. Agents, the chat assistant and the node modules instead get their
+model from get_chat_model(), which returns one shared client per
+(model, temperature, host), all routed through a single connection pool.
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import aiohttp
+import requests
+from langchain_community.chat_models import ChatOllama
+from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+from langchain_core.language_models import BaseChatModel
+from loguru import logger
+from pydantic import Field
+from requests.adapters import HTTPAdapter
+
+from settings import get_settings
+from utils.fake_llm import DeterministicChatModel
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections shared by every pooled LLM client.
+
+    Sync calls share one requests.Session. aiohttp sessions are bound to an event
+    loop, so async calls share one session per running loop.
+    """
+
+    def __init__(self, max_connections: int = 10, keepalive_timeout: float = 30.0):
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[requests.Session] = None
+        self._async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def session(self) -> requests.Session:
+        """Return the shared synchronous session."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_connections)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def async_session(self) -> aiohttp.ClientSession:
+        """Return the aiohttp session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            self._release_finished_loops()
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._async_sessions[loop] = session
+        return session
+
+    async def aclose(self) -> None:
+        """Close the session of the running loop."""
+        session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def close(self) -> None:
+        """Close the sync session and detach sessions of other loops."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        for loop in list(self._async_sessions.keys()):
+            self._release(self._async_sessions.pop(loop))
+
+    def _release_finished_loops(self) -> None:
+        for loop in list(self._async_sessions.keys()):
+            if loop.is_closed():
+                self._release(self._async_sessions.pop(loop))
+
+    @staticmethod
+    def _release(session: aiohttp.ClientSession) -> None:
+        # The owning loop may already be gone, so the session cannot be awaited;
+        # detaching drops its connector without touching the loop
+        session.detach()
+
+    def __len__(self) -> int:
+        return len(self._async_sessions)
+
+
+class PooledChatOllama(ChatOllama):
+    """ChatOllama that sends requests through a shared ConnectionPool."""
+
+    pool: Any = Field(default=None, exclude=True)
+
+    def _request_payload(self, payload: Any, stop: Optional[List[str]], kwargs: dict) -> dict:
+        # Mirrors the request body built by the upstream _create_stream
+        if self.stop is not None and stop is not None:
+            raise ValueError("`stop` found in both the input and default params.")
+        elif self.stop is not None:
+            stop = self.stop
+
+        params = self._default_params
+        for key in self._default_params:
+            if key in kwargs:
+                params[key] = kwargs[key]
+
+        if "options" in kwargs:
+            params["options"] = kwargs["options"]
+        else:
+            params["options"] = {
+                **params["options"],
+                "stop": stop,
+                **{k: v for k, v in kwargs.items() if k not in self._default_params},
+            }
+
+        if payload.get("messages"):
+            return {"messages": payload.get("messages", []), **params}
+        return {"prompt": payload.get("prompt"), "images": payload.get("images", []), **params}
+
+    def _headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            **(self.headers if isinstance(self.headers, dict) else {}),
+        }
+
+    def _create_stream(
+        self,
+        api_url: str,
+        payload: Any,
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        response = self.pool.session().post(
+            url=api_url,
+            headers=self._headers(),
+            auth=self.auth,
+            json=self._request_payload(payload, stop, kwargs),
+            stream=True,
+            timeout=self.timeout,
+        )
+        response.encoding = "utf-8"
+        if response.status_code != 200:
+            if response.status_code == 404:
+                raise OllamaEndpointNotFoundError(
+                    f"Ollama call failed with status code 404. "
+                    f"Maybe you need to pull the model with `ollama pull {self.model}`."
+                )
+            raise ValueError(
+                f"Ollama call failed with status code {response.status_code}. Details: {response.text}"
+            )
+        return response.iter_lines(decode_unicode=True)
+
+    async def _acreate_stream(
+        self,
+        api_url: str,
+        payload: Any,
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        request_payload = self._request_payload(payload, stop, kwargs)
+        timeout = aiohttp.ClientTimeout(total=self.timeout) if self.timeout else None
+
+        async with self.pool.async_session().post(
+            url=api_url,
+            headers=self._headers(),
+            auth=self.auth,
+            json=request_payload,
+            timeout=timeout,
+        ) as response:
+            if response.status != 200:
+                if response.status == 404:
+                    raise OllamaEndpointNotFoundError("Ollama call failed with status code 404.")
+                raise ValueError(
+                    f"Ollama call failed with status code {response.status}. Details: {await response.text()}"
+                )
+            async for line in response.content:
+                yield line.decode("utf-8")
+
+
+@lru_cache()
+def get_connection_pool() -> ConnectionPool:
+    """Return the process-wide LLM connection pool."""
+    settings = get_settings()
+    pool = ConnectionPool(
+        max_connections=settings.llm_max_connections,
+        keepalive_timeout=settings.llm_keepalive_timeout,
+    )
+    atexit.register(pool.close)
+    return pool
+
+
+@lru_cache(maxsize=32)
+def _get_pooled_client(model: str, temperature: Optional[float], base_url: str) -> PooledChatOllama:
+    logger.info(f"Creating pooled LLM client for {model} at {base_url} (temperature={temperature})")
+    return PooledChatOllama(
+        model=model,
+        temperature=temperature,
+        base_url=base_url,
+        pool=get_connection_pool(),
+    )
+
+
+def get_chat_model(
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    base_url: Optional[str] = None,
+) -> BaseChatModel:
+    """Return the shared chat model for (model, temperature, host)."""
+    settings = get_settings()
+    temperature = settings.default_temperature if temperature is None else temperature
+
+    if settings.llm_backend == "fake":
+        # Cheap and connectionless; built fresh so latency settings apply immediately
+        return DeterministicChatModel(
+            latency=settings.fake_llm_latency,
+            tokens_per_second=settings.fake_llm_tokens_per_second,
+            temperature=temperature,
+        )
+
+    return _get_pooled_client(
+        model or settings.ollama_model,
+        temperature,
+        base_url or settings.ollama_base_url,
+    )
+
+
+def json_mode(llm: Any) -> Any:
+    """Constrain an Ollama model to JSON output; other models are returned as-is."""
+    if isinstance(llm, ChatOllama):
+        return llm.bind(format="json")
+    return llm
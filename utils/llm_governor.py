@@ -0,0 +1,208 @@
+"""Admission control for LLM calls.
+
+Every agent call to the LLM acquires a slot from a process-wide governor,
+which enforces a global concurrency cap, optional per-agent quotas and
+priority lanes: waiting interactive calls (the RM chat) are admitted before
+normal analysis calls, which are admitted before batch work such as meeting
+guide generation. A number of slots can be held back for interactive calls
+so batch load never occupies the whole server.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from settings import get_settings
+
+
+class Priority(IntEnum):
+    """Admission lanes, lowest value first."""
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BATCH = 2
+
+
+class _Waiter:
+    __slots__ = ("agent", "priority", "future", "enqueued_at", "granted")
+
+    def __init__(self, agent: str, priority: Priority, future: asyncio.Future):
+        self.agent = agent
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMGovernor:
+    """Priority-aware concurrency limiter shared by all agents.
+
+    State is guarded by a thread lock and waiters are woken through their own
+    loop, so one governor can serve several event loops (e.g. Streamlit sessions).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        agent_quotas: Optional[Dict[str, int]] = None,
+        reserved_interactive_slots: int = 0,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.agent_quotas = dict(agent_quotas or {})
+        self.reserved_interactive_slots = min(max(0, reserved_interactive_slots), self.max_concurrency - 1)
+
+        self._lock = threading.Lock()
+        self._lanes: Dict[Priority, Deque[_Waiter]] = {priority: deque() for priority in Priority}
+        self._in_flight = 0
+        self._agent_in_flight: Dict[str, int] = {}
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._admitted = {priority: 0 for priority in Priority}
+        self._wait_time = {priority: 0.0 for priority in Priority}
+        self._max_wait = {priority: 0.0 for priority in Priority}
+        self._max_queue_depth = 0
+        self._agent_stats: Dict[str, Dict[str, float]] = {}
+
+    @asynccontextmanager
+    async def slot(self, agent: str, priority: Priority = Priority.NORMAL) -> AsyncIterator[float]:
+        """Hold an LLM slot for the duration of the block; yields the wait time."""
+        wait_time = await self.acquire(agent, priority)
+        try:
+            yield wait_time
+        finally:
+            self.release(agent)
+
+    async def acquire(self, agent: str, priority: Priority = Priority.NORMAL) -> float:
+        """Wait for admission and return the time spent queued, in seconds."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = _Waiter(agent, priority, loop.create_future())
+            self._lanes[priority].append(waiter)
+            self._admit_waiters()
+            if waiter.granted:
+                return 0.0
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth())
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked(agent)
+                elif waiter in self._lanes[priority]:
+                    self._lanes[priority].remove(waiter)
+            raise
+
+        return time.perf_counter() - waiter.enqueued_at
+
+    def release(self, agent: str) -> None:
+        """Return a slot and admit the next eligible waiter."""
+        with self._lock:
+            self._release_locked(agent)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight counts and wait-time statistics."""
+        with self._lock:
+            lanes = {}
+            for priority in Priority:
+                admitted = self._admitted[priority]
+                lanes[priority.name.lower()] = {
+                    "queue_depth": len(self._lanes[priority]),
+                    "admitted": admitted,
+                    "avg_wait_time": self._wait_time[priority] / admitted if admitted else 0.0,
+                    "max_wait_time": self._max_wait[priority],
+                }
+
+            return {
+                "max_concurrency": self.max_concurrency,
+                "reserved_interactive_slots": self.reserved_interactive_slots,
+                "in_flight": self._in_flight,
+                "queue_depth": self._queue_depth(),
+                "max_queue_depth": self._max_queue_depth,
+                "lanes": lanes,
+                "agents": {
+                    agent: {
+                        "in_flight": self._agent_in_flight.get(agent, 0),
+                        "admitted": int(stats["admitted"]),
+                        "avg_wait_time": stats["wait_time"] / stats["admitted"] if stats["admitted"] else 0.0,
+                        "quota": self.agent_quotas.get(agent),
+                    }
+                    for agent, stats in self._agent_stats.items()
+                },
+            }
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self._reset_stats()
+
+    # Internals (callers hold self._lock)
+
+    def _queue_depth(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _can_admit(self, agent: str, priority: Priority) -> bool:
+        limit = self.max_concurrency
+        if priority != Priority.INTERACTIVE:
+            limit -= self.reserved_interactive_slots
+        if self._in_flight >= limit:
+            return False
+
+        quota = self.agent_quotas.get(agent)
+        return quota is None or self._agent_in_flight.get(agent, 0) < quota
+
+    def _grant(self, waiter: _Waiter) -> None:
+        waiter.granted = True
+        self._in_flight += 1
+        self._agent_in_flight[waiter.agent] = self._agent_in_flight.get(waiter.agent, 0) + 1
+
+        wait_time = time.perf_counter() - waiter.enqueued_at
+        self._admitted[waiter.priority] += 1
+        self._wait_time[waiter.priority] += wait_time
+        self._max_wait[waiter.priority] = max(self._max_wait[waiter.priority], wait_time)
+
+        stats = self._agent_stats.setdefault(waiter.agent, {"admitted": 0, "wait_time": 0.0})
+        stats["admitted"] += 1
+        stats["wait_time"] += wait_time
+
+    def _release_locked(self, agent: str) -> None:
+        self._in_flight -= 1
+        self._agent_in_flight[agent] -= 1
+        self._admit_waiters()
+
+    def _admit_waiters(self) -> None:
+        # Highest lane first, FIFO within a lane; waiters blocked only by their
+        # own agent quota do not hold up other agents behind them
+        for priority in Priority:
+            lane = self._lanes[priority]
+            for waiter in list(lane):
+                if self._in_flight >= self.max_concurrency:
+                    return
+                if waiter.future.done():
+                    lane.remove(waiter)
+                    continue
+                if self._can_admit(waiter.agent, waiter.priority):
+                    lane.remove(waiter)
+                    self._grant(waiter)
+                    waiter.future.get_loop().call_soon_threadsafe(_wake, waiter.future)
+
+
+@lru_cache()
+def get_llm_governor() -> LLMGovernor:
+    """Return the process-wide LLM governor configured in settings."""
+    settings = get_settings()
+    return LLMGovernor(
+        max_concurrency=settings.llm_max_concurrency or settings.max_concurrent_agents,
+        agent_quotas=settings.llm_agent_quotas,
+        reserved_interactive_slots=settings.llm_reserved_interactive_slots,
+    )
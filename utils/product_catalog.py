@@ -0,0 +1,94 @@
+"""Indexed, read-only product catalog.
+
+The catalog CSV is parsed once per process (and again only when the file
+changes). Products are bucketed by risk level and each bucket is sorted by
+minimum investment, so candidate selection for a prospect is one binary search
+per eligible risk level; nothing is copied or re-filtered per request.
+Categorical columns are encoded as small integer codes for vectorized scoring.
+"""
+
+import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from settings import get_settings
+
+
+RISK_LEVELS = ("Low", "Moderate", "High")
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+class ProductCatalog:
+    """Immutable product catalog with risk buckets sorted by min_investment."""
+
+    def __init__(self, products: pd.DataFrame):
+        records = products.to_dict("records")
+        self.records: Tuple[Mapping[str, Any], ...] = tuple(MappingProxyType(record) for record in records)
+
+        self.min_investment = _readonly(products["min_investment"].to_numpy(dtype=np.float64, copy=True))
+        # Unknown risk levels get code -1 and never match a bucket
+        self.risk_codes = _readonly(np.array(
+            [RISK_LEVELS.index(level) if level in RISK_LEVELS else -1 for level in products["risk_level"]],
+            dtype=np.int8,
+        ))
+        self.categories, category_codes = np.unique(products["category"].astype(str).to_numpy(), return_inverse=True)
+        self.category_codes = _readonly(category_codes.astype(np.int16))
+        self.product_types, type_codes = np.unique(products["product_type"].astype(str).to_numpy(), return_inverse=True)
+        self.product_type_codes = _readonly(type_codes.astype(np.int16))
+
+        self._buckets: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for code, level in enumerate(RISK_LEVELS):
+            positions = np.flatnonzero(self.risk_codes == code)
+            positions = positions[np.argsort(self.min_investment[positions], kind="stable")]
+            self._buckets[level] = (_readonly(positions), _readonly(self.min_investment[positions]))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.records) == 0
+
+    def record(self, position: int) -> Mapping[str, Any]:
+        """Read-only row for a catalog position."""
+        return self.records[position]
+
+    def candidates(self, risk_levels: Sequence[str], max_investment: Optional[float] = None) -> np.ndarray:
+        """Positions of products in the given risk levels that fit the budget.
+
+        Buckets are returned in the order of risk_levels, each by ascending
+        minimum investment.
+        """
+        selected = []
+        for level in risk_levels:
+            positions, min_investment = self._buckets.get(level, (None, None))
+            if positions is None:
+                continue
+            if max_investment is not None:
+                positions = positions[:int(np.searchsorted(min_investment, max_investment, side="right"))]
+            selected.append(positions)
+        return np.concatenate(selected) if selected else np.empty(0, dtype=np.intp)
+
+    def bucket_size(self, risk_level: str) -> int:
+        positions, _ = self._buckets.get(risk_level, (np.empty(0), None))
+        return len(positions)
+
+
+@lru_cache(maxsize=4)
+def _load_catalog(path: str, mtime_ns: int, size: int) -> ProductCatalog:
+    return ProductCatalog(pd.read_csv(path))
+
+
+def get_product_catalog(path: Optional[str] = None) -> ProductCatalog:
+    """Return the shared catalog for path, reloading it when the file changes."""
+    path = os.path.abspath(path or get_settings().products_csv)
+    stat = os.stat(path)
+    return _load_catalog(path, stat.st_mtime_ns, stat.st_size)
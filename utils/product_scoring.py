@@ -0,0 +1,98 @@
+"""Vectorized product suitability scoring.
+
+Scores are computed for a (prospects, products) matrix from the catalog's
+encoded columns, so one prospect against every candidate and a batch
+re-recommendation job over the whole catalog are the same operation. Top-k
+selection uses argpartition rather than a full sort.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from utils.product_catalog import RISK_LEVELS, ProductCatalog
+
+
+BASE_SCORE = 0.5
+RISK_MATCH_BONUS = 0.3
+# Moderate products still suit Low and High clients a little
+MODERATE_BONUS = 0.1
+# Products whose minimum is at most this share of current savings
+AFFORDABLE_SHARE = 0.1
+AFFORDABLE_BONUS = 0.1
+PERSONA_BONUS = 0.1
+
+MODERATE = RISK_LEVELS.index("Moderate")
+PERSONA_RISK_PREFERENCE = {
+    "Aggressive Growth": RISK_LEVELS.index("High"),
+    "Cautious Planner": RISK_LEVELS.index("Low"),
+}
+
+
+def _risk_code(risk_level: Optional[str]) -> int:
+    return RISK_LEVELS.index(risk_level) if risk_level in RISK_LEVELS else -1
+
+
+def suitability_matrix(
+    catalog: ProductCatalog,
+    risk_levels: Sequence[Optional[str]],
+    current_savings: Sequence[float],
+    persona_types: Optional[Sequence[Optional[str]]] = None,
+    positions: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Suitability of each product for each prospect, shape (prospects, products).
+
+    positions restricts scoring to those catalog rows (columns follow its
+    order); by default every product is scored.
+    """
+    if positions is None:
+        positions = np.arange(len(catalog))
+    product_risk = catalog.risk_codes[positions][None, :]
+    min_investment = catalog.min_investment[positions][None, :]
+
+    client_risk = np.array([_risk_code(level) for level in risk_levels], dtype=np.int8)[:, None]
+    savings = np.asarray(current_savings, dtype=np.float64)[:, None]
+    persona_types = persona_types if persona_types is not None else [None] * len(client_risk)
+    preferred_risk = np.array(
+        [PERSONA_RISK_PREFERENCE.get(persona, -1) for persona in persona_types], dtype=np.int8
+    )[:, None]
+
+    scores = np.full((len(client_risk), len(positions)), BASE_SCORE)
+    risk_match = (product_risk == client_risk) & (client_risk >= 0)
+    scores += RISK_MATCH_BONUS * risk_match
+    scores += MODERATE_BONUS * (~risk_match & (product_risk == MODERATE) & (client_risk >= 0) & (client_risk != MODERATE))
+    scores += AFFORDABLE_BONUS * (min_investment <= savings * AFFORDABLE_SHARE)
+    scores += PERSONA_BONUS * ((product_risk == preferred_risk) & (preferred_risk >= 0))
+    return np.minimum(scores, 1.0, out=scores)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k best scores per row, best first.
+
+    Ties keep column order, so candidates pre-sorted by preference win ties.
+    Accepts a single row (1-D) or a matrix (2-D).
+    """
+    scores = np.asarray(scores)
+    if scores.ndim == 1:
+        return top_k(scores[None, :], k)[0]
+
+    rows, n = scores.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((rows, 0), dtype=np.intp)
+
+    if k < n:
+        # The k-th best score per row, then every column above it plus the
+        # leftmost columns tied with it
+        kth_column = np.argpartition(-scores, k - 1, axis=1)[:, k - 1:k]
+        kth = np.take_along_axis(scores, kth_column, axis=1)
+        above = scores > kth
+        tied = scores == kth
+        tied &= np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)
+        selected = np.nonzero(above | tied)[1].reshape(rows, k)
+    else:
+        selected = np.broadcast_to(np.arange(n), (rows, n))
+
+    # Sort only the k selected columns: score descending, column ascending
+    order = np.lexsort((selected, -np.take_along_axis(scores, selected, axis=1)), axis=1)
+    return np.take_along_axis(selected, order, axis=1)
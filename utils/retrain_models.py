@@ -1,208 +1,115 @@
 #!/usr/bin/env python3
 """Script to retrain ML models with current environment versions."""
 
+import argparse
+import tempfile
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, mean_squared_error
 from pathlib import Path
 import warnings
+
+from ml.training.pipeline import train_models
 warnings.filterwarnings('ignore')
 
-def create_synthetic_training_data():
+EXPERIENCE_LEVELS = np.array(['Beginner', 'Intermediate', 'Advanced'])
+DEFAULT_CHUNK_SIZE = 250_000
+
+def create_synthetic_training_data(n_samples=1000, seed=42):
     """Create synthetic training data for model training."""
     print("📊 Creating synthetic training data...")
     
-    # Generate synthetic prospect data
-    np.random.seed(42)
-    n_samples = 1000
+    data = generate_synthetic_chunk(n_samples, np.random.default_rng(seed))
     
+    print(f"✅ Created {len(data)} training samples")
+    return data
+
+def generate_synthetic_chunk(n_samples, rng):
+    """Generate n_samples labelled prospects with one RNG draw per column."""
     # Features
-    ages = np.random.randint(25, 65, n_samples)
-    annual_incomes = np.random.randint(300000, 2000000, n_samples)
-    current_savings = np.random.randint(50000, 1500000, n_samples)
-    target_amounts = current_savings + np.random.randint(500000, 5000000, n_samples)
-    investment_horizons = np.random.randint(1, 20, n_samples)
-    dependents = np.random.randint(0, 5, n_samples)
+    ages = rng.integers(25, 65, n_samples)
+    annual_incomes = rng.integers(300000, 2000000, n_samples)
+    current_savings = rng.integers(50000, 1500000, n_samples)
+    target_amounts = current_savings + rng.integers(500000, 5000000, n_samples)
+    investment_horizons = rng.integers(1, 20, n_samples)
+    dependents = rng.integers(0, 5, n_samples)
     
     # Experience levels
-    experience_levels = np.random.choice(['Beginner', 'Intermediate', 'Advanced'], n_samples)
+    experience_levels = EXPERIENCE_LEVELS[rng.integers(0, len(EXPERIENCE_LEVELS), n_samples)]
     
-    # Create DataFrame
-    data = pd.DataFrame({
+    # Generate risk labels based on business logic
+    risk_score = (
+        np.select([ages < 35, ages < 50], [2, 1], 0)  # Age factor
+        + np.select([annual_incomes > 1000000, annual_incomes > 600000], [2, 1], 0)  # Income factor
+        + np.select([investment_horizons > 10, investment_horizons > 5], [2, 1], 0)  # Investment horizon
+        + np.select([experience_levels == 'Advanced', experience_levels == 'Intermediate'], [2, 1], 0)
+        - (dependents > 2)  # Dependents reduce risk tolerance
+    )
+    risk_labels = np.select([risk_score >= 6, risk_score >= 3], ['High', 'Moderate'], 'Low')
+    
+    # Required monthly investment for the goal, assuming 8% annual return
+    required_amount = target_amounts - current_savings
+    affordable_investment = annual_incomes / 12 * 0.2  # 20% of income
+    monthly_rate = 0.08 / 12
+    months = investment_horizons * 12
+    required_monthly = required_amount * monthly_rate / np.expm1(months * np.log1p(monthly_rate))
+    
+    # Success probability drawn uniformly within the affordability band
+    bands = [
+        required_monthly <= affordable_investment * 0.5,
+        required_monthly <= affordable_investment,
+        required_monthly <= affordable_investment * 1.5,
+    ]
+    low = np.select(bands, [0.8, 0.6, 0.3], 0.1)
+    high = np.select(bands, [0.95, 0.8, 0.6], 0.3)
+    goal_success_probs = low + (high - low) * rng.random(n_samples)
+    
+    return pd.DataFrame({
         'age': ages,
         'annual_income': annual_incomes,
         'current_savings': current_savings,
         'target_goal_amount': target_amounts,
         'investment_horizon_years': investment_horizons,
         'number_of_dependents': dependents,
-        'investment_experience_level': experience_levels
+        'investment_experience_level': experience_levels.astype(object),
+        'risk_level': risk_labels.astype(object),
+        'goal_success_probability': goal_success_probs
     })
-    
-    # Generate risk labels based on business logic
-    risk_labels = []
-    for _, row in data.iterrows():
-        risk_score = 0
-        
-        # Age factor
-        if row['age'] < 35:
-            risk_score += 2
-        elif row['age'] < 50:
-            risk_score += 1
-        
-        # Income factor
-        if row['annual_income'] > 1000000:
-            risk_score += 2
-        elif row['annual_income'] > 600000:
-            risk_score += 1
-        
-        # Investment horizon
-        if row['investment_horizon_years'] > 10:
-            risk_score += 2
-        elif row['investment_horizon_years'] > 5:
-            risk_score += 1
-        
-        # Experience
-        if row['investment_experience_level'] == 'Advanced':
-            risk_score += 2
-        elif row['investment_experience_level'] == 'Intermediate':
-            risk_score += 1
-        
-        # Dependents reduce risk tolerance
-        if row['number_of_dependents'] > 2:
-            risk_score -= 1
-        
-        # Map to risk levels
-        if risk_score >= 6:
-            risk_labels.append('High')
-        elif risk_score >= 3:
-            risk_labels.append('Moderate')
-        else:
-            risk_labels.append('Low')
-    
-    data['risk_level'] = risk_labels
-    
-    # Generate goal success probabilities
-    goal_success_probs = []
-    for _, row in data.iterrows():
-        # Calculate required monthly investment
-        required_amount = row['target_goal_amount'] - row['current_savings']
-        monthly_income = row['annual_income'] / 12
-        affordable_investment = monthly_income * 0.2  # 20% of income
-        
-        # Simple calculation assuming 8% annual return
-        if row['investment_horizon_years'] > 0:
-            monthly_rate = 0.08 / 12
-            months = row['investment_horizon_years'] * 12
-            if monthly_rate > 0:
-                required_monthly = required_amount * monthly_rate / ((1 + monthly_rate) ** months - 1)
-            else:
-                required_monthly = required_amount / months
-        else:
-            required_monthly = float('inf')
-        
-        # Determine success probability
-        if required_monthly <= affordable_investment * 0.5:
-            prob = np.random.uniform(0.8, 0.95)
-        elif required_monthly <= affordable_investment:
-            prob = np.random.uniform(0.6, 0.8)
-        elif required_monthly <= affordable_investment * 1.5:
-            prob = np.random.uniform(0.3, 0.6)
-        else:
-            prob = np.random.uniform(0.1, 0.3)
-        
-        goal_success_probs.append(prob)
-    
-    data['goal_success_probability'] = goal_success_probs
-    
-    print(f"✅ Created {len(data)} training samples")
-    return data
 
-def train_risk_model(data):
-    """Train risk assessment model."""
-    print("🎯 Training risk assessment model...")
-    
-    # Prepare features
-    feature_cols = ['age', 'annual_income', 'current_savings', 'target_goal_amount', 
-                   'investment_horizon_years', 'number_of_dependents', 'investment_experience_level']
-    
-    X = data[feature_cols].copy()
-    y = data['risk_level']
-    
-    # Encode categorical variables
-    label_encoders = {}
-    for col in X.columns:
-        if X[col].dtype == 'object':
-            le = LabelEncoder()
-            X[col] = le.fit_transform(X[col])
-            label_encoders[col] = le
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Train model
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    
-    # Evaluate
-    y_pred = model.predict(X_test)
-    print("Risk Model Performance:")
-    print(classification_report(y_test, y_pred))
-    
-    # Save model and encoders
-    models_dir = Path("models")
-    models_dir.mkdir(exist_ok=True)
-    
-    joblib.dump(model, models_dir / "risk_profile_model.pkl")
-    joblib.dump(label_encoders, models_dir / "label_encoders.pkl")
-    
-    print("✅ Risk model saved successfully")
-    return model, label_encoders
+def iter_synthetic_chunks(n_samples, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Yield the synthetic dataset in chunks of at most chunk_size rows.
+    
+    Each chunk has its own child seed, so the data depends only on
+    (n_samples, chunk_size, seed) and chunks never overlap.
+    """
+    chunk_size = max(1, chunk_size)
+    n_chunks = -(-n_samples // chunk_size)
+    for index, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        rows = min(chunk_size, n_samples - index * chunk_size)
+        yield generate_synthetic_chunk(rows, np.random.default_rng(child))
 
-def train_goal_model(data):
-    """Train goal success model."""
-    print("🎯 Training goal success model...")
+def write_synthetic_parquet(path, n_samples, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Stream the synthetic dataset to a Parquet file, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
     
-    # Prepare features (exclude number_of_dependents for goal model)
-    feature_cols = ['age', 'annual_income', 'current_savings', 'target_goal_amount', 
-                   'investment_horizon_years', 'investment_experience_level']
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"📊 Writing {n_samples:,} synthetic samples to {path}...")
     
-    X = data[feature_cols].copy()
-    y = data['goal_success_probability']
-    
-    # Encode categorical variables
-    label_encoders = {}
-    for col in X.columns:
-        if X[col].dtype == 'object':
-            le = LabelEncoder()
-            X[col] = le.fit_transform(X[col])
-            label_encoders[col] = le
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Train model
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-    
-    # Evaluate
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    print(f"Goal Model Performance - MSE: {mse:.4f}")
-    
-    # Save model and encoders
-    models_dir = Path("models")
-    models_dir.mkdir(exist_ok=True)
-    
-    joblib.dump(model, models_dir / "goal_success_model.pkl")
-    joblib.dump(label_encoders, models_dir / "goal_success_label_encoders.pkl")
-    
-    print("✅ Goal model saved successfully")
-    return model, label_encoders
+    writer = None
+    try:
+        for chunk in iter_synthetic_chunks(n_samples, chunk_size, seed):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    print(f"✅ Wrote {n_samples:,} training samples")
+    return path
 
 def test_models():
     """Test the trained models."""
@@ -229,7 +136,7 @@ def test_models():
         print(f"📝 Testing with sample: {sample_data['age']} years old, ₹{sample_data['annual_income']:,} income")
         
         # Test risk model
-        risk_input = pd.DataFrame([sample_data])
+        risk_input = pd.DataFrame([sample_data])[list(risk_model.feature_names_in_)]
         for col, encoder in risk_encoders.items():
             if col in risk_input.columns:
                 risk_input[col] = encoder.transform(risk_input[col])
@@ -237,12 +144,12 @@ def test_models():
         risk_pred = risk_model.predict(risk_input)[0]
         risk_proba = risk_model.predict_proba(risk_input)[0]
         risk_mapping = {0: "Low", 1: "Moderate", 2: "High"}
-        risk_level = risk_mapping.get(risk_pred, f"Unknown({risk_pred})")
+        risk_level = risk_mapping.get(risk_pred, risk_pred)
         
         print(f"🎯 Risk Assessment: {risk_level} (confidence: {max(risk_proba):.1%})")
         
         # Test goal model
-        goal_input = pd.DataFrame([{k: v for k, v in sample_data.items() if k != 'number_of_dependents'}])
+        goal_input = pd.DataFrame([sample_data])[list(goal_model.feature_names_in_)]
         for col, encoder in goal_encoders.items():
             if col in goal_input.columns:
                 goal_input[col] = encoder.transform(goal_input[col])
@@ -259,18 +166,38 @@ def test_models():
         print(f"❌ Model testing failed: {e}")
         return False
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the risk and goal models on synthetic data")
+    parser.add_argument("--n-samples", type=int, default=1000, help="Synthetic training rows to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows generated per chunk")
+    parser.add_argument("--output", help="Stream the synthetic data to this Parquet file")
+    parser.add_argument("--generate-only", action="store_true", help="Write --output and skip training")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="RandomForest threads per model")
+    parser.add_argument("--workers", type=int, default=None, help="Models trained at once")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main retraining function."""
+    args = parse_args(argv)
     print("🔄 ML Model Retraining Script")
     print("=" * 50)
     
     try:
-        # Create training data
-        data = create_synthetic_training_data()
-        
-        # Train models
-        risk_model, risk_encoders = train_risk_model(data)
-        goal_model, goal_encoders = train_goal_model(data)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Create training data
+            data_path = args.output or Path(temp_dir) / "synthetic_training_data.parquet"
+            write_synthetic_parquet(data_path, args.n_samples, args.chunk_size, args.seed)
+            if args.generate_only:
+                return True
+            
+            # Train both models in parallel worker processes and publish them atomically
+            train_models(
+                str(data_path),
+                n_jobs=args.n_jobs,
+                max_workers=args.workers,
+                chunk_size=args.chunk_size
+            )
         
         # Test models
         test_success = test_models()
@@ -0,0 +1,133 @@
+"""Tolerant JSON extraction and schema validation for LLM responses.
+
+Agents ask the model for a single JSON object (Ollama ``format=json`` when
+available) and validate it straight into a pydantic model. Models still wrap
+JSON in prose or code fences, leave trailing commas, or stop mid-object when
+they hit the token limit, so the parser scans the text once with a small
+state machine: it finds the first object or array, closes whatever is left
+open and drops incomplete trailing members instead of giving up.
+"""
+
+import json
+from typing import Any, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# Candidate start positions tried before giving up on a response
+MAX_JSON_STARTS = 5
+
+_CLOSERS = {"{": "}", "[": "]"}
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """Return the first JSON object or array in text, repairing it if needed.
+
+    None when nothing usable is found.
+    """
+    if not text:
+        return None
+
+    starts = [index for index, char in enumerate(text) if char in _CLOSERS][:MAX_JSON_STARTS]
+    for start in starts:
+        try:
+            return _decoder.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            pass
+        for candidate in _repair_candidates(text, start):
+            try:
+                return json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+    return None
+
+
+def _repair_candidates(text: str, start: int) -> List[str]:
+    """Repaired spellings of the JSON value starting at text[start], best first.
+
+    Trailing commas are dropped as the scan goes. If the value is complete,
+    that is the only candidate; if it is truncated, the first candidate closes
+    everything as-is and the rest cut back to each earlier member boundary.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    # (length of out, open containers) at each point where a member may start
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = False
+    escape = False
+
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            out.append(char)
+            cuts.append((len(out), tuple(stack)))
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            out.append(stack.pop())
+            if not stack:
+                return ["".join(out)]
+        elif char == ",":
+            cuts.append((len(out), tuple(stack)))
+            out.append(char)
+        else:
+            out.append(char)
+
+    # Truncated: close as-is, then fall back to earlier member boundaries
+    tail = list(out)
+    if in_string:
+        tail.append('"')
+    _strip_trailing_comma(tail)
+    candidates = ["".join(tail) + "".join(reversed(stack))]
+    for length, open_containers in reversed(cuts):
+        prefix = out[:length]
+        _strip_trailing_comma(prefix)
+        candidates.append("".join(prefix) + "".join(reversed(open_containers)))
+    return candidates
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _has_content(value: Any) -> bool:
+    if isinstance(value, BaseModel):
+        return any(_has_content(field) for field in value.__dict__.values())
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, (list, tuple, dict)):
+        return bool(value)
+    return value is not None
+
+
+def parse_structured(text: str, schema: Type[SchemaT]) -> Optional[SchemaT]:
+    """Validate the JSON object in text into schema; None when it does not fit.
+
+    Schema fields default to empty and unknown keys are ignored, so drifted
+    JSON (e.g. ``{"riskFactors": [...]}``) would validate into an empty model.
+    A model without any content is treated as a failure as well.
+    """
+    value = extract_json(text)
+    if not isinstance(value, dict):
+        return None
+    try:
+        parsed = schema.model_validate(value)
+    except ValidationError:
+        return None
+    return parsed if _has_content(parsed) else None